@@ -1,6 +1,6 @@
 from fastapi import FastAPI, UploadFile, File, Form
 from pymongo import MongoClient
-from datetime import datetime
+from datetime import datetime, timezone
 import random, string
 import cloudinary
 import cloudinary.uploader
@@ -104,7 +104,9 @@ async def add_product(
         "country_of_origin": country_of_origin,
         "rating": rating,
         "price": price,
-        "created_at": datetime.now()
+        "created_at": datetime.now(timezone.utc),
+        # Watermark for the recommendation index sync (bump on every update, in UTC)
+        "updated_at": datetime.now(timezone.utc)
     }
 
     products.insert_one(product_doc)
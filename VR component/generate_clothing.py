@@ -5,6 +5,20 @@ from PIL import Image
 from diffusers import StableDiffusionControlNetPipeline, ControlNetModel
 from controlnet_aux import OpenposeDetector
 
+# Everything besides the photo and description that determines the output;
+# the backend's try-on result cache keys on it
+GENERATION_PARAMS = {
+    "base_model": "runwayml/stable-diffusion-v1-5",
+    "controlnet": "fusing/stable-diffusion-v1-5-controlnet-openpose",
+    "prompt_template": "A person wearing a {description}, fashion photo, studio lighting",
+    "negative_prompt": "blurry, deformed, worst quality, extra limbs, bad hands, lowres",
+    # Optimized for maximum speed: lower resolution (512x512) and minimum steps (10)
+    "num_inference_steps": 10,
+    "width": 512,
+    "height": 512,
+    "seed": 42,
+}
+
 def get_clothing_generator():
     """
     Initializes and returns the clothing generation pipeline.
@@ -15,13 +29,13 @@ def get_clothing_generator():
 
     # 1. Load ControlNet for OpenPose (Fixed pose constraint)
     controlnet = ControlNetModel.from_pretrained(
-        "fusing/stable-diffusion-v1-5-controlnet-openpose",
+        GENERATION_PARAMS["controlnet"],
         torch_dtype=dtype
     )
 
     # 2. Setup Stable Diffusion Pipeline
     pipe = StableDiffusionControlNetPipeline.from_pretrained(
-        "runwayml/stable-diffusion-v1-5",
+        GENERATION_PARAMS["base_model"],
         controlnet=controlnet,
         torch_dtype=dtype
     )
@@ -35,9 +49,12 @@ def get_clothing_generator():
 
     return pipe, model
 
-def generate_outfit(pipe, model, reference_image_path, description, output_path="output.png"):
+def generate_outfit(pipe, model, reference_image_path, description, output_path="output.png", progress_callback=None):
     """
     Generates an image based on a description while maintaining the pose of the reference image.
+
+    progress_callback(step, total_steps) is called after every denoising step;
+    an exception raised from it aborts the generation.
     """
     device = pipe.device
 
@@ -49,22 +66,29 @@ def generate_outfit(pipe, model, reference_image_path, description, output_path=
     pose = model(reference_image)
 
     # Combine user description with basic prompts for speed
-    full_prompt = f"A person wearing a {description}, fashion photo, studio lighting"
-    negative_prompt = "blurry, deformed, worst quality, extra limbs, bad hands, lowres"
+    full_prompt = GENERATION_PARAMS["prompt_template"].format(description=description)
+    negative_prompt = GENERATION_PARAMS["negative_prompt"]
 
     # Generate
     print(f"Generating image with prompt: {full_prompt}")
-    generator = torch.Generator(device=device).manual_seed(42)
+    generator = torch.Generator(device=device).manual_seed(GENERATION_PARAMS["seed"])
+
+    num_inference_steps = GENERATION_PARAMS["num_inference_steps"]
+    step_callback = None
+    if progress_callback is not None:
+        def step_callback(pipeline, step, timestep, callback_kwargs):
+            progress_callback(step + 1, num_inference_steps)
+            return callback_kwargs
 
-    # Optimized for maximum speed: lower resolution (512x512) and minimum steps (10)
     output = pipe(
         prompt=full_prompt,
         image=pose,
         negative_prompt=negative_prompt,
-        num_inference_steps=10,
-        width=512,
-        height=512,
+        num_inference_steps=num_inference_steps,
+        width=GENERATION_PARAMS["width"],
+        height=GENERATION_PARAMS["height"],
         generator=generator,
+        callback_on_step_end=step_callback,
     )
 
     # Save output
@@ -73,6 +97,15 @@ def generate_outfit(pipe, model, reference_image_path, description, output_path=
     print(f"Success! Image saved to {output_path}")
     return output_image
 
+def warm_up_generator(pipe, model):
+    """
+    Runs the pose detector and one small denoising step so lazy initialisation
+    (CUDA kernels, weight layouts) happens before the first real request.
+    """
+    blank = Image.new("RGB", (256, 256), "white")
+    pose = model(blank)
+    pipe(prompt="a person", image=pose, num_inference_steps=1, width=256, height=256)
+
 if __name__ == "__main__":
     # Example usage
     # Ensure you have a 'person.jpg' in the directory or update the path below
@@ -0,0 +1,84 @@
+"""
+Response size and serialisation time of /recommend-outfits per response shape.
+
+Runs real queries through the recommender and, for each shape, measures the
+body bytes and the time to encode it. The legacy shape goes through FastAPI's
+default path (jsonable_encoder + json); the shaped ones go through the
+fast encoder the endpoint now returns directly.
+
+Usage: python -m backend.bench_responses [--top-n 10 50] [--repeat 50]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+sys.path.append(os.path.join(root_dir, "recommendations component"))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.main import FastJSONResponse
+from backend.projection import parse_fields, shape_recommendations
+
+QUERIES = [
+    "breathable cotton kurta for a summer wedding",
+    "silk saree in deep red for a festival evening",
+    "casual linen shirt for the beach",
+]
+
+CARD_FIELDS = "product_id,name,category,price,styles,occasions,matching_percentage"
+
+
+def _legacy(recommendations):
+    return JSONResponse(jsonable_encoder({"recommendations": recommendations})).body
+
+
+def _shaped(fields, compact):
+    def encode(recommendations):
+        return FastJSONResponse(shape_recommendations(recommendations, parse_fields(fields), compact)).body
+    return encode
+
+
+SHAPES = [
+    ("legacy", _legacy),
+    ("fast encoder only", _shaped(None, False)),
+    ("compact", _shaped(None, True)),
+    ("compact + card fields", _shaped(CARD_FIELDS, True)),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--top-n", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    from fashion_recommender import get_outfit_recommendations
+
+    print(f"encoder: {FastJSONResponse.__name__}")
+    results = {}
+    for top_n in args.top_n:
+        batches = [get_outfit_recommendations(query, top_n=top_n) for query in QUERIES]
+        print(f"\ntop_n={top_n}")
+        print(f"{'shape':<24} {'bytes':>9} {'vs legacy':>10} {'encode ms':>10}")
+        baseline = None
+        for name, encode in SHAPES:
+            size = sum(len(encode(recs)) for recs in batches) / len(batches)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for recs in batches:
+                    encode(recs)
+            encode_ms = (time.perf_counter() - start) * 1000 / (args.repeat * len(batches))
+            baseline = baseline or size
+            results[f"{top_n}/{name}"] = {"bytes": round(size), "encode_ms": round(encode_ms, 3)}
+            print(f"{name:<24} {size:>9.0f} {size / baseline:>9.0%} {encode_ms:>10.3f}")
+    print()
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
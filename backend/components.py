@@ -0,0 +1,179 @@
+"""
+Lazily imported component modules.
+
+The component modules pull in heavy stacks at import time: cv2 and pandas
+for face analysis; pandas, langchain and spaCy for recommendations; torch
+and diffusers for try-on. Importing them when backend.main loads delays the
+moment uvicorn binds its port. A LazyComponent checks availability with
+importlib.util.find_spec, which locates a module without executing it. The
+real import happens on first attribute access, normally during the
+background warm-up. Import time and RSS growth are recorded per component
+for the startup report.
+
+Usage: python -m backend.components   (imports each component and prints the report)
+"""
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+# One component imports at a time so the RSS growth of each import can be
+# attributed to it; imports hold the GIL for most of their run anyway
+_import_lock = threading.Lock()
+
+
+def rss_mb():
+    """Resident set size of this process in MB"""
+    # Linux: current RSS from /proc; falls back to peak RSS elsewhere
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _module_found(name):
+    # Already imported modules need no lookup (and may have no __spec__)
+    return name in sys.modules or importlib.util.find_spec(name) is not None
+
+
+class ComponentUnavailable(Exception):
+    """Raised when a component's module cannot be imported"""
+
+    def __init__(self, name, reason):
+        super().__init__(f"{name} component not available: {reason}")
+        self.name = name
+        self.reason = reason
+
+
+class LazyComponent:
+    """Facade over a component module that is imported on first use"""
+
+    def __init__(self, name, module, requires=()):
+        """
+        Args:
+            name (str): Component name used in reports and errors
+            module (str): Module to import, found on sys.path
+            requires (tuple): Top-level third-party packages the module needs;
+                checked with find_spec, without importing them
+        """
+        self.name = name
+        self.module_name = module
+        self.requires = tuple(requires)
+        self._module = None
+        self._error = None
+        self._missing = None
+        self.import_ms = None
+        self.rss_delta_mb = None
+
+    def missing(self):
+        """Module and required packages that cannot be found (cached)"""
+        if self._missing is None:
+            self._missing = [
+                name for name in (self.module_name,) + self.requires
+                if not _module_found(name)
+            ]
+        return self._missing
+
+    @property
+    def available(self):
+        return self._error is None and not self.missing()
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        """
+        Import the module if needed.
+
+        Raises:
+            ComponentUnavailable: when packages are missing or the import fails
+        """
+        if self._module is not None:
+            return self._module
+        if self.missing():
+            raise ComponentUnavailable(self.name, f"missing {', '.join(self.missing())}")
+        if self._error is not None:
+            raise ComponentUnavailable(self.name, self._error)
+
+        with _import_lock:
+            if self._module is None and self._error is None:
+                rss_before = rss_mb()
+                start = time.perf_counter()
+                try:
+                    module = importlib.import_module(self.module_name)
+                except Exception as e:
+                    self._error = f"{type(e).__name__}: {e}"
+                    print(f"Warning: {self.name} component not available: {self._error}")
+                else:
+                    self.import_ms = round((time.perf_counter() - start) * 1000, 3)
+                    self.rss_delta_mb = round(rss_mb() - rss_before, 1)
+                    self._module = module
+        if self._module is None:
+            raise ComponentUnavailable(self.name, self._error)
+        return self._module
+
+    def __getattr__(self, attr):
+        # Only reached for names not set in __init__, i.e. module attributes
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+    def report(self):
+        return {
+            "module": self.module_name,
+            "available": self.available,
+            "loaded": self.loaded,
+            "missing": self.missing(),
+            "error": self._error,
+            "import_ms": self.import_ms,
+            "rss_delta_mb": self.rss_delta_mb,
+        }
+
+
+def startup_report(components, app_import_ms=None):
+    """
+    Import time and RSS per component.
+
+    Args:
+        components (dict): name -> LazyComponent (or any object with report())
+        app_import_ms (float): Time backend.main took to import
+    """
+    return {
+        "app_import_ms": app_import_ms,
+        "rss_mb": round(rss_mb(), 1),
+        "components": {name: component.report() for name, component in components.items()},
+    }
+
+
+def main():
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, root_dir)
+    from backend.main import _components
+
+    print(f"{'component':<12} {'available':>9} {'import ms':>10} {'RSS +MB':>8}  notes")
+    for name, component in _components.items():
+        try:
+            component.load()
+        except Exception:
+            # Under -m this module is __main__, so backend.main raises its own
+            # ComponentUnavailable class; either way the report has the reason
+            pass
+        report = component.report()
+        notes = report["error"] or (f"missing {', '.join(report['missing'])}" if report["missing"] else "")
+        print(
+            f"{name:<12} {str(report['available']):>9} {report['import_ms'] or '-':>10} "
+            f"{report['rss_delta_mb'] if report['rss_delta_mb'] is not None else '-':>8}  {notes}"
+        )
+    print(f"Total RSS: {rss_mb():.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
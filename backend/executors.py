@@ -0,0 +1,178 @@
+"""
+Bounded executors for CPU-bound endpoint work.
+
+Each component (face analysis, recommendations, try-on) gets its own pool
+so a burst on one cannot starve the others, and none of them run on the
+event loop. Admission is bounded: once `workers + queue_size` calls are in
+flight, new calls are rejected immediately with ExecutorSaturated instead of
+queueing without limit; the API turns that into 503 + Retry-After.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+
+class ExecutorSaturated(Exception):
+    """Raised when an executor's admission queue is full"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} executor saturated, retry after {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Thread or process pool with a bounded admission queue.
+
+    Counters are updated under a lock: admission happens on the event loop,
+    blocking submissions (run_blocking) on other threads, and the running
+    counter on the worker threads.
+    """
+
+    def __init__(self, name, workers=2, queue_size=8, kind="thread"):
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.queue_size = max(0, int(queue_size))
+        self.kind = kind
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        elif kind == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{name}-worker")
+        else:
+            raise ValueError(f"Unknown executor kind '{kind}', expected 'thread' or 'process'")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        # Exponential moving averages (seconds) used for Retry-After and monitoring
+        self._avg_service = 0.0
+        self._avg_wait = 0.0
+
+    @property
+    def capacity(self):
+        return self.workers + self.queue_size
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up (at least 1)"""
+        backlog = max(self._in_flight - self.workers + 1, 1)
+        return max(1, int(round(backlog * self._avg_service / self.workers)))
+
+    def _record(self, attr, value):
+        current = getattr(self, attr)
+        setattr(self, attr, value if current == 0.0 else 0.8 * current + 0.2 * value)
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the pool.
+
+        Raises:
+            ExecutorSaturated: when workers + queue_size calls are already in flight
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturated(self.name, self.retry_after())
+            self._in_flight += 1
+        submitted = time.perf_counter()
+        call = partial(fn, *args, **kwargs)
+        try:
+            if self.kind == "process":
+                # Process workers cannot update our counters; time the whole call
+                result = await asyncio.get_running_loop().run_in_executor(self._pool, call)
+                self._record("_avg_service", time.perf_counter() - submitted)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._pool, self._timed, call, submitted
+                )
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def run_blocking(self, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the pool from a plain thread and wait for it.
+
+        For work already queued elsewhere (e.g. try-on jobs): it is never
+        rejected and waits for a worker, but counts as in flight, so calls
+        through run() see the pool as busy meanwhile. fn must be picklable
+        for process pools.
+        """
+        with self._lock:
+            self._in_flight += 1
+        submitted = time.perf_counter()
+        call = partial(fn, *args, **kwargs)
+        try:
+            if self.kind == "process":
+                result = self._pool.submit(call).result()
+                self._record("_avg_service", time.perf_counter() - submitted)
+            else:
+                result = self._pool.submit(self._timed, call, submitted).result()
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _timed(self, call, submitted):
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            self._record("_avg_wait", started - submitted)
+        try:
+            return call()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._record("_avg_service", time.perf_counter() - started)
+
+    def stats(self):
+        running = self._running if self.kind == "thread" else min(self._in_flight, self.workers)
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "running": running,
+            "queued": max(self._in_flight - running, 0),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self._avg_wait * 1000, 3),
+            "avg_service_ms": round(self._avg_service * 1000, 3),
+        }
+
+    def shutdown(self, wait=False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def executor_from_env(name, workers, queue_size, kind="thread"):
+    """
+    BoundedExecutor configured by EXECUTOR_<NAME>_WORKERS / _QUEUE / _KIND.
+
+    Args:
+        name (str): Component name, e.g. 'face' -> EXECUTOR_FACE_WORKERS
+        workers (int): Default pool size
+        queue_size (int): Default admission queue length beyond the workers
+        kind (str): Default pool kind, 'thread' or 'process'
+    """
+    prefix = f"EXECUTOR_{name.upper()}"
+    return BoundedExecutor(
+        name,
+        workers=int(os.getenv(f"{prefix}_WORKERS", str(workers))),
+        queue_size=int(os.getenv(f"{prefix}_QUEUE", str(queue_size))),
+        kind=os.getenv(f"{prefix}_KIND", kind).lower(),
+    )
@@ -1,14 +1,31 @@
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
 import uvicorn
+import asyncio
+import importlib.util
 import os
 import sys
 import shutil
-import cv2
+import tempfile
 import numpy as np
 import json
-from uuid import uuid4
+import threading
+from contextlib import asynccontextmanager
+from backend.response_cache import ResponseCache, canonical_recommendation_key
+from backend.executors import ExecutorSaturated, executor_from_env
+from backend.tryon_jobs import TryOnJobQueue, TERMINAL_STATES
+from backend.tryon_cache import TryOnResultCache, result_key
+from backend.warmup import ComponentWarmup
+from backend.components import ComponentUnavailable, LazyComponent, startup_report
+from backend.uploads import InvalidImage, decode_image, decode_scale, normalise_image, read_upload
+from backend.projection import parse_fields, shape_recommendations
 
 # Add component directories to path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -17,40 +34,188 @@ sys.path.append(os.path.join(root_dir, 'facial features component'))
 sys.path.append(os.path.join(root_dir, 'recommendations component'))
 sys.path.append(os.path.join(root_dir, 'VR component'))
 
-# Import Components
-try:
-    from predict import get_analyzer
-    FACE_ANALYSIS_AVAILABLE = True
-except Exception as e:
-    print(f"Warning: Facial analysis component not available: {e}")
-    FACE_ANALYSIS_AVAILABLE = False
-
-try:
-    from fashion_recommender import get_outfit_recommendations
-    RECOMMENDATION_AVAILABLE = True
-except Exception as e:
-    print(f"Warning: Recommendation component not available: {e}")
-    RECOMMENDATION_AVAILABLE = False
+# Components are imported on first use (normally by the start-up warm-up),
+# so uvicorn binds its port without loading cv2 / pandas / spaCy / torch;
+# availability is checked with find_spec, which does not import anything
+_face = LazyComponent("face", "predict", requires=("cv2", "pandas", "dotenv"))
+_recommender = LazyComponent(
+    "recommend", "fashion_recommender", requires=("pandas", "langchain_community", "spacy")
+)
 
+# Optional MongoDB products_master -> recommendation index sync
+CATALOG_SYNC_ENABLED = os.getenv("CATALOG_SYNC_ENABLED", "False").lower() == "true"
+CATALOG_SYNC_INTERVAL = float(os.getenv("CATALOG_SYNC_INTERVAL", "5"))
+CATALOG_SYNC_BATCH = int(os.getenv("CATALOG_SYNC_BATCH", "32"))
+# Seconds below the watermark re-read each poll (late commits, writer clock skew)
+CATALOG_SYNC_OVERLAP = float(os.getenv("CATALOG_SYNC_OVERLAP", "60"))
+# Seconds between hard-delete reconciles against the full product id list
+CATALOG_SYNC_RECONCILE_INTERVAL = float(os.getenv("CATALOG_SYNC_RECONCILE_INTERVAL", "300"))
+_catalog_sync_worker = None
 
 # DEMO_MODE Flag
 DEMO_MODE = os.getenv("DEMO_MODE", "False").lower() == "true"
 
-try:
-    if DEMO_MODE:
-        print("DEMO_MODE is enabled. VR component will be mocked.")
-        VR_AVAILABLE = True # Pretend it's available
-        # Define mock functions if not importing
-        def get_clothing_generator(): return None, None
-        def generate_outfit(*args): pass
-    else:
-        from generate_clothing import get_clothing_generator, generate_outfit
-        VR_AVAILABLE = True
-except Exception as e:
-    print(f"Warning: VR component not available: {e}")
-    VR_AVAILABLE = False
-
-app = FastAPI(title="Aiva Fashion API")
+class _DemoTryOn:
+    """Stands in for generate_clothing in DEMO_MODE"""
+    name = "tryon"
+    available = True
+    loaded = True
+    GENERATION_PARAMS = {"demo": True}
+
+    def get_clothing_generator(self): return None, None
+    def generate_outfit(self, *args, **kwargs): pass
+    def warm_up_generator(self, *args): pass
+
+    def report(self):
+        return {"module": None, "available": True, "loaded": True, "demo": True}
+
+if DEMO_MODE:
+    print("DEMO_MODE is enabled. VR component will be mocked.")
+    _vr = _DemoTryOn()
+else:
+    _vr = LazyComponent(
+        "tryon", "generate_clothing", requires=("torch", "diffusers", "controlnet_aux", "PIL")
+    )
+
+_components = {"face": _face, "recommend": _recommender, "tryon": _vr}
+for _component in _components.values():
+    if not _component.available:
+        print(f"Warning: {_component.name} component not available: missing {', '.join(_component.missing())}")
+
+async def _require(component, detail):
+    """Import the component off the event loop; 503 with detail if it is unavailable"""
+    if not component.available:
+        raise HTTPException(status_code=503, detail=detail)
+    if not component.loaded:
+        try:
+            await asyncio.to_thread(component.load)
+        except ComponentUnavailable:
+            raise HTTPException(status_code=503, detail=detail)
+    return component
+
+def _check_filters(filters):
+    """400 for hard filters the attribute index cannot apply (unknown field, bad bounds)"""
+    try:
+        _recommender.validate_filters(filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _parse_filters(raw):
+    """
+    Hard filters form field -> dict, e.g. {"occasions": ["wedding"], "price": {"max": 3000}}.
+
+    Raises:
+        HTTPException: 400 unless it is a JSON object of applicable filters
+    """
+    not_an_object = HTTPException(status_code=400, detail="filters must be a JSON object")
+    if not raw:
+        return None
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        raise not_an_object
+    if parsed is None:
+        return None
+    # Valid JSON that is not an object (a list, a number) is rejected as well
+    if not isinstance(parsed, dict):
+        raise not_an_object
+    _check_filters(parsed)
+    return parsed
+
+# Components loaded and exercised once at start-up, concurrently, before
+# /ready reports 200; components left out load lazily on first use. Try-on
+# (diffusion + ControlNet, GPU-heavy) is only warmed when listed explicitly
+WARMUP_COMPONENTS = {
+    name.strip() for name in os.getenv("WARMUP_COMPONENTS", "face,recommend").lower().split(",")
+    if name.strip()
+}
+# Warm-up attempts after a failure, with exponential backoff from WARMUP_RETRY_BACKOFF seconds
+WARMUP_RETRIES = int(os.getenv("WARMUP_RETRIES", "3"))
+WARMUP_RETRY_BACKOFF = float(os.getenv("WARMUP_RETRY_BACKOFF", "5"))
+
+@asynccontextmanager
+async def lifespan(app):
+    _start_catalog_sync()
+    if _vr.available:
+        _tryon_jobs.start()
+    # Warm up in the background so /health answers while models load
+    warmup_task = asyncio.create_task(_warmup.run())
+    yield
+    warmup_task.cancel()
+    _tryon_jobs.stop(timeout=5)
+    if _catalog_sync_worker is not None:
+        _catalog_sync_worker.stop(timeout=5)
+    if _recommender.loaded:
+        # Catalog upserts persist on a timer; write out what is still pending
+        await asyncio.to_thread(_recommender.flush_catalog)
+
+app = FastAPI(title="Aiva Fashion API", lifespan=lifespan)
+
+# Response cache for /recommend-outfits (invalidated when the catalog index changes)
+_recommendation_cache = ResponseCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+)
+
+def _is_cacheable(recommendations):
+    return not (isinstance(recommendations, dict) and "error" in recommendations)
+
+# Recommendation endpoints return their response directly (skipping
+# jsonable_encoder), serialised with orjson when it is installed
+if importlib.util.find_spec("orjson") is not None:
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+else:
+    FastJSONResponse = JSONResponse
+
+# CPU-bound work runs on per-component pools with bounded admission queues,
+# never on the event loop (EXECUTOR_<NAME>_WORKERS / _QUEUE / _KIND; only
+# 'face' calls a picklable function, so only it can use KIND=process)
+_executors = {
+    "face": executor_from_env("face", workers=2, queue_size=8),
+    "recommend": executor_from_env("recommend", workers=4, queue_size=32),
+    "tryon": executor_from_env("tryon", workers=1, queue_size=2),
+}
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"{exc.name} service busy, retry later"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# Uploads are capped while reading and decoded only as large as the consumer
+# needs: face crops for skin tone / shape come from a ~1024px image, the
+# pose detector and generator work at 512px
+UPLOAD_MAX_BYTES = int(float(os.getenv("UPLOAD_MAX_MB", "15")) * 1024 * 1024)
+FACE_DECODE_MAX_SIDE = int(os.getenv("FACE_DECODE_MAX_SIDE", "1024"))
+TRYON_DECODE_MAX_SIDE = int(os.getenv("TRYON_DECODE_MAX_SIDE", "768"))
+
+@app.middleware("http")
+async def reject_oversized_uploads(request, call_next):
+    # Refuse on the declared length, before the multipart parser spools the body
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > UPLOAD_MAX_BYTES + 64 * 1024:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Upload larger than {UPLOAD_MAX_BYTES // (1024 * 1024)} MB"}
+        )
+    return await call_next(request)
+
+@app.exception_handler(InvalidImage)
+async def invalid_image_handler(request, exc):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+def _analyze_upload(contents):
+    # Module-level so EXECUTOR_FACE_KIND=process can pickle it; decoding runs
+    # on the face pool too, off the event loop
+    img = decode_image(contents, max_side=FACE_DECODE_MAX_SIDE)
+    results = _face.get_analyzer().analyze_image(img)
+    # Boxes come back in the reduced image; clients draw on the uploaded one
+    scale = decode_scale(contents, img)
+    for res in results:
+        res['box'] = [round(float(v) * scale) for v in res['box']]
+    return results
 
 # Configure CORS
 app.add_middleware(
@@ -65,15 +230,48 @@ app.add_middleware(
 os.makedirs("generated_images", exist_ok=True)
 app.mount("/static", StaticFiles(directory="generated_images"), name="static")
 
+def _upsert_catalog_rows(rows):
+    # Resolved on the sync thread, so the recommender import stays off start-up
+    return _recommender.upsert_catalog_rows(rows)
+
+def _delete_catalog_rows(ids):
+    return _recommender.delete_catalog_rows(ids)
+
+def _external_catalog_ids():
+    return _recommender.get_external_ids()
+
+def _start_catalog_sync():
+    global _catalog_sync_worker
+    if not (CATALOG_SYNC_ENABLED and _recommender.available):
+        return
+    mongo_uri = os.getenv("MONGO_URI")
+    if not mongo_uri:
+        print("Warning: CATALOG_SYNC_ENABLED is set but MONGO_URI is not; catalog sync disabled")
+        return
+    try:
+        from catalog_sync import create_mongo_worker
+        _catalog_sync_worker = create_mongo_worker(
+            mongo_uri,
+            apply_rows=_upsert_catalog_rows,
+            delete_rows=_delete_catalog_rows,
+            indexed_ids=_external_catalog_ids,
+            poll_interval=CATALOG_SYNC_INTERVAL,
+            batch_size=CATALOG_SYNC_BATCH,
+            overlap=CATALOG_SYNC_OVERLAP,
+            reconcile_interval=CATALOG_SYNC_RECONCILE_INTERVAL
+        ).start()
+    except Exception as e:
+        print(f"Warning: Catalog sync not started: {e}")
+
 @app.get("/")
 async def root():
     return {
         "message": "Welcome to Aiva Fashion API",
         "mode": "DEMO" if DEMO_MODE else "FULL",
         "components": {
-            "face_analysis": FACE_ANALYSIS_AVAILABLE,
-            "recommendations": RECOMMENDATION_AVAILABLE,
-            "virtual_try_on": VR_AVAILABLE
+            "face_analysis": _face.available,
+            "recommendations": _recommender.available,
+            "virtual_try_on": _vr.available
         }
     }
 
@@ -81,33 +279,60 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    503 until every component selected for warm-up is warm or has exhausted
+    its retries; "degraded" is true when one failed (it loads on first use)
+    """
+    status = _warmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/startup")
+async def startup_status():
+    """Import time and RSS growth per component, plus current process RSS"""
+    return startup_report(_components, app_import_ms=_app_import_ms)
+
+@app.get("/executors")
+async def executor_status():
+    """Queue depth and throughput per component pool, for monitoring"""
+    return dict(
+        {name: executor.stats() for name, executor in _executors.items()},
+        tryon_jobs=_tryon_jobs.stats(),
+        tryon_cache=_tryon_cache.stats()
+    )
+
+@app.get("/catalog/sync-status")
+async def catalog_sync_status():
+    if _catalog_sync_worker is None:
+        return {"enabled": False}
+    catalog_version = _recommender.get_catalog_version() if _recommender.loaded else None
+    return dict(_catalog_sync_worker.status(), enabled=True, catalog_version=catalog_version)
+
+def _serialize_faces(results):
+    # Convert numpy types to native python types for JSON serialization
+    processed_results = []
+    for res in results:
+        processed = res.copy()
+        processed['box'] = [int(x) for x in res['box']]
+        # Add logic to convert other numpy types if necessary
+        processed_results.append(processed)
+    return processed_results
+
 @app.post("/analyze-face")
 async def analyze_face(file: UploadFile = File(...)):
-    if not FACE_ANALYSIS_AVAILABLE:
-        raise HTTPException(status_code=503, detail="Face analysis service unavailable")
+    await _require(_face, "Face analysis service unavailable")
     
     try:
-        contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if img is None:
-            raise HTTPException(status_code=400, detail="Invalid image file")
+        contents = await read_upload(file, UPLOAD_MAX_BYTES)
 
         # In DEMO_MODE, you might also want to mock analysis if memory is tight,
         # but for now we keep it real as requested unless it crashes.
-        analyzer = get_analyzer()
-        results = analyzer.analyze_image(img)
-        
-        # Convert numpy types to native python types for JSON serialization
-        processed_results = []
-        for res in results:
-            processed = res.copy()
-            processed['box'] = [int(x) for x in res['box']]
-            # Add logic to convert other numpy types if necessary
-            processed_results.append(processed)
+        results = await _executors["face"].run(_analyze_upload, contents)
             
-        return {"faces": processed_results}
+        return {"faces": _serialize_faces(results)}
+    except (HTTPException, ExecutorSaturated, InvalidImage):
+        raise
     except Exception as e:
         print(f"Error in analyze_face: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -116,94 +341,387 @@ async def analyze_face(file: UploadFile = File(...)):
 async def recommend_outfits(
     description: str = Form(...),
     gender_filter: str = Form(None),
-    top_n: int = Form(10)
+    top_n: int = Form(10),
+    filters: str = Form(None),
+    profile: bool = Form(False),
+    fields: str = Form(None),
+    compact: bool = Form(False)
 ):
-    if not RECOMMENDATION_AVAILABLE:
-        raise HTTPException(status_code=503, detail="Recommendation service unavailable")
+    """
+    fields: comma-separated item keys to return, e.g. "product_id,name,price";
+    compact: extracted_attributes once at the top level instead of in every item
+    """
+    await _require(_recommender, "Recommendation service unavailable")
+
+    parsed_filters = _parse_filters(filters)
     
-    try:
-        recommendations = get_outfit_recommendations(
+    def compute(timings=None):
+        return _recommender.get_outfit_recommendations(
             user_description=description,
             top_n=top_n,
-            gender_filter=gender_filter
+            gender_filter=gender_filter,
+            filters=parsed_filters,
+            timings=timings
         )
+
+    try:
+        if profile:
+            # Profiled requests bypass the response cache so every stage is measured
+            timings = {}
+            start = time.perf_counter()
+            recommendations = await _executors["recommend"].run(compute, timings)
+            total_ms = round((time.perf_counter() - start) * 1000, 3)
+        else:
+            # Identical in-flight requests share one computation
+            key = canonical_recommendation_key(description, gender_filter, top_n, parsed_filters)
+            recommendations = await _recommendation_cache.get_or_compute(
+                key,
+                _recommender.get_catalog_version,
+                compute,
+                should_cache=_is_cacheable,
+                run=_executors["recommend"].run
+            )
         
         if isinstance(recommendations, dict) and "error" in recommendations:
             raise HTTPException(status_code=500, detail=recommendations["error"])
-            
-        return {"recommendations": recommendations}
+
+        body = shape_recommendations(recommendations, parse_fields(fields), compact)
+        if profile:
+            body["profile"] = {"stages_ms": timings, "total_ms": total_ms}
+        return FastJSONResponse(body)
+    except (HTTPException, ExecutorSaturated):
+        raise
     except Exception as e:
         print(f"Error in recommend_outfits: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/recommend-from-image")
+async def recommend_from_image(
+    file: UploadFile = File(...),
+    top_n: int = Form(10),
+    filters: str = Form(None),
+    fields: str = Form(None),
+    compact: bool = Form(False)
+):
+    """Analyze the photo and recommend for the first detected face in one round trip"""
+    await _require(_face, "Face analysis service unavailable")
+    await _require(_recommender, "Recommendation service unavailable")
+
+    parsed_filters = _parse_filters(filters)
+
+    try:
+        contents = await read_upload(file, UPLOAD_MAX_BYTES)
+        faces = _serialize_faces(await _executors["face"].run(_analyze_upload, contents))
+        if not faces:
+            return {"faces": [], "query": None, "recommendations": []}
+
+        # Detected gender / skin tone go in as structured filters; explicit filters win
+        description, gender_filter, face_filters = _recommender.face_to_recommendation_query(faces[0])
+        merged_filters = dict(face_filters or {}, **(parsed_filters or {})) or None
+
+        def compute():
+            return _recommender.get_outfit_recommendations(
+                user_description=description,
+                top_n=top_n,
+                gender_filter=gender_filter,
+                filters=merged_filters
+            )
+
+        key = canonical_recommendation_key(description, gender_filter, top_n, merged_filters)
+        recommendations = await _recommendation_cache.get_or_compute(
+            key,
+            _recommender.get_catalog_version,
+            compute,
+            should_cache=_is_cacheable,
+            run=_executors["recommend"].run
+        )
+
+        if isinstance(recommendations, dict) and "error" in recommendations:
+            raise HTTPException(status_code=500, detail=recommendations["error"])
+
+        body = {
+            "faces": faces,
+            "query": {
+                "description": description,
+                "gender_filter": gender_filter,
+                "filters": merged_filters
+            }
+        }
+        body.update(shape_recommendations(recommendations, parse_fields(fields), compact))
+        return FastJSONResponse(body)
+    except (HTTPException, ExecutorSaturated, InvalidImage):
+        raise
+    except Exception as e:
+        print(f"Error in recommend_from_image: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+class BatchRecommendationRequest(BaseModel):
+    descriptions: List[str]
+    gender_filter: Optional[str] = None
+    top_n: int = 10
+    filters: Optional[dict] = None
+    fields: Optional[List[str]] = None
+    compact: bool = False
+
+@app.post("/recommend-outfits/batch")
+async def recommend_outfits_batch(request: BatchRecommendationRequest):
+    await _require(_recommender, "Recommendation service unavailable")
+    _check_filters(request.filters)
+
+    try:
+        batch = await _executors["recommend"].run(
+            _recommender.get_outfit_recommendations_batch,
+            user_descriptions=request.descriptions,
+            top_n=request.top_n,
+            gender_filter=request.gender_filter,
+            filters=request.filters
+        )
+
+        if isinstance(batch, dict) and "error" in batch:
+            raise HTTPException(status_code=500, detail=batch["error"])
+
+        # Results are returned in the same order as the submitted descriptions
+        fields = parse_fields(request.fields)
+        return FastJSONResponse({
+            "results": [shape_recommendations(recs, fields, request.compact) for recs in batch]
+        })
+    except (HTTPException, ExecutorSaturated):
+        raise
+    except Exception as e:
+        print(f"Error in recommend_outfits_batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/products/{product_id}/similar")
+async def similar_products(product_id: str, top_n: int = 10, gender_filter: Optional[str] = None):
+    await _require(_recommender, "Recommendation service unavailable")
+
+    # Precomputed neighbour-graph lookup (RECOMMENDER_SIMILAR_K), else one k-NN search
+    similar = await _executors["recommend"].run(
+        _recommender.get_similar_products, product_id, top_n, gender_filter
+    )
+
+    if similar is None:
+        raise HTTPException(status_code=404, detail=f"Unknown product '{product_id}'")
+    if isinstance(similar, dict) and "error" in similar:
+        raise HTTPException(status_code=500, detail=similar["error"])
+
+    return {"product_id": product_id, "similar": similar}
+
 # Global VR model cache
 _vr_pipe = None
 _vr_pose_model = None
+_vr_load_lock = threading.Lock()
+
+def _load_vr_models():
+    # Shared by the synchronous endpoint and the job workers; loads once
+    global _vr_pipe, _vr_pose_model
+    with _vr_load_lock:
+        if _vr_pipe is None:
+            print("Loading VR models...")
+            _vr_pipe, _vr_pose_model = _vr.get_clothing_generator()
+    return _vr_pipe, _vr_pose_model
+
+# Generated images are content-addressed: a repeat of the same photo,
+# description and generation settings is served from disk
+# (TRYON_CACHE_MAX_MB caps the store, least recently used evicted first;
+# results handed out within TRYON_RESULT_PIN_SECONDS are never evicted)
+_tryon_cache = TryOnResultCache(
+    "generated_images",
+    max_bytes=float(os.getenv("TRYON_CACHE_MAX_MB", "500")) * 1024 * 1024,
+    pin_seconds=float(os.getenv("TRYON_RESULT_PIN_SECONDS", "3600"))
+)
+
+def _generate_try_on(input_path, description, progress=None):
+    """
+    Image URL for the try-on of input_path, generating it on a cache miss.
+
+    Returns:
+        tuple: (image_url, cached)
+    """
+    with open(input_path, "rb") as f:
+        key = result_key(f.read(), description, _vr.GENERATION_PARAMS)
+    filename = _tryon_cache.get(key)
+    if filename is not None:
+        return f"/static/{filename}", True
+
+    output_path = _tryon_cache.temp_path()
+    try:
+        if DEMO_MODE:
+            print(f"DEMO_MODE: Mocking generation for {description}")
+            shutil.copyfile(input_path, output_path)
+            if progress is not None:
+                progress(1, 1)
+        else:
+            pipe, pose_model = _load_vr_models()
+            _vr.generate_outfit(
+                pipe,
+                pose_model,
+                input_path,
+                description,
+                output_path,
+                progress_callback=progress
+            )
+        filename = _tryon_cache.put(key, output_path)
+    finally:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    return f"/static/{filename}", False
+
+def _run_tryon_job(job, progress):
+    # Through the try-on pool, so queued jobs and synchronous requests share its workers
+    image_url, _ = _executors["tryon"].run_blocking(
+        _generate_try_on, job["input_path"], job["description"], progress
+    )
+    return image_url
+
+# Queued try-on jobs survive restarts (TRYON_JOB_DIR); TRYON_JOB_WORKERS caps
+# how many generations run at once. Finished jobs are deleted after
+# TRYON_JOB_RETENTION_HOURS
+_tryon_jobs = TryOnJobQueue(
+    os.getenv("TRYON_JOB_DIR", "tryon_jobs"),
+    _run_tryon_job,
+    workers=int(os.getenv("TRYON_JOB_WORKERS", "1")),
+    retention_seconds=float(os.getenv("TRYON_JOB_RETENTION_HOURS", "24")) * 3600
+)
+
+def _warm_face():
+    stages = {}
+    start = time.perf_counter()
+    analyzer = _face.get_analyzer()
+    stages["load"] = round((time.perf_counter() - start) * 1000, 3)
+    start = time.perf_counter()
+    analyzer.analyze_image(np.full((480, 640, 3), 128, dtype=np.uint8))
+    stages["inference"] = round((time.perf_counter() - start) * 1000, 3)
+    return stages
+
+def _warm_tryon():
+    if DEMO_MODE:
+        return None
+    stages = {}
+    start = time.perf_counter()
+    pipe, pose_model = _load_vr_models()
+    stages["load"] = round((time.perf_counter() - start) * 1000, 3)
+    start = time.perf_counter()
+    _vr.warm_up_generator(pipe, pose_model)
+    stages["inference"] = round((time.perf_counter() - start) * 1000, 3)
+    return stages
+
+# Warm-up goes through the component pools, so with EXECUTOR_FACE_KIND=process
+# it is the worker process that loads the models
+_warmup = ComponentWarmup(retries=WARMUP_RETRIES, backoff=WARMUP_RETRY_BACKOFF)
+def _warm_recommender():
+    return _recommender.warm_up()
+
+# Each warm-up starts with the component's deferred import
+_warmup.register(
+    "face", _warm_face, run=_executors["face"].run,
+    available=_face.available, enabled="face" in WARMUP_COMPONENTS
+)
+_warmup.register(
+    "recommend", _warm_recommender, run=_executors["recommend"].run,
+    available=_recommender.available, enabled="recommend" in WARMUP_COMPONENTS
+)
+_warmup.register(
+    "tryon", _warm_tryon, run=_executors["tryon"].run,
+    available=_vr.available, enabled="tryon" in WARMUP_COMPONENTS
+)
+
+TRYON_EVENTS_INTERVAL = float(os.getenv("TRYON_EVENTS_INTERVAL", "0.5"))
+TRYON_EVENTS_KEEPALIVE = float(os.getenv("TRYON_EVENTS_KEEPALIVE", "15"))
 
 @app.post("/generate-try-on")
 async def generate_try_on(
     file: UploadFile = File(...),
     description: str = Form(...)
 ):
-    if not VR_AVAILABLE:
-        raise HTTPException(status_code=503, detail="VR service unavailable")
+    await _require(_vr, "VR service unavailable")
         
-    global _vr_pipe, _vr_pose_model
-    
     try:
-        # Save uploaded file
-        file_id = str(uuid4())
-        
-        # In DEMO_MODE, we just copy input to output to "mock" the generation
-        input_filename = f"input_{file_id}.jpg"
-        output_filename = f"output_{file_id}.png"
-        
-        # Use simple filenames for demo to avoid clutter/complexity
-        # For simplicity, we save the input as the 'output' just with different extension
-        # or just copy it.
-        
-        output_path = f"generated_images/{output_filename}"
-        
-        # Read file content
-        content = await file.read()
-        
-        # Write content to output path directly (mocking generation)
-        # Note: If input is JPG and we name it PNG, modern browsers/OS handle it, 
-        # but to be correct we should use CV2 or PIL to save if we want format conversion.
-        # Here we just write bytes.
-        
-        if DEMO_MODE:
-            print(f"DEMO_MODE: Mocking generation for {description}")
-            with open(output_path, "wb") as f:
-                f.write(content)
-        else:
-            # REAL MODE
-            # Load models if not loaded
-            if _vr_pipe is None:
-                print("Loading VR models...")
-                _vr_pipe, _vr_pose_model = get_clothing_generator()
-                
-            temp_input_path = f"generated_images/{input_filename}"
-            with open(temp_input_path, "wb") as buffer:
-                buffer.write(content)
-                
-            generate_outfit(
-                _vr_pipe, 
-                _vr_pose_model, 
-                temp_input_path, 
-                description, 
-                output_path
-            )
+        # Upright, generator-sized JPEG saved outside the static directory; removed once done
+        content = await read_upload(file, UPLOAD_MAX_BYTES)
+        content = await asyncio.to_thread(normalise_image, content, TRYON_DECODE_MAX_SIDE)
+        with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as buffer:
+            buffer.write(content)
+            input_path = buffer.name
+
+        try:
+            image_url, cached = await _executors["tryon"].run(_generate_try_on, input_path, description)
+        finally:
+            os.remove(input_path)
         
         return {
             "status": "success",
-            "image_url": f"/static/{output_filename}",
-            "is_demo": DEMO_MODE
+            "image_url": image_url,
+            "is_demo": DEMO_MODE,
+            "cached": cached
         }
         
+    except (HTTPException, ExecutorSaturated, InvalidImage):
+        raise
     except Exception as e:
         print(f"Error in generate_try_on: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/try-on/jobs", status_code=202)
+async def submit_try_on_job(
+    file: UploadFile = File(...),
+    description: str = Form(...)
+):
+    """Queue a try-on generation; follow it via the status or events URL"""
+    await _require(_vr, "VR service unavailable")
+
+    content = await read_upload(file, UPLOAD_MAX_BYTES)
+    content = await asyncio.to_thread(normalise_image, content, TRYON_DECODE_MAX_SIDE)
+    job = await asyncio.to_thread(_tryon_jobs.submit, content, description)
+    return dict(
+        job,
+        status_url=f"/try-on/jobs/{job['job_id']}",
+        events_url=f"/try-on/jobs/{job['job_id']}/events"
+    )
+
+@app.get("/try-on/jobs/{job_id}")
+async def get_try_on_job(job_id: str):
+    job = await asyncio.to_thread(_tryon_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+@app.delete("/try-on/jobs/{job_id}")
+async def cancel_try_on_job(job_id: str):
+    job = await asyncio.to_thread(_tryon_jobs.cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+@app.get("/try-on/jobs/{job_id}/events")
+async def try_on_job_events(job_id: str):
+    """Server-sent events: one event per state/progress change, ending with the terminal state"""
+    job = await asyncio.to_thread(_tryon_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+
+    async def stream(job):
+        last, last_sent = None, time.monotonic()
+        while job is not None:
+            if job != last:
+                yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
+                last, last_sent = job, time.monotonic()
+            elif time.monotonic() - last_sent >= TRYON_EVENTS_KEEPALIVE:
+                # Comment line keeps idle proxies from closing the stream
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            if job["status"] in TERMINAL_STATES:
+                return
+            await asyncio.sleep(TRYON_EVENTS_INTERVAL)
+            job = await asyncio.to_thread(_tryon_jobs.get, job_id)
+
+    return StreamingResponse(
+        stream(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+_app_import_ms = round((time.perf_counter() - _import_started) * 1000, 3)
+
 if __name__ == "__main__":
     uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
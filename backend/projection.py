@@ -0,0 +1,65 @@
+"""
+Field projection and compact shaping of recommendation responses.
+
+Each recommendation carries the full catalog metadata (including the long
+semantic_text used for embedding) plus the query's extracted_attributes,
+which are identical in every item. Clients can ask for just the fields
+they render (fields=product_id,name,price), and/or a compact shape in
+which shared data appears once at the top level and semantic_text is
+dropped unless requested. Without either option the legacy shape is
+returned unchanged.
+"""
+
+# Identical across all items of one query; hoisted to the top level when compact
+SHARED_FIELDS = ("extracted_attributes",)
+# Left out of compact items unless explicitly requested
+COMPACT_EXCLUDED = ("semantic_text",)
+
+
+def parse_fields(fields):
+    """
+    Normalise a fields parameter ("a,b" or a list) into a tuple, or None for all fields.
+    """
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    parsed = tuple(dict.fromkeys(f.strip() for f in fields if f and f.strip()))
+    return parsed or None
+
+
+def shape_recommendations(recommendations, fields=None, compact=False):
+    """
+    Build the response body for one list of recommendations.
+
+    Items are copied, never mutated: the list may be shared with the response cache.
+
+    Args:
+        recommendations (list): Items from get_outfit_recommendations()
+        fields (tuple): Item keys to keep (see parse_fields), None for all
+        compact (bool): Hoist shared fields to the top level and drop COMPACT_EXCLUDED
+
+    Returns:
+        dict: {"recommendations": [...]}, plus the shared fields when compact
+    """
+    if fields is None and not compact:
+        return {"recommendations": recommendations}
+
+    body = {}
+    if compact:
+        first = recommendations[0] if recommendations else {}
+        for name in SHARED_FIELDS:
+            body[name] = first.get(name)
+        dropped = set(SHARED_FIELDS)
+        if fields is None:
+            dropped.update(COMPACT_EXCLUDED)
+    else:
+        dropped = set()
+
+    if fields is not None:
+        keep = [name for name in fields if name not in dropped]
+        items = [{name: item[name] for name in keep if name in item} for item in recommendations]
+    else:
+        items = [{name: value for name, value in item.items() if name not in dropped} for item in recommendations]
+    body["recommendations"] = items
+    return body
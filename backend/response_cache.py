@@ -0,0 +1,148 @@
+"""
+Response-level cache for recommendation endpoints.
+
+Entries are keyed on a canonicalised request, tagged with the catalog
+version they were computed against, and expire after a TTL. Concurrent
+identical requests are coalesced: the first one computes, the others await
+the same future. If that first request is cancelled (its client went
+away), one of the waiters takes over instead of all of them failing.
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+
+# Result handed to coalesced waiters when the computing request was cancelled
+_LEADER_CANCELLED = object()
+
+
+def canonical_recommendation_key(description, gender_filter=None, top_n=10, filters=None):
+    """Canonical cache key for a /recommend-outfits request"""
+    # Extraction, MiniLM (uncased) and BM25 are all case- and whitespace-insensitive
+    normalised = " ".join(str(description).split()).lower()
+    return (
+        normalised,
+        # Same spelling as fashion_recommender.normalise_gender, which the search uses
+        (gender_filter or "").strip().title(),
+        int(top_n),
+        json.dumps(filters, sort_keys=True) if filters else "",
+    )
+
+
+class ResponseCache:
+    """
+    Bounded LRU + TTL cache with catalog-version invalidation and request coalescing.
+
+    Meant to be used from the event loop: bookkeeping is single-threaded and
+    the actual computation runs in the thread pool.
+    """
+
+    def __init__(self, maxsize=1024, ttl_seconds=300.0, clock=time.monotonic):
+        self.maxsize = max(0, int(maxsize))
+        self.ttl_seconds = float(ttl_seconds)
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (version, expires_at, value)
+        self._in_flight = {}
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key, version):
+        self._check_version(version)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry_version, expires_at, value = entry
+        if entry_version != version or expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, version, value):
+        if self.maxsize == 0:
+            return
+        self._check_version(version)
+        self._entries[key] = (version, self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_compute(self, key, get_version, compute, should_cache=None, run=None):
+        """
+        Return the cached value for key or compute it once.
+
+        Args:
+            key: Canonical request key
+            get_version (callable): Returns the current catalog version
+            compute (callable): Blocking function producing the value; runs in the thread pool
+            should_cache (callable): Optional predicate; values it rejects (e.g. errors) are not stored
+            run (callable): Awaitable runner for compute; defaults to the Starlette thread pool
+        """
+        while True:
+            value = self.get(key, get_version())
+            if value is not None:
+                self.hits += 1
+                return value
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            self.coalesced += 1
+            value = await asyncio.shield(in_flight)
+            if value is not _LEADER_CANCELLED:
+                return value
+            # The computing request was cancelled: look again, the first waiter computes
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await (run or run_in_threadpool)(compute)
+        except asyncio.CancelledError:
+            # Only this request went away; the waiters retry rather than fail with it
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an un-awaited future does not log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # Tag with the version after computing: the first request may build the index
+            if should_cache is None or should_cache(value):
+                self.put(key, get_version(), value)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "catalog_version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "in_flight": len(self._in_flight),
+        }
@@ -0,0 +1,70 @@
+"""
+Bounded executors: admission limit, and 503 + Retry-After once the queue is full.
+"""
+import os
+import sys
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.executors import BoundedExecutor, ExecutorSaturated
+from backend.main import executor_saturated_handler
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.01)
+
+
+def test_full_pool_answers_503_with_retry_after():
+    executor = BoundedExecutor("demo", workers=1, queue_size=1)
+    release = threading.Event()
+    app = FastAPI()
+    app.add_exception_handler(ExecutorSaturated, executor_saturated_handler)
+
+    @app.get("/work")
+    async def work():
+        return {"done": await executor.run(release.wait, 5)}
+
+    with TestClient(app) as client:
+        # One call running, one queued: the pool is at workers + queue_size
+        busy = [threading.Thread(target=client.get, args=("/work",)) for _ in range(executor.capacity)]
+        for thread in busy:
+            thread.start()
+        _wait_until(lambda: executor.stats()["in_flight"] == executor.capacity)
+
+        response = client.get("/work")
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        assert "demo" in response.json()["detail"]
+
+        release.set()
+        for thread in busy:
+            thread.join()
+        assert client.get("/work").status_code == 200
+
+    stats = executor.stats()
+    assert stats["rejected"] == 1 and stats["completed"] == 3 and stats["in_flight"] == 0
+    executor.shutdown()
+
+
+def test_blocking_submissions_wait_instead_of_being_rejected():
+    executor = BoundedExecutor("demo", workers=1, queue_size=0)
+    results = []
+    threads = [
+        threading.Thread(target=lambda i=i: results.append(executor.run_blocking(time.sleep, 0.02) or i))
+        for i in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [0, 1, 2]
+    assert executor.stats()["rejected"] == 0 and executor.stats()["completed"] == 3
+    executor.shutdown()
@@ -0,0 +1,46 @@
+"""
+Field projection and compact shaping of recommendation responses.
+"""
+import copy
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.projection import parse_fields, shape_recommendations
+
+ATTRS = {"colors": ["red"], "occasions": ["wedding"]}
+ITEMS = [
+    {"product_id": "P1", "name": "Silk Saree", "price": 2999.0, "semantic_text": "long text",
+     "matching_percentage": 91.2, "extracted_attributes": ATTRS},
+    {"product_id": "P2", "name": "Cotton Kurta", "price": 1499.0, "semantic_text": "long text",
+     "matching_percentage": 88.0, "extracted_attributes": ATTRS},
+]
+
+
+def test_default_shape_is_unchanged():
+    assert shape_recommendations(ITEMS)["recommendations"] is ITEMS
+
+
+def test_fields_projection():
+    body = shape_recommendations(ITEMS, parse_fields(" product_id, price,unknown,price"))
+    assert parse_fields("a,,b") == ("a", "b") and parse_fields("") is None
+    assert body == {"recommendations": [
+        {"product_id": "P1", "price": 2999.0},
+        {"product_id": "P2", "price": 1499.0},
+    ]}
+
+
+def test_compact_hoists_shared_fields_without_mutating_items():
+    original = copy.deepcopy(ITEMS)
+    body = shape_recommendations(ITEMS, compact=True)
+
+    assert body["extracted_attributes"] == ATTRS
+    assert body["recommendations"][0] == {
+        "product_id": "P1", "name": "Silk Saree", "price": 2999.0, "matching_percentage": 91.2
+    }
+    assert ITEMS == original
+
+    # Explicitly requested fields win over the compact defaults
+    body = shape_recommendations(ITEMS, parse_fields("name,semantic_text,extracted_attributes"), compact=True)
+    assert body["recommendations"][1] == {"name": "Cotton Kurta", "semantic_text": "long text"}
+    assert shape_recommendations([], compact=True) == {"extracted_attributes": None, "recommendations": []}
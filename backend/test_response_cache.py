@@ -0,0 +1,127 @@
+"""
+Recommendation response cache: coalescing, TTL expiry, catalog-version invalidation.
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.response_cache import ResponseCache, canonical_recommendation_key
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Compute:
+    """Counts calls; run() lets the test decide when a computation finishes"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = None
+
+    def __call__(self):
+        self.calls += 1
+        return [f"result {self.calls}"]
+
+    async def run(self, compute):
+        if self.release is not None:
+            await self.release.wait()
+        else:
+            await asyncio.sleep(0.01)
+        return compute()
+
+
+def test_key_is_case_and_whitespace_insensitive():
+    key = canonical_recommendation_key("Red  Saree ", " female", 10, {"colors": ["red"]})
+    assert key == canonical_recommendation_key("red saree", "Female", 10, {"colors": ["red"]})
+    assert key != canonical_recommendation_key("red saree", "Male", 10, {"colors": ["red"]})
+    assert key != canonical_recommendation_key("red saree", "Female", 5, {"colors": ["red"]})
+
+
+def test_concurrent_identical_requests_compute_once():
+    cache, compute = ResponseCache(), _Compute()
+
+    async def main():
+        return await asyncio.gather(*(
+            cache.get_or_compute("key", lambda: "v1", compute, run=compute.run) for _ in range(50)
+        ))
+
+    results = asyncio.run(main())
+    assert compute.calls == 1
+    assert all(result == ["result 1"] for result in results)
+    assert cache.stats()["misses"] == 1 and cache.stats()["coalesced"] == 49
+
+
+def test_entries_expire_after_the_ttl():
+    clock, compute = _Clock(), _Compute()
+    cache = ResponseCache(ttl_seconds=60, clock=clock)
+
+    async def request():
+        return await cache.get_or_compute("key", lambda: "v1", compute, run=compute.run)
+
+    assert asyncio.run(request()) == ["result 1"]
+    clock.now = 59
+    assert asyncio.run(request()) == ["result 1"]
+    clock.now = 61
+    assert asyncio.run(request()) == ["result 2"]
+    assert compute.calls == 2
+
+
+def test_catalog_version_bump_invalidates():
+    cache, compute = ResponseCache(), _Compute()
+    version = {"current": "v1"}
+
+    async def request():
+        return await cache.get_or_compute("key", lambda: version["current"], compute, run=compute.run)
+
+    assert asyncio.run(request()) == ["result 1"]
+    assert asyncio.run(request()) == ["result 1"]
+    version["current"] = "v2"
+    assert asyncio.run(request()) == ["result 2"]
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_cancelled_leader_hands_over_to_a_waiter():
+    cache, compute = ResponseCache(), _Compute()
+
+    async def main():
+        compute.release = asyncio.Event()
+        leader = asyncio.create_task(cache.get_or_compute("key", lambda: "v1", compute, run=compute.run))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(cache.get_or_compute("key", lambda: "v1", compute, run=compute.run))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        # The leader's client disconnects mid-computation
+        leader.cancel()
+        await asyncio.sleep(0)
+        compute.release.set()
+        return leader, await asyncio.gather(*waiters)
+
+    leader, results = asyncio.run(main())
+    assert leader.cancelled()
+    assert results == [["result 1"]] * 3
+    assert compute.calls == 1
+
+
+def test_computation_errors_are_shared():
+    cache = ResponseCache()
+
+    def failing():
+        raise RuntimeError("index unavailable")
+
+    async def main():
+        return await asyncio.gather(
+            *(cache.get_or_compute("key", lambda: "v1", failing, run=_Compute().run) for _ in range(3)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert [type(result) for result in results] == [RuntimeError] * 3
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,86 @@
+"""
+Try-on result cache: content keys, LRU eviction under the byte budget, pinning, restarts.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.tryon_cache import TryOnResultCache, result_key
+
+PARAMS = {"num_inference_steps": 10, "seed": 42}
+
+
+def _store(cache, key, size):
+    path = cache.temp_path()
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return cache.put(key, path)
+
+
+def test_key_ignores_case_and_whitespace_but_not_content_or_params():
+    key = result_key(b"photo", "Blue  shirt ", PARAMS)
+    assert key == result_key(b"photo", "blue shirt", PARAMS)
+    assert key != result_key(b"other photo", "blue shirt", PARAMS)
+    assert key != result_key(b"photo", "red shirt", PARAMS)
+    assert key != result_key(b"photo", "blue shirt", dict(PARAMS, seed=7))
+
+
+def test_repeat_request_is_a_hit():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TryOnResultCache(directory, max_bytes=1000)
+        assert cache.get("a") is None
+        filename = _store(cache, "a", 10)
+
+        assert cache.get("a") == filename
+        assert os.path.exists(os.path.join(directory, filename))
+        assert [name for name in os.listdir(directory) if name.startswith(".tmp_")] == []
+        assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_results_are_evicted_over_budget():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TryOnResultCache(directory, max_bytes=250, pin_seconds=0)
+        _store(cache, "a", 100)
+        _store(cache, "b", 100)
+        cache.get("a")
+        _store(cache, "c", 100)
+
+        assert cache.get("b") is None
+        assert cache.get("a") and cache.get("c")
+        assert cache.total_bytes == 200
+        assert sorted(os.listdir(directory)) == ["tryon_a.png", "tryon_c.png"]
+
+
+def test_recently_served_results_are_pinned_over_budget():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TryOnResultCache(directory, max_bytes=250, pin_seconds=30)
+        _store(cache, "a", 100)
+        _store(cache, "b", 100)
+        _store(cache, "c", 100)
+
+        # Every result was just handed out: none is evicted, the budget is exceeded
+        assert cache.total_bytes == 300 and cache.stats()["evictions"] == 0
+
+        past = time.time() - 60
+        cache._used_at["a"] = past
+        _store(cache, "d", 100)
+        assert cache.get("a") is None
+        assert sorted(os.listdir(directory)) == ["tryon_b.png", "tryon_c.png", "tryon_d.png"]
+
+
+def test_restart_keeps_recency_and_removes_temporary_files():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TryOnResultCache(directory, max_bytes=250)
+        _store(cache, "a", 100)
+        _store(cache, "b", 100)
+        past = time.time() - 60
+        os.utime(os.path.join(directory, "tryon_b.png"), (past, past))
+        open(os.path.join(directory, ".tmp_interrupted.png"), "wb").close()
+
+        restarted = TryOnResultCache(directory, max_bytes=250, pin_seconds=30)
+        assert restarted.total_bytes == 200
+        _store(restarted, "c", 100)
+        # b was least recently used according to its mtime
+        assert sorted(os.listdir(directory)) == ["tryon_a.png", "tryon_c.png"]
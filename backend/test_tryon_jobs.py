@@ -0,0 +1,151 @@
+"""
+Try-on job queue: ordering, progress, cancellation and restart recovery.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.tryon_jobs import TryOnJobQueue, CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED
+
+
+class _Generator:
+    """Fake run_job: a few progress steps, optionally held at a gate"""
+
+    def __init__(self, steps=3, gate=None):
+        self.steps = steps
+        self.gate = gate
+        self.started = threading.Event()
+        self.seen = []
+
+    def __call__(self, job, progress):
+        self.seen.append(job["description"])
+        self.started.set()
+        for step in range(1, self.steps + 1):
+            if self.gate is not None:
+                self.gate.wait(5)
+            progress(step, self.steps)
+        if job["description"] == "broken":
+            raise RuntimeError("CUDA out of memory")
+        return f"/static/output_{job['id']}.png"
+
+
+def _wait_for(queue, job_id, statuses, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {queue.get(job_id)['status']}")
+
+
+def test_jobs_run_in_order_and_report_the_image():
+    with tempfile.TemporaryDirectory() as data_dir:
+        generator = _Generator()
+        queue = TryOnJobQueue(data_dir, generator, poll_interval=0.05)
+        first = queue.submit(b"photo", "blue shirt")
+        second = queue.submit(b"photo", "red saree")
+        assert first["status"] == QUEUED and second["queue_position"] == 2
+
+        queue.start()
+        try:
+            done = _wait_for(queue, second["job_id"], (SUCCEEDED,))
+        finally:
+            queue.stop(timeout=5)
+
+        assert generator.seen == ["blue shirt", "red saree"]
+        assert done["image_url"] == f"/static/output_{second['job_id']}.png"
+        assert done["progress"] == {"step": 3, "total_steps": 3}
+        # Uploaded inputs are removed once a job finishes
+        assert os.listdir(os.path.join(data_dir, "inputs")) == []
+
+
+def test_failed_job_records_the_error():
+    with tempfile.TemporaryDirectory() as data_dir:
+        queue = TryOnJobQueue(data_dir, _Generator(), poll_interval=0.05).start()
+        try:
+            job = queue.submit(b"photo", "broken")
+            job = _wait_for(queue, job["job_id"], (FAILED,))
+        finally:
+            queue.stop(timeout=5)
+        assert job["error"] == "CUDA out of memory"
+
+
+def test_cancel_queued_and_running_jobs():
+    with tempfile.TemporaryDirectory() as data_dir:
+        gate = threading.Event()
+        generator = _Generator(gate=gate)
+        queue = TryOnJobQueue(data_dir, generator, workers=1, poll_interval=0.05).start()
+        try:
+            running = queue.submit(b"photo", "blue shirt")
+            waiting = queue.submit(b"photo", "red saree")
+            assert generator.started.wait(5)
+
+            assert queue.cancel(waiting["job_id"])["status"] == CANCELLED
+            assert queue.cancel(running["job_id"])["status"] == RUNNING
+            gate.set()
+            job = _wait_for(queue, running["job_id"], (CANCELLED, SUCCEEDED))
+        finally:
+            queue.stop(timeout=5)
+
+        # Stopped at the first step after the request, and the waiting job never ran
+        assert job["status"] == CANCELLED
+        assert job["progress"]["step"] == 1
+        assert generator.seen == ["blue shirt"]
+        assert queue.cancel("no-such-job") is None
+
+
+def test_queue_survives_restart():
+    with tempfile.TemporaryDirectory() as data_dir:
+        gate = threading.Event()
+        interrupted = _Generator(gate=gate)
+        queue = TryOnJobQueue(data_dir, interrupted, poll_interval=0.05).start()
+        running = queue.submit(b"photo", "blue shirt")
+        waiting = queue.submit(b"photo", "red saree")
+        assert interrupted.started.wait(5)
+        # Shut down mid-generation: the running job goes back to the queue
+        stopper = threading.Thread(target=queue.stop, kwargs={"timeout": 5})
+        stopper.start()
+        gate.set()
+        stopper.join()
+        assert queue.get(running["job_id"])["status"] == QUEUED
+
+        generator = _Generator()
+        restarted = TryOnJobQueue(data_dir, generator, poll_interval=0.05).start()
+        try:
+            _wait_for(restarted, waiting["job_id"], (SUCCEEDED,))
+        finally:
+            restarted.stop(timeout=5)
+        assert generator.seen == ["blue shirt", "red saree"]
+
+
+def test_finished_jobs_are_deleted_after_the_retention_window():
+    with tempfile.TemporaryDirectory() as data_dir:
+        queue = TryOnJobQueue(data_dir, _Generator(), poll_interval=0.05, retention_seconds=3600).start()
+        try:
+            old = _wait_for(queue, queue.submit(b"photo", "blue shirt")["job_id"], (SUCCEEDED,))
+            recent = _wait_for(queue, queue.submit(b"photo", "broken")["job_id"], (FAILED,))
+        finally:
+            queue.stop(timeout=5)
+        waiting = queue.submit(b"photo", "red saree")
+        # Inside the window nothing goes
+        assert queue.prune(now=old["finished_at"] + 3599) == 0
+
+        # A job that finished two hours ago goes at the next start-up
+        with sqlite3.connect(os.path.join(data_dir, "jobs.sqlite3")) as db:
+            db.execute("UPDATE jobs SET finished_at = ? WHERE id = ?", (time.time() - 7200, old["job_id"]))
+        gate = threading.Event()
+        restarted = TryOnJobQueue(data_dir, _Generator(gate=gate), poll_interval=0.05, retention_seconds=3600).start()
+        try:
+            assert restarted.get(old["job_id"]) is None
+            assert restarted.get(recent["job_id"])["status"] == FAILED
+            # Queued and running work is never pruned
+            assert restarted.prune(now=time.time() + 10 * 3600) == 1
+            assert restarted.get(waiting["job_id"])["status"] in (QUEUED, RUNNING)
+        finally:
+            gate.set()
+            restarted.stop(timeout=5)
@@ -0,0 +1,101 @@
+"""
+Upload ingestion: byte limit, reduced decoding and EXIF orientation.
+"""
+import asyncio
+import io
+import os
+import sys
+
+import numpy as np
+from fastapi import HTTPException
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.uploads import (
+    InvalidImage, _decode_with_cv2, _header_size, decode_image, decode_scale, normalise_image, read_upload
+)
+
+
+def _jpeg(width, height, orientation=None):
+    # Left half red, right half blue, so rotations are visible
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    pixels[:, : width // 2] = (255, 0, 0)
+    pixels[:, width // 2:] = (0, 0, 255)
+    image = Image.fromarray(pixels)
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90, exif=exif)
+    return buffer.getvalue()
+
+
+def test_read_upload_enforces_the_byte_limit():
+    data = b"x" * 3000
+
+    assert asyncio.run(read_upload(UploadFile(io.BytesIO(data)), max_bytes=3000)) == data
+    try:
+        asyncio.run(read_upload(UploadFile(io.BytesIO(data)), max_bytes=2999))
+    except HTTPException as e:
+        assert e.status_code == 413
+    else:
+        raise AssertionError("oversized upload accepted")
+
+
+def test_decode_reduces_to_the_requested_side():
+    image = decode_image(_jpeg(4000, 3000), max_side=1024)
+
+    assert image.shape == (768, 1024, 3)
+    # BGR: the left half is red
+    assert image[384, 100, 2] > 200 and image[384, 100, 0] < 50
+    assert decode_image(_jpeg(640, 480), max_side=1024).shape == (480, 640, 3)
+
+
+def test_exif_orientation_is_applied():
+    # Orientation 6: stored landscape, displayed rotated 90 degrees clockwise
+    image = decode_image(_jpeg(800, 600, orientation=6), max_side=1024)
+
+    assert image.shape == (800, 600, 3)
+    # The red (left) half is now on top
+    assert image[100, 300, 2] > 200 and image[700, 300, 0] > 200
+
+
+def test_decode_scale_maps_back_to_the_upload():
+    data = _jpeg(4000, 3000, orientation=6)
+    image = decode_image(data, max_side=1000)
+    assert image.shape[:2] == (1000, 750)
+    assert decode_scale(data, image) == 4.0
+    assert decode_scale(_jpeg(800, 600), decode_image(_jpeg(800, 600), max_side=1024)) == 1.0
+
+
+def test_opencv_fallback_reduces_too():
+    image = _decode_with_cv2(_jpeg(4000, 3000), max_side=1024, max_pixels=50_000_000)
+    assert image.shape == (768, 1024, 3)
+
+
+def test_opencv_fallback_checks_the_pixel_budget_from_the_header():
+    for fmt in ("JPEG", "PNG", "WEBP", "BMP", "GIF"):
+        buffer = io.BytesIO()
+        Image.new("RGB", (321, 123)).save(buffer, fmt)
+        assert tuple(_header_size(buffer.getvalue())) == (321, 123), fmt
+
+    try:
+        _decode_with_cv2(_jpeg(4000, 3000), max_side=1024, max_pixels=4000 * 3000 - 1)
+    except InvalidImage as e:
+        assert "4000x3000" in str(e)
+    else:
+        raise AssertionError("oversized image decoded")
+
+
+def test_invalid_and_normalised_images():
+    for decode in (decode_image, lambda data, max_side: _decode_with_cv2(data, max_side, 50_000_000)):
+        try:
+            decode(b"not an image", max_side=512)
+        except InvalidImage:
+            pass
+        else:
+            raise AssertionError("invalid image accepted")
+
+    normalised = normalise_image(_jpeg(2000, 1500, orientation=6), max_side=768)
+    assert Image.open(io.BytesIO(normalised)).size == (576, 768)
@@ -0,0 +1,166 @@
+"""
+Content-addressed store for generated try-on images.
+
+Generation is deterministic (fixed seed), so the output depends only on the
+input photo, the description and the generation settings. Results are
+stored as tryon_<sha256>.png in the static directory, and a repeat request
+is answered from disk without running the model. The store is LRU under a
+byte budget. File mtimes record recency, so the order survives restarts.
+
+Results stored or served within the last pin_seconds are never evicted:
+a client that was just handed a URL (a job result it polls for, or a
+repeat request) must be able to fetch it. The budget is therefore soft
+while many results are that recent.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+PREFIX = "tryon_"
+SUFFIX = ".png"
+
+
+def normalise_description(description):
+    """Case- and whitespace-insensitive form of a try-on description (CLIP's tokenizer is uncased)"""
+    return " ".join(str(description).split()).lower()
+
+
+def result_key(content, description, params):
+    """
+    Cache key of a generation.
+
+    Args:
+        content (bytes): Uploaded reference photo
+        description (str): Outfit description
+        params (dict): Everything else that changes the output (model, steps, seed, prompt)
+    """
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha256(content).digest())
+    digest.update(normalise_description(description).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TryOnResultCache:
+    """Size-capped LRU of generated images, keyed by result_key()"""
+
+    def __init__(self, directory, max_bytes, pin_seconds=3600):
+        """
+        Args:
+            directory (str): Static directory the images are served from
+            max_bytes (int): Disk budget for stored results; least recently used go first
+            pin_seconds (float): Results stored or served this recently are kept
+                even over budget
+        """
+        self.directory = directory
+        self.max_bytes = max(0, int(max_bytes))
+        self.pin_seconds = max(0.0, float(pin_seconds))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes
+        self._used_at = {}  # key -> wall time last stored or served
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load()
+
+    def _load(self):
+        stored = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(PREFIX) and name.endswith(SUFFIX):
+                stat = os.stat(path)
+                stored.append((stat.st_mtime, name[len(PREFIX):-len(SUFFIX)], stat.st_size))
+            elif name.startswith((".tmp_", "input_")):
+                # Temporary files left behind by an interrupted request
+                os.remove(path)
+        for mtime, key, size in sorted(stored):
+            self._entries[key] = size
+            self._used_at[key] = mtime
+            self.total_bytes += size
+        with self._lock:
+            self._evict()
+
+    def filename(self, key):
+        return f"{PREFIX}{key}{SUFFIX}"
+
+    def temp_path(self, suffix=SUFFIX):
+        """Scratch path in the store directory, for writing a result before put()"""
+        return os.path.join(self.directory, f".tmp_{uuid4().hex}{suffix}")
+
+    def get(self, key):
+        """
+        Returns:
+            str: Filename of the stored result (bumped to most recent), or None
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = os.path.join(self.directory, self.filename(key))
+            try:
+                os.utime(path)
+            except OSError:
+                # Deleted behind our back
+                self.total_bytes -= self._entries.pop(key)
+                self._used_at.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._used_at[key] = time.time()
+            self.hits += 1
+            return self.filename(key)
+
+    def put(self, key, temp_path):
+        """
+        Move a finished result into the store.
+
+        Args:
+            key (str): result_key() of the generation
+            temp_path (str): Result written by the generator, e.g. from temp_path()
+
+        Returns:
+            str: Filename the result is served under
+        """
+        path = os.path.join(self.directory, self.filename(key))
+        # Atomic, so the static route never serves a half-written image
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self.total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._used_at[key] = time.time()
+            self._evict(keep=key)
+        return self.filename(key)
+
+    def _evict(self, keep=None):
+        pinned_since = time.time() - self.pin_seconds
+        while self.total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            # Oldest first: once this one is pinned, so is everything after it
+            if key == keep or self._used_at.get(key, 0.0) > pinned_since:
+                break
+            self.total_bytes -= self._entries.pop(key)
+            self._used_at.pop(key, None)
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, self.filename(key)))
+            except OSError:
+                pass
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "pin_seconds": self.pin_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
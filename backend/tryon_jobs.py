@@ -0,0 +1,282 @@
+"""
+Persistent job queue for virtual try-on generation.
+
+Stable Diffusion takes minutes on CPU, far longer than a proxy will hold an
+HTTP request open. Clients submit a job instead and follow it by polling or
+over server-sent events. Jobs live in a small sqlite database, so queued
+work survives a restart (jobs that were running when the process died go
+back to the queue). A fixed number of worker threads caps how many
+generations run at once. Cancellation takes effect immediately for queued
+jobs and at the next denoising step for running ones. Finished jobs are kept
+for a retention window, so clients can still fetch the result, and are then
+deleted at start-up and as other jobs finish.
+"""
+import os
+import sqlite3
+import threading
+import time
+from uuid import uuid4
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    description TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    image_url TEXT,
+    error TEXT,
+    step INTEGER NOT NULL DEFAULT 0,
+    total_steps INTEGER,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)
+"""
+
+
+class JobCancelled(Exception):
+    """Raised from the progress callback to abort a running job"""
+
+
+class TryOnJobQueue:
+    """sqlite-backed queue of try-on jobs with a local worker pool"""
+
+    def __init__(self, data_dir, run_job, workers=1, poll_interval=1.0, retention_seconds=86400):
+        """
+        Args:
+            data_dir (str): Directory for the job database and uploaded inputs
+            run_job (callable): run_job(job, progress) -> image URL; progress(step, total)
+                raises JobCancelled once the job has been cancelled
+            workers (int): Maximum number of jobs generating at once
+            poll_interval (float): Seconds an idle worker waits before re-checking the queue
+            retention_seconds (float): How long succeeded, failed and cancelled jobs are
+                kept after finishing; None keeps them forever
+        """
+        self.data_dir = data_dir
+        self.input_dir = os.path.join(data_dir, "inputs")
+        os.makedirs(self.input_dir, exist_ok=True)
+        self.run_job = run_job
+        self.workers = max(1, int(workers))
+        self.poll_interval = float(poll_interval)
+        self.retention_seconds = None if retention_seconds is None else float(retention_seconds)
+
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self._db = sqlite3.connect(os.path.join(data_dir, "jobs.sqlite3"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+
+    def _execute(self, sql, params=()):
+        with self._lock, self._db:
+            return self._db.execute(sql, params).rowcount
+
+    def _fetch(self, job_id):
+        with self._lock:
+            return self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def _remove_input(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def submit(self, content, description):
+        """
+        Queue a generation for the uploaded photo.
+
+        Args:
+            content (bytes): Reference photo of the person
+            description (str): Outfit to generate
+
+        Returns:
+            dict: The queued job
+        """
+        job_id = str(uuid4())
+        input_path = os.path.join(self.input_dir, f"input_{job_id}.jpg")
+        with open(input_path, "wb") as f:
+            f.write(content)
+        self._execute(
+            "INSERT INTO jobs (id, status, description, input_path, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, QUEUED, description, input_path, time.time())
+        )
+        with self._work_available:
+            self._work_available.notify()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """
+        Returns:
+            dict: Public job state, or None for an unknown id
+        """
+        row = self._fetch(job_id)
+        if row is None:
+            return None
+        job = {
+            "job_id": row["id"],
+            "status": row["status"],
+            "description": row["description"],
+            "progress": {"step": row["step"], "total_steps": row["total_steps"]},
+            "image_url": row["image_url"],
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+        if row["status"] == QUEUED:
+            with self._lock:
+                ahead = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?",
+                    (QUEUED, row["created_at"])
+                ).fetchone()[0]
+            job["queue_position"] = ahead + 1
+        return job
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. Queued jobs are cancelled at once; running jobs stop at
+        their next progress step. Finished jobs are left unchanged.
+
+        Returns:
+            dict: Job state after the request, or None for an unknown id
+        """
+        row = self._fetch(job_id)
+        if row is None:
+            return None
+        cancelled = self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+            (CANCELLED, time.time(), job_id, QUEUED)
+        )
+        if cancelled:
+            self._remove_input(row["input_path"])
+        else:
+            self._execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                (job_id, RUNNING)
+            )
+        return self.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {"workers": self.workers, "jobs": counts}
+
+    def prune(self, now=None):
+        """
+        Delete finished jobs older than the retention window.
+
+        Returns:
+            int: Number of jobs deleted
+        """
+        if self.retention_seconds is None:
+            return 0
+        cutoff = (time.time() if now is None else now) - self.retention_seconds
+        placeholders = ", ".join("?" * len(TERMINAL_STATES))
+        with self._lock, self._db:
+            expired = self._db.execute(
+                f"SELECT id, input_path FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+                (*TERMINAL_STATES, cutoff)
+            ).fetchall()
+            self._db.executemany("DELETE FROM jobs WHERE id = ?", [(row["id"],) for row in expired])
+        # Normally gone already; left behind if the process died mid-finish
+        for row in expired:
+            self._remove_input(row["input_path"])
+        return len(expired)
+
+    def _claim(self):
+        # Oldest queued job first; the lock makes select + update atomic across workers
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, step = 0 WHERE id = ?",
+                (RUNNING, time.time(), row["id"])
+            )
+            return dict(row)
+
+    def _finish(self, job, status, image_url=None, error=None):
+        self._execute(
+            "UPDATE jobs SET status = ?, image_url = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, image_url, error, time.time(), job["id"])
+        )
+        self._remove_input(job["input_path"])
+        self.prune()
+
+    def _process(self, job):
+        def progress(step, total_steps):
+            self._execute(
+                "UPDATE jobs SET step = ?, total_steps = ? WHERE id = ?",
+                (int(step), int(total_steps), job["id"])
+            )
+            row = self._fetch(job["id"])
+            if row["cancel_requested"] or self._stop.is_set():
+                raise JobCancelled(job["id"])
+
+        try:
+            image_url = self.run_job(job, progress)
+        except JobCancelled:
+            if self._stop.is_set() and not self._fetch(job["id"])["cancel_requested"]:
+                # Interrupted by shutdown rather than the user: run again after restart
+                self._execute("UPDATE jobs SET status = ?, step = 0 WHERE id = ?", (QUEUED, job["id"]))
+                return
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            print(f"Error in try-on job {job['id']}: {e}")
+            self._finish(job, FAILED, error=str(e))
+        else:
+            self._finish(job, SUCCEEDED, image_url=image_url)
+
+    def _worker(self):
+        while not self._stop.is_set():
+            job = self._claim()
+            if job is None:
+                with self._work_available:
+                    self._work_available.wait(self.poll_interval)
+                continue
+            self._process(job)
+
+    def start(self):
+        """Requeue jobs interrupted by the last shutdown and start the workers"""
+        with self._lock:
+            cancelled = self._db.execute(
+                "SELECT id, input_path FROM jobs WHERE status = ? AND cancel_requested = 1", (RUNNING,)
+            ).fetchall()
+        for row in cancelled:
+            self._finish(row, CANCELLED)
+        requeued = self._execute("UPDATE jobs SET status = ?, step = 0 WHERE status = ?", (QUEUED, RUNNING))
+        if requeued:
+            print(f"Requeued {requeued} try-on job(s) interrupted by the last shutdown")
+        pruned = self.prune()
+        if pruned:
+            print(f"Deleted {pruned} finished try-on job(s) past the retention window")
+
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"tryon-job-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the workers; running jobs are interrupted at their next step and requeued"""
+        self._stop.set()
+        with self._work_available:
+            self._work_available.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
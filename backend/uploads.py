@@ -0,0 +1,213 @@
+"""
+Image upload ingestion: size-limited reads and reduced-resolution decoding.
+
+A 20-megapixel phone photo decodes to ~60 MB of pixels, although face
+analysis and try-on only work on a few hundred pixels per side. Uploads are
+read in chunks up to a byte limit (413 beyond it). The image header is
+checked before any pixels are decoded. JPEGs are then decoded straight at a
+reduced scale with Pillow's draft mode (DCT scaling), and EXIF orientation
+is applied once, here, for every consumer. When Pillow is not installed,
+OpenCV's IMREAD_REDUCED_COLOR_* modes provide the reduced decode instead;
+the dimensions are then read from the JPEG/PNG/WebP/BMP/GIF header here,
+since OpenCV has no header-only read.
+"""
+import io
+import struct
+
+import numpy as np
+from fastapi import HTTPException
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class InvalidImage(ValueError):
+    """Raised when upload bytes are not a decodable image (or are too large to decode)"""
+
+
+async def read_upload(file, max_bytes):
+    """
+    Read an UploadFile, refusing anything larger than max_bytes.
+
+    Raises:
+        HTTPException: 413 once the upload exceeds max_bytes
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Upload larger than {max_bytes // (1024 * 1024)} MB"
+    )
+    # Starlette knows the size of spooled uploads; reject those without reading
+    if getattr(file, "size", None) is not None and file.size > max_bytes:
+        raise too_large
+    chunks = []
+    received = 0
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        received += len(chunk)
+        if received > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _decode_with_pillow(data, max_side, max_pixels):
+    from PIL import Image, ImageOps
+
+    try:
+        image = Image.open(io.BytesIO(data))
+    except Exception as e:
+        raise InvalidImage("Invalid image file") from e
+    # Header only so far: refuse decompression bombs before decoding pixels
+    if image.width * image.height > max_pixels:
+        raise InvalidImage(f"Image too large ({image.width}x{image.height})")
+    try:
+        if max_side:
+            # JPEG: decode at the smallest 1/2, 1/4 or 1/8 scale still >= max_side
+            image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    except Exception as e:
+        raise InvalidImage("Invalid image file") from e
+    if max_side and max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.BILINEAR)
+    # RGB -> BGR for OpenCV consumers
+    return np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+
+
+def _jpeg_size(data):
+    offset = 2
+    while offset + 9 < len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # Fill byte
+            offset += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Stand-alone markers carry no length
+            offset += 2
+            continue
+        # Start of frame (any coding), not DHT / JPG / DAC
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + struct.unpack(">H", data[offset + 2:offset + 4])[0]
+    return None
+
+
+def _header_size(data):
+    """
+    (width, height) from the image header without decoding pixels, or None
+    for formats not recognised here.
+    """
+    if data[:2] == b"\xff\xd8":
+        return _jpeg_size(data)
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = struct.unpack("<I", data[21:25])[0]
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+        return None
+    if data[:2] == b"BM" and len(data) >= 26:
+        width, height = struct.unpack("<ii", data[18:26])
+        return abs(width), abs(height)
+    if data[:4] == b"GIF8" and len(data) >= 10:
+        return struct.unpack("<HH", data[6:10])
+    return None
+
+
+def _decode_with_cv2(data, max_side, max_pixels):
+    import cv2
+
+    size = _header_size(data)
+    if size is None:
+        raise InvalidImage("Invalid or unsupported image file")
+    # Refuse decompression bombs before imdecode allocates the pixels
+    if size[0] * size[1] > max_pixels:
+        raise InvalidImage(f"Image too large ({size[0]}x{size[1]})")
+
+    buffer = np.frombuffer(data, np.uint8)
+    # imdecode applies EXIF orientation itself
+    image = None
+    if max_side:
+        # The 1/8 decode is cheap and tells us how far the full decode can be reduced
+        preview = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_COLOR_8)
+        if preview is None:
+            raise InvalidImage("Invalid image file")
+        full_side = max(preview.shape[:2]) * 8
+        for factor, flag in ((8, None), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2)):
+            if full_side // factor >= max_side:
+                image = preview if flag is None else cv2.imdecode(buffer, flag)
+                break
+    if image is None:
+        image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if image is None:
+        raise InvalidImage("Invalid image file")
+    height, width = image.shape[:2]
+    if max_side and max(height, width) > max_side:
+        scale = max_side / max(height, width)
+        image = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    return image
+
+
+def decode_image(data, max_side=None, max_pixels=50_000_000):
+    """
+    Decode upload bytes to an upright BGR array no larger than max_side per side.
+
+    Args:
+        data (bytes): Encoded image
+        max_side (int): Longest side the consumer needs; None keeps full resolution
+        max_pixels (int): Largest width*height accepted (checked from the header)
+
+    Raises:
+        InvalidImage: when the bytes are not a decodable image
+    """
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return _decode_with_cv2(data, max_side, max_pixels)
+    return _decode_with_pillow(data, max_side, max_pixels)
+
+
+def decode_scale(data, image):
+    """
+    Factor from the decoded image's pixels back to the uploaded image's.
+
+    Decoding keeps the aspect ratio, so one factor (longest sides) holds
+    whichever way EXIF orientation turned the image.
+
+    Args:
+        data (bytes): Encoded upload
+        image (numpy.ndarray): decode_image() result for it
+    """
+    try:
+        from PIL import Image
+        size = Image.open(io.BytesIO(data)).size
+    except ImportError:
+        size = _header_size(data)
+    return max(size) / max(image.shape[:2])
+
+
+def normalise_image(data, max_side, quality=95):
+    """
+    Re-encode an upload as an upright JPEG no larger than max_side per side,
+    for consumers that read the image from a file.
+
+    Returns:
+        bytes: JPEG data
+    """
+    import cv2
+
+    image = decode_image(data, max_side)
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise InvalidImage("Could not re-encode image")
+    return encoded.tobytes()
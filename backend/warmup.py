@@ -0,0 +1,124 @@
+"""
+Start-up warm-up of the model-backed components, and readiness reporting.
+
+Each component loads lazily on first use, so without a warm-up the first
+request after a deploy pays for model loading, index building and first
+inference. The warm-up loads every selected component concurrently and
+runs one dummy inference through it. It runs in the background so /health
+(liveness) answers straight away, while /ready reports 503 until every
+selected component is warm.
+
+A failed warm-up is retried with exponential backoff (a model download or
+the index volume can be briefly unavailable after a deploy). A component
+that still fails is reported as failed and loads on first use instead;
+/ready then answers 200 with "degraded": true, so one broken component
+does not keep the others out of service.
+"""
+import asyncio
+import time
+
+PENDING = "pending"
+LOADING = "loading"
+# Failed, waiting for the next attempt
+RETRYING = "retrying"
+READY = "ready"
+FAILED = "failed"
+# Not warmed at start-up: still loads on first use
+LAZY = "lazy"
+# Component could not be imported
+UNAVAILABLE = "unavailable"
+
+
+class ComponentWarmup:
+    """Concurrent warm-up of registered components with per-component state"""
+
+    def __init__(self, retries=3, backoff=5.0, max_backoff=60.0):
+        """
+        Args:
+            retries (int): Attempts after the first failure of a component
+            backoff (float): Seconds before the first retry, doubled each attempt
+            max_backoff (float): Cap on the delay between attempts
+        """
+        self.retries = max(0, int(retries))
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self._components = {}
+        self.started_at = None
+        self.finished_at = None
+
+    def register(self, name, warm, run=None, available=True, enabled=True):
+        """
+        Args:
+            name (str): Component name reported by /ready
+            warm (callable): Blocking function that loads the component and runs a
+                dummy inference; may return a dict of stage timings (ms)
+            run (callable): Async runner for warm, e.g. BoundedExecutor.run;
+                defaults to asyncio.to_thread
+            available (bool): False when the component failed to import
+            enabled (bool): False to leave the component to load lazily
+        """
+        if not available:
+            state = UNAVAILABLE
+        else:
+            state = PENDING if enabled else LAZY
+        self._components[name] = {
+            "warm": warm,
+            "run": run or asyncio.to_thread,
+            "state": state,
+            "duration_ms": None,
+            "stages_ms": None,
+            "attempts": 0,
+            "error": None,
+        }
+
+    async def _warm(self, name):
+        component = self._components[name]
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            component["state"] = LOADING
+            component["attempts"] = attempt + 1
+            try:
+                component["stages_ms"] = await component["run"](component["warm"]) or None
+                component["state"] = READY
+                component["error"] = None
+                break
+            except Exception as e:
+                component["error"] = str(e)
+                if attempt == self.retries:
+                    component["state"] = FAILED
+                    print(f"Warning: warm-up of {name} failed after {attempt + 1} attempts: {e}")
+                    break
+                delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+                component["state"] = RETRYING
+                print(f"Warning: warm-up of {name} failed ({e}); retrying in {delay:.0f} s")
+                await asyncio.sleep(delay)
+        component["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        print(f"Warm-up of {name}: {component['state']} in {component['duration_ms']} ms")
+
+    async def run(self):
+        """Warm every pending component concurrently"""
+        self.started_at = time.time()
+        pending = [name for name, c in self._components.items() if c["state"] == PENDING]
+        await asyncio.gather(*(self._warm(name) for name in pending))
+        self.finished_at = time.time()
+
+    def is_ready(self):
+        """True once every component selected for warm-up is ready or has given up"""
+        return all(c["state"] in (READY, FAILED, LAZY, UNAVAILABLE) for c in self._components.values())
+
+    def is_degraded(self):
+        """True when a component failed every warm-up attempt (it loads on first use)"""
+        return any(c["state"] == FAILED for c in self._components.values())
+
+    def status(self):
+        return {
+            "ready": self.is_ready(),
+            "degraded": self.is_degraded(),
+            "warmup_duration_ms": (
+                round((self.finished_at - self.started_at) * 1000, 3) if self.finished_at else None
+            ),
+            "components": {
+                name: {key: c[key] for key in ("state", "attempts", "duration_ms", "stages_ms", "error")}
+                for name, c in self._components.items()
+            },
+        }
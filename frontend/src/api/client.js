@@ -43,6 +43,8 @@ export const api = {
     formData.append('description', description);
     if (genderFilter) formData.append('gender_filter', genderFilter);
     formData.append('top_n', topN);
+    // Shared extracted attributes once, no semantic_text (the cards don't use them)
+    formData.append('compact', 'true');
 
     try {
       const response = await client.post('/recommend-outfits', formData, {
@@ -57,6 +59,25 @@ export const api = {
     }
   },
 
+  recommendFromImage: async (imageFile, topN = 10) => {
+    const formData = new FormData();
+    formData.append('file', imageFile);
+    formData.append('top_n', topN);
+    formData.append('compact', 'true');
+
+    try {
+      const response = await client.post('/recommend-from-image', formData, {
+        headers: {
+          'Content-Type': 'multipart/form-data',
+        },
+      });
+      return response.data;
+    } catch (error) {
+      console.error('Recommendation From Image Failed:', error);
+      throw error;
+    }
+  },
+
   generateTryOn: async (imageFile, description) => {
     const formData = new FormData();
     formData.append('file', imageFile);
@@ -75,6 +96,54 @@ export const api = {
     }
   },
 
+  submitTryOnJob: async (imageFile, description) => {
+    const formData = new FormData();
+    formData.append('file', imageFile);
+    formData.append('description', description);
+
+    try {
+      const response = await client.post('/try-on/jobs', formData, {
+        headers: {
+          'Content-Type': 'multipart/form-data',
+        },
+      });
+      return response.data;
+    } catch (error) {
+      console.error('Try-On Job Submit Failed:', error);
+      throw error;
+    }
+  },
+
+  getTryOnJob: async (jobId) => {
+    const response = await client.get(`/try-on/jobs/${jobId}`);
+    return response.data;
+  },
+
+  cancelTryOnJob: async (jobId) => {
+    const response = await client.delete(`/try-on/jobs/${jobId}`);
+    return response.data;
+  },
+
+  // Follows a job over server-sent events; resolves with the final job state
+  watchTryOnJob: (jobId, onUpdate) => new Promise((resolve, reject) => {
+    const source = new EventSource(`${API_URL}/try-on/jobs/${jobId}/events`);
+    const handle = (event) => {
+      const job = JSON.parse(event.data);
+      if (onUpdate) onUpdate(job);
+      if (['succeeded', 'failed', 'cancelled'].includes(job.status)) {
+        source.close();
+        resolve(job);
+      }
+    };
+    ['queued', 'running', 'succeeded', 'failed', 'cancelled'].forEach((status) =>
+      source.addEventListener(status, handle)
+    );
+    source.onerror = () => {
+      source.close();
+      reject(new Error('Lost connection to try-on job events'));
+    };
+  }),
+
   getGeneratedImageUrl: (filename) => {
     // filename coming from API, e.g. /static/output_123.png
     return `${API_URL}${filename}`;
@@ -20,6 +20,7 @@ const VirtualTryOn = () => {
   // AI State
   const [aiPrompt, setAiPrompt] = useState('');
   const [aiLoading, setAiLoading] = useState(false);
+  const [aiJob, setAiJob] = useState(null);
   const [generatedImage, setGeneratedImage] = useState(null);
 
   const overlays = [
@@ -56,19 +57,36 @@ const VirtualTryOn = () => {
 
     setAiLoading(true);
     try {
-      const response = await api.generateTryOn(fileObject, aiPrompt);
-      if (response && response.image_url) {
-        const fullUrl = api.getGeneratedImageUrl(response.image_url);
+      // Generation can take minutes on CPU: queue a job and follow its progress
+      const submitted = await api.submitTryOnJob(fileObject, aiPrompt);
+      setAiJob(submitted);
+      const job = await api.watchTryOnJob(submitted.job_id, setAiJob);
+      if (job.status === 'succeeded' && job.image_url) {
+        const fullUrl = api.getGeneratedImageUrl(job.image_url);
         setGeneratedImage(fullUrl);
+      } else if (job.status === 'failed') {
+        throw new Error(job.error);
       }
     } catch (error) {
       console.error("AI Generation failed:", error);
       alert("Failed to generate outfit. Backend likely unavailable or missing GPU.");
     } finally {
       setAiLoading(false);
+      setAiJob(null);
     }
   };
 
+  const handleAiCancel = async () => {
+    if (aiJob) await api.cancelTryOnJob(aiJob.job_id);
+  };
+
+  const aiStatusText = () => {
+    if (!aiJob) return 'Submitting...';
+    if (aiJob.status === 'queued') return `Waiting in queue (position ${aiJob.queue_position})`;
+    const { step, total_steps } = aiJob.progress;
+    return total_steps ? `Step ${step} of ${total_steps}` : 'Preparing...';
+  };
+
   return (
     <div className="container mx-auto px-6 py-12">
       <div className="max-w-6xl mx-auto">
@@ -151,7 +169,14 @@ const VirtualTryOn = () => {
                   <div className="flex flex-col items-center animate-pulse">
                     <Wand2 className="w-12 h-12 text-accent-600 mb-4" />
                     <span className="text-xl font-bold text-accent-800">Designing your outfit...</span>
-                    <span className="text-sm text-text-500 mt-2">This may take up to 30 seconds</span>
+                    <span className="text-sm text-text-500 mt-2">{aiStatusText()}</span>
+                    <button
+                      onClick={handleAiCancel}
+                      disabled={!aiJob}
+                      className="mt-4 text-sm text-red-500 hover:underline"
+                    >
+                      Cancel
+                    </button>
                   </div>
                 </div>
               )}
@@ -14,27 +14,19 @@ export const analyzeUserImage = async (file) => {
 };
 
 export const recommendFromImage = async (file) => {
-  // Legacy support or chain analysis + recommendation
-  // For now, let's just analyze and then search based on detected attributes
+  // Face analysis and recommendation happen server-side in one request
   try {
-    const analysis = await api.analyzeFace(file);
-    const faces = analysis.faces;
-    if (!faces || faces.length === 0) {
+    const response = await api.recommendFromImage(file);
+    if (!response.faces || response.faces.length === 0) {
       return {
         success: false,
         error: "No face detected"
       };
     }
 
-    // Use the first face attributes to build a query
-    const face = faces[0];
-    const description = `Outfit for ${face.gender} with ${face.skin_tone} skin tone and ${face.face_shape} face shape`;
-
-    const recommendations = await api.recommendOutfits(description, face.gender);
-
     return {
       success: true,
-      data: recommendations.recommendations.map(mapBackendToFrontend)
+      data: response.recommendations.map(mapBackendToFrontend)
     };
   } catch (error) {
     console.error("Recommendation from image failed", error);
@@ -0,0 +1,315 @@
+"""
+In-memory structured index over catalog metadata.
+
+Categorical fields get one packed bitset per value, numeric fields get a
+sorted array, so a filter such as
+
+    {"occasions": ["wedding"], "seasons": "summer",
+     "price": {"max": 3000}, "rating": {"min": 4.5}}
+
+resolves to a candidate set with a handful of vectorised AND/OR operations.
+Vector scoring then only runs on that candidate set.
+
+The result is a row mask over this index (Candidates). Engines that keep
+their own row order (the exact vector matrix, BM25 postings) map it onto
+their rows with a RowAlignment: one gather per query, with the gather
+array rebuilt only when either side changes.
+"""
+import itertools
+import threading
+import numpy as np
+
+# Metadata fields stored as comma-joined strings in the catalog
+MULTI_VALUE_FIELDS = (
+    "occasions", "seasons", "places", "styles", "fabric", "colors",
+    "suitable_body_types", "suitable_skin_tones",
+)
+CATEGORICAL_FIELDS = MULTI_VALUE_FIELDS + ("gender", "category", "origin", "weaver_name")
+NUMERIC_FIELDS = ("price", "rating")
+
+# Catalog rows tagged with this value match any requested value of the field
+WILDCARD_VALUE = "all"
+
+
+# Build counter shared by every index, so alignments never mix up two builds
+_generations = itertools.count(1)
+
+
+def _split_values(value):
+    return [part.strip().lower() for part in str(value).split(",") if part.strip()]
+
+
+class Candidates:
+    """
+    Rows of an AttributeIndex build that pass a filter.
+
+    Iterates (and has a length) like the array of matching product ids, so
+    engines without their own row mask can treat it as an id list.
+    """
+
+    def __init__(self, ids, mask, generation):
+        """
+        Args:
+            ids (numpy.ndarray): Product id of every row of the build
+            mask (numpy.ndarray): Boolean, True for matching rows
+            generation (int): Build the rows belong to
+        """
+        self.all_ids = ids
+        self.mask = mask
+        self.generation = generation
+        self._count = int(np.count_nonzero(mask))
+        self._ids = None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    @property
+    def ids(self):
+        """Matching product ids"""
+        if self._ids is None:
+            self._ids = self.all_ids[np.flatnonzero(self.mask)]
+        return self._ids
+
+
+class RowAlignment:
+    """Maps Candidates onto the row order of another store (vector matrix, BM25 postings)"""
+
+    def __init__(self):
+        self._cached = (None, None)
+
+    def mask(self, candidates, row_ids, version):
+        """
+        Boolean mask over row_ids for the candidates.
+
+        Args:
+            candidates (Candidates): Filter result
+            row_ids (list): Product id of each row of the target store
+            version: Changes whenever the target's row order changes
+        """
+        key = (candidates.generation, version)
+        cached_key, gather = self._cached
+        if cached_key != key:
+            if len(row_ids) == len(candidates.all_ids) and candidates.all_ids.tolist() == list(row_ids):
+                # Both sides were filled in the same order (the usual case)
+                gather = None
+            else:
+                row_of = {pid: row for row, pid in enumerate(candidates.all_ids)}
+                # Ids the attribute index does not know gather the padding row (False)
+                missing = len(candidates.all_ids)
+                gather = np.fromiter(
+                    (row_of.get(pid, missing) for pid in row_ids), dtype=np.int64, count=len(row_ids)
+                )
+            # One tuple, so concurrent readers never pair a key with another gather
+            self._cached = (key, gather)
+        if gather is None:
+            return candidates.mask.copy()
+        return np.append(candidates.mask, False)[gather]
+
+
+class _Snapshot:
+    """One immutable build of the index; replaced as a whole, never modified"""
+
+    def __init__(self, ids, postings, numeric, generation):
+        self.ids = ids
+        self.postings = postings
+        self.numeric = numeric
+        self.generation = generation
+
+
+def _row_keys(metadata, codes):
+    """Posting codes of one row, assigning codes to unseen (field, value) keys"""
+    keys = []
+    for field in CATEGORICAL_FIELDS:
+        raw = metadata.get(field, "")
+        values = _split_values(raw) if field in MULTI_VALUE_FIELDS else [str(raw).strip().lower()]
+        for value in values:
+            keys.append(codes.setdefault((field, value), len(codes)))
+    return np.array(keys, dtype=np.int32)
+
+
+def validate_filters(filters):
+    """
+    Check a filter spec without resolving it.
+
+    Raises:
+        ValueError: unknown field, a numeric filter that is not a
+            {"min", "max"} object, or a bound that is not a number
+    """
+    if not filters:
+        return
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be a JSON object")
+    for field, spec in filters.items():
+        if field in NUMERIC_FIELDS:
+            # A bare number is ambiguous (at least? exactly?), so ask for the bound
+            if not isinstance(spec, dict):
+                raise ValueError(f"Filter '{field}' must be an object like {{\"min\": x, \"max\": y}}")
+            bounds = spec
+            unknown = set(bounds) - {"min", "max"}
+            if unknown:
+                raise ValueError(f"Unsupported bound(s) for '{field}': {', '.join(sorted(unknown))}")
+            for bound in bounds.values():
+                if bound is None:
+                    continue
+                try:
+                    float(bound)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Filter '{field}' needs numeric bounds") from None
+        elif field not in CATEGORICAL_FIELDS:
+            raise ValueError(f"Unsupported filter field '{field}'")
+
+
+class AttributeIndex:
+    """
+    Bitset / sorted-array index keyed by product_id.
+
+    Writes only record rows; build() turns them into a new snapshot and swaps
+    it in, so queries never wait for (or see half of) a rebuild. The catalog
+    writer calls build() after each ingestion or sync batch; a query only
+    builds when nothing has been built yet.
+    """
+
+    def __init__(self):
+        self._keys = {}
+        self._numbers = {}
+        self._codes = {}
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._snapshot = _Snapshot(np.array([], dtype=object), {}, {}, 0)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, pid):
+        return pid in self._keys
+
+    def upsert(self, ids, metadatas):
+        with self._lock:
+            for pid, metadata in zip(ids, metadatas):
+                self._keys[pid] = _row_keys(metadata, self._codes)
+                self._numbers[pid] = tuple(float(metadata.get(field) or 0) for field in NUMERIC_FIELDS)
+            self._dirty = True
+
+    def delete(self, ids):
+        with self._lock:
+            for pid in ids:
+                self._keys.pop(pid, None)
+                self._numbers.pop(pid, None)
+            self._dirty = True
+
+    def rebuild(self, ids, metadatas):
+        with self._lock:
+            self._keys = {}
+            self._numbers = {}
+            self._codes = {}
+            self._dirty = True
+        self.upsert(ids, metadatas)
+
+    def build(self):
+        """Build bitsets and sorted arrays from the current rows and publish them"""
+        with self._lock:
+            if self._dirty:
+                self._snapshot = self._build()
+                self._dirty = False
+        return self._snapshot
+
+    def _build(self):
+        ids = list(self._keys)
+        n = len(ids)
+        keys = [self._keys[pid] for pid in ids]
+
+        # (code, row) pairs of every posting, grouped by code
+        codes = np.concatenate(keys) if keys else np.zeros(0, dtype=np.int32)
+        rows = np.repeat(np.arange(n), [len(row_keys) for row_keys in keys])
+        order = np.argsort(codes, kind="stable")
+        codes, rows = codes[order], rows[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        key_of = {code: key for key, code in self._codes.items()}
+        postings = {}
+        if len(codes):
+            for start, code_rows in zip(np.concatenate(([0], bounds)), np.split(rows, bounds)):
+                mask = np.zeros(n, dtype=bool)
+                mask[code_rows] = True
+                postings[key_of[int(codes[start])]] = np.packbits(mask)
+
+        numbers = np.array([self._numbers[pid] for pid in ids], dtype=np.float64).reshape(n, len(NUMERIC_FIELDS))
+        numeric = {}
+        for col, field in enumerate(NUMERIC_FIELDS):
+            values = numbers[:, col]
+            order = np.argsort(values, kind="stable")
+            numeric[field] = (values[order], order)
+
+        return _Snapshot(np.array(ids, dtype=object), postings, numeric, next(_generations))
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot.generation == 0 and self._dirty:
+            snapshot = self.build()
+        return snapshot
+
+    @staticmethod
+    def _field_bits(snapshot, field, values):
+        """OR of the bitsets for the requested values (plus the wildcard)"""
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+        wanted = {str(v).strip().lower() for v in values}
+        if field in MULTI_VALUE_FIELDS:
+            wanted.add(WILDCARD_VALUE)
+        bits = np.zeros((len(snapshot.ids) + 7) // 8, dtype=np.uint8)
+        for value in wanted:
+            posting = snapshot.postings.get((field, value))
+            if posting is not None:
+                np.bitwise_or(bits, posting, out=bits)
+        return bits
+
+    @staticmethod
+    def _range_bits(snapshot, field, bounds):
+        sorted_values, order = snapshot.numeric[field]
+        lo = 0
+        hi = len(sorted_values)
+        if bounds.get("min") is not None:
+            lo = np.searchsorted(sorted_values, float(bounds["min"]), side="left")
+        if bounds.get("max") is not None:
+            hi = np.searchsorted(sorted_values, float(bounds["max"]), side="right")
+        mask = np.zeros(len(snapshot.ids), dtype=bool)
+        if hi > lo:
+            mask[order[lo:hi]] = True
+        return np.packbits(mask)
+
+    def candidates(self, filters):
+        """
+        Resolve a filter spec to matching product ids.
+
+        Args:
+            filters (dict): categorical field -> value or list of values (OR
+                within a field, AND across fields); numeric field ->
+                {"min": x, "max": y} (inclusive, either bound optional)
+
+        Returns:
+            Candidates: matching rows, or None when there is no filter
+
+        Raises:
+            ValueError: see validate_filters
+        """
+        if not filters:
+            return None
+        validate_filters(filters)
+        snapshot = self._current()
+
+        bits = None
+        for field, spec in filters.items():
+            if field in NUMERIC_FIELDS:
+                field_bits = self._range_bits(snapshot, field, spec)
+            else:
+                field_bits = self._field_bits(snapshot, field, spec)
+            bits = field_bits if bits is None else np.bitwise_and(bits, field_bits)
+
+        mask = np.unpackbits(bits, count=len(snapshot.ids)).view(bool)
+        return Candidates(snapshot.ids, mask, snapshot.generation)
+
+    def values(self, field):
+        """Distinct indexed values of a categorical field"""
+        return sorted(value for f, value in self._current().postings if f == field)
@@ -0,0 +1,141 @@
+"""
+Benchmark: PyTorch (HuggingFaceEmbeddings) vs. int8 ONNX Runtime MiniLM encoder.
+
+Reports cosine parity between the two encoders (per text and on the
+query x catalog score matrix used for ranking), single-query latency and
+the RSS growth caused by loading each runtime. Each runtime is measured in
+a fresh subprocess so their memory does not overlap.
+
+Usage: python bench_embeddings.py [--repeat N] [--model-dir onnx_minilm]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(SCRIPT_DIR)
+from test_keywords import _descriptions
+
+
+def _rss_mb():
+    # Linux: resident set size from /proc; falls back to peak RSS elsewhere
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _catalog_texts():
+    import pandas as pd
+    df = pd.read_csv(os.path.join(SCRIPT_DIR, "outfits_60_dataset_with_gender.csv"))
+    return df["semantic_text"].astype(str).tolist()
+
+
+def _load(runtime, model_dir):
+    if runtime == "onnx":
+        from onnx_embeddings import OnnxMiniLMEmbeddings
+        return OnnxMiniLMEmbeddings(model_dir)
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(
+        model_name="sentence-transformers/all-MiniLM-L6-v2",
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+
+
+def _measure(runtime, model_dir, repeat, out_path):
+    """Runs inside a subprocess: load one runtime, time it, dump vectors"""
+    queries = [t for t in _descriptions() if t]
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    embeddings = _load(runtime, model_dir)
+    embeddings.embed_query(queries[0])
+    load_s = time.perf_counter() - start
+
+    per_call = []
+    for _ in range(repeat):
+        for text in queries:
+            start = time.perf_counter()
+            embeddings.embed_query(text)
+            per_call.append((time.perf_counter() - start) * 1000)
+    per_call.sort()
+
+    catalog = np.asarray(embeddings.embed_documents(_catalog_texts()), dtype=np.float32)
+    query_vectors = np.asarray([embeddings.embed_query(t) for t in queries], dtype=np.float32)
+    np.savez(out_path, catalog=catalog, queries=query_vectors)
+
+    print(json.dumps({
+        "runtime": runtime,
+        "load_s": round(load_s, 2),
+        "p50_ms": round(statistics.median(per_call), 3),
+        "p95_ms": round(per_call[int(len(per_call) * 0.95) - 1], 3),
+        "rss_mb": round(_rss_mb() - rss_before, 1),
+    }))
+
+
+def _run(runtime, model_dir, repeat, out_path):
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure", runtime, "--model-dir", model_dir,
+         "--repeat", str(repeat), "--out", out_path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    from onnx_embeddings import DEFAULT_MODEL_DIR
+
+    parser = argparse.ArgumentParser(description="Compare PyTorch and ONNX Runtime MiniLM encoders")
+    parser.add_argument("--repeat", type=int, default=10, help="Passes over the query set")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--measure", choices=["hf", "onnx"], help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        _measure(args.measure, args.model_dir, args.repeat, args.out)
+        return
+
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        vectors = {}
+        for runtime in ("hf", "onnx"):
+            out_path = os.path.join(tmp, f"{runtime}.npz")
+            results[runtime] = _run(runtime, args.model_dir, args.repeat, out_path)
+            vectors[runtime] = dict(np.load(out_path))
+
+    for runtime, r in results.items():
+        print(
+            f"{runtime:<5} load {r['load_s']:.2f} s | embed_query p50 {r['p50_ms']:.3f} ms, "
+            f"p95 {r['p95_ms']:.3f} ms | RSS +{r['rss_mb']:.0f} MB"
+        )
+
+    hf, onnx = vectors["hf"], vectors["onnx"]
+    # Same text through both encoders (vectors are unit length)
+    text_cos = np.sum(hf["catalog"] * onnx["catalog"], axis=1)
+    # Ranking scores: query x catalog cosine matrices from each encoder
+    score_diff = np.abs(hf["queries"] @ hf["catalog"].T - onnx["queries"] @ onnx["catalog"].T)
+    top_hf = np.argsort(-(hf["queries"] @ hf["catalog"].T), axis=1)[:, :10]
+    top_onnx = np.argsort(-(onnx["queries"] @ onnx["catalog"].T), axis=1)[:, :10]
+    overlap = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(top_hf, top_onnx)])
+
+    print(f"\nParity: text cosine min {text_cos.min():.4f}, mean {text_cos.mean():.4f}")
+    print(f"        score |diff| max {score_diff.max():.4f}, mean {score_diff.mean():.4f}")
+    print(f"        top-10 overlap {overlap:.3f}")
+    print(f"\nSpeed-up (p50): {results['hf']['p50_ms'] / results['onnx']['p50_ms']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
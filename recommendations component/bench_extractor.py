@@ -0,0 +1,60 @@
+"""
+Microbenchmark: full spaCy EntityRuler pipeline vs. the tokenizer-only
+keyword extractor.
+Usage: python bench_extractor.py [--repeat N]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from keywords import FashionAttributeExtractor, KeywordAttributeExtractor
+from test_keywords import _descriptions
+
+
+def _bench(name, extractor, texts, repeat):
+    # Warm-up so lazy initialisation is not measured
+    extractor.extract(texts[0])
+
+    per_call = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            extractor.extract(text)
+            per_call.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        extractor.extract_batch(texts)
+    batch_ms = (time.perf_counter() - start) * 1000 / (repeat * len(texts))
+
+    per_call.sort()
+    print(
+        f"{name:<8} extract: p50 {statistics.median(per_call):.3f} ms, "
+        f"p95 {per_call[int(len(per_call) * 0.95) - 1]:.3f} ms | "
+        f"extract_batch: {batch_ms:.3f} ms/text"
+    )
+    return statistics.median(per_call)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark attribute extractors")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the query set")
+    args = parser.parse_args()
+
+    texts = [t for t in _descriptions() if t]
+    print(f"{len(texts)} texts x {args.repeat} passes\n")
+
+    fast = _bench("fast", KeywordAttributeExtractor(), texts, args.repeat)
+    try:
+        full = _bench("spacy", FashionAttributeExtractor(), texts, args.repeat)
+    except OSError as e:
+        print(f"spacy    skipped: {e}")
+        return
+    print(f"\nSpeed-up (p50): {full / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark: memory per worker process when N uvicorn-style workers serve one catalog.
+
+Every worker is a fresh subprocess that opens the same index directory (the
+first one to take the catalog sync lock builds it, the others open it), runs
+a few filtered hybrid queries and then waits. Once all workers are warm each
+one reports /proc/self/smaps_rollup, so shared pages are split between the
+live processes:
+
+    rss      resident pages, shared ones counted in full
+    pss      proportional share (shared pages divided among the mappers)
+    private  pages only this worker holds
+
+With the mmap backend the vector matrix and the record blob (metadata and
+documents) live in the shared page cache. Per worker, private memory still
+holds the query encoder, the attribute-index bitsets and row keys, the BM25
+postings and the id -> row maps; those grow with the catalog and are the
+remaining per-worker cost.
+
+Usage: python bench_workers.py --csv catalog.csv [--workers 1 4] [--backend exact mmap] [--fake-embeddings]
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(SCRIPT_DIR)
+from bench_embeddings import _rss_mb
+
+QUERIES = [
+    "breathable cotton kurta for a summer wedding",
+    "silk saree in deep red for a festival evening",
+    "casual linen shirt for the beach",
+]
+SMAPS_FIELDS = {"Rss": "rss", "Pss": "pss", "Private_Clean": "private", "Private_Dirty": "private"}
+
+
+def _memory_mb():
+    """rss / pss / private MB of this process (rss only outside Linux)"""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return {"rss": round(_rss_mb(), 1)}
+    usage = {}
+    for line in lines:
+        name, _, rest = line.partition(":")
+        if name in SMAPS_FIELDS:
+            key = SMAPS_FIELDS[name]
+            usage[key] = usage.get(key, 0.0) + int(rest.split()[0]) / 1024
+    return {key: round(value, 1) for key, value in usage.items()}
+
+
+def _worker(csv_path, fake_embeddings):
+    """Runs inside a subprocess: load, query, then report memory when told to"""
+    import fashion_recommender as fr
+
+    if fake_embeddings:
+        from benchmark_recommender import HashingEmbeddings
+        fr._embeddings = HashingEmbeddings()
+    fr.get_extractor()
+    fr.get_embeddings()
+    baseline = _memory_mb()
+    fr.initialize_vectorstore_from_csv(csv_path)
+    for query in QUERIES:
+        result = fr.get_outfit_recommendations(
+            query, top_n=10, gender_filter="Female", filters={"occasions": ["wedding"]}
+        )
+        if isinstance(result, dict):
+            raise RuntimeError(result["error"])
+    print("ready", flush=True)
+    sys.stdin.readline()
+    usage = _memory_mb()
+    # What the catalog adds on top of the interpreter, libraries and models
+    usage["catalog_private"] = round(usage.get("private", 0.0) - baseline.get("private", 0.0), 1)
+    print(json.dumps(usage), flush=True)
+
+
+def _run_workers(count, csv_path, backend, index_dir, fake_embeddings):
+    env = dict(os.environ, RECOMMENDER_VECTOR_BACKEND=backend, RECOMMENDER_INDEX_DIR=index_dir,
+               RECOMMENDER_LOG_LEVEL="WARNING", RECOMMENDER_SIMILAR_K="0")
+    command = [sys.executable, os.path.abspath(__file__), "--worker", csv_path]
+    if fake_embeddings:
+        command.append("--fake-embeddings")
+    workers = [
+        subprocess.Popen(command, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(count)
+    ]
+    # Measure only once every worker is warm, so PSS reflects all of them
+    for worker in workers:
+        if worker.stdout.readline().strip() != "ready":
+            raise RuntimeError(f"worker exited with {worker.wait()}")
+    reports = []
+    for worker in workers:
+        worker.stdin.write("report\n")
+        worker.stdin.flush()
+        reports.append(json.loads(worker.stdout.readline()))
+    for worker in workers:
+        worker.wait()
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure RSS / PSS per recommender worker process")
+    parser.add_argument("--csv", default=os.path.join(SCRIPT_DIR, "outfits_60_dataset_with_gender.csv"))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--backend", nargs="+", default=["exact", "mmap"])
+    parser.add_argument("--fake-embeddings", action="store_true", help="Feature-hashing encoder instead of MiniLM")
+    parser.add_argument("--data-dir", default=os.path.join(SCRIPT_DIR, "benchmark_data"))
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.fake_embeddings)
+        return
+
+    results = {}
+    print(
+        f"{'backend':<8} {'workers':>7} {'rss MB':>8} {'pss MB':>8} {'private MB':>11} "
+        f"{'catalog private MB':>19} {'total pss MB':>13}"
+    )
+    for backend in args.backend:
+        index_dir = os.path.join(args.data_dir, f"workers_index_{backend}")
+        shutil.rmtree(index_dir, ignore_errors=True)
+        for count in args.workers:
+            reports = _run_workers(count, args.csv, backend, index_dir, args.fake_embeddings)
+            mean = {
+                key: sum(r.get(key, 0.0) for r in reports) / count
+                for key in ("rss", "pss", "private", "catalog_private")
+            }
+            total_pss = sum(r.get("pss", 0.0) for r in reports)
+            results[f"{backend}/{count}"] = {"per_worker": reports, "total_pss_mb": round(total_pss, 1)}
+            print(
+                f"{backend:<8} {count:>7} {mean['rss']:>8.0f} {mean['pss']:>8.0f} "
+                f"{mean['private']:>11.0f} {mean['catalog_private']:>19.0f} {total_pss:>13.0f}"
+            )
+        shutil.rmtree(index_dir, ignore_errors=True)
+    print()
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
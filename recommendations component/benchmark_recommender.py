@@ -0,0 +1,349 @@
+"""
+Reproducible recommender benchmark across catalog sizes.
+
+For every size a synthetic catalog is generated from the CSV schema (same
+columns, value vocabularies and semantic_text template as the real
+catalog, fixed seed) and indexed from scratch in a fresh subprocess, so
+build time and RSS are not polluted by earlier runs. A fixed query set is
+then run through get_outfit_recommendations().
+
+Reported per size: build time (ingestion, attribute/BM25 index build and
+the "more like this" graph separately), RSS after build, the first
+unfiltered and first filtered query after the build (cold, before any
+warm-up), steady-state p50/p95/p99 latency unfiltered and p50/p95 with
+gender + attribute filters, queries/sec (sequential and with --concurrency
+threads) and recall@k of the configured vector backend against exact
+brute-force search.
+
+The neighbour graph (on by default in the service) is off here
+(RECOMMENDER_SIMILAR_K=0) unless --similar-k is given, so build time
+measures the index itself; with it, its share is reported as graph_s.
+
+Usage:
+    python benchmark_recommender.py [--sizes 1000,10000,100000,1000000]
+        [--backend exact] [--fake-embeddings] [--similar-k 0] [--output results.json]
+
+--fake-embeddings swaps MiniLM for a deterministic feature-hashing encoder
+so the 100k/1M catalogs can be indexed in minutes; latency then excludes
+model inference, everything else is the production code path.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(SCRIPT_DIR)
+from bench_embeddings import _rss_mb
+from test_keywords import SAMPLE_DESCRIPTIONS
+
+SEED_CSV = os.path.join(SCRIPT_DIR, "outfits_60_dataset_with_gender.csv")
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+GENERATE_BLOCK_ROWS = 100000
+LIST_FIELDS = ("occasions", "seasons", "places", "styles", "colors", "suitable_body_types")
+# Filtered pass: present in the seed vocabularies, so synthetic catalogs match too
+FILTER_GENDER = "Female"
+FILTERS = {"occasions": ["wedding", "festival"]}
+
+
+class HashingEmbeddings:
+    """Deterministic bag-of-words feature hashing; shared words -> similar vectors"""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _vector(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in str(text).lower().replace(",", " ").split():
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vec[value % self.dim] += 1.0 if (value >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def _vocabulary(seed_df, field):
+    values = set()
+    for raw in seed_df[field].astype(str):
+        values.update(part.strip() for part in raw.split(",") if part.strip())
+    return sorted(values)
+
+
+def generate_catalog(rows, path, seed=0):
+    """Write a synthetic catalog CSV of `rows` rows shaped like the seed CSV"""
+    seed_df = pd.read_csv(SEED_CSV).fillna("")
+    rng = np.random.default_rng(seed)
+    vocab = {field: _vocabulary(seed_df, field) for field in LIST_FIELDS}
+    single = {
+        field: sorted(seed_df[field].astype(str).unique())
+        for field in ("gender", "category", "fabric", "suitable_skin_tones", "origin", "weaver_name")
+    }
+    price_lo, price_hi = int(seed_df["price"].min()), int(seed_df["price"].max())
+
+    if os.path.exists(path):
+        os.remove(path)
+    for start in range(0, rows, GENERATE_BLOCK_ROWS):
+        n = min(GENERATE_BLOCK_ROWS, rows - start)
+        block = {"product_id": [f"S{i:07d}" for i in range(start, start + n)],
+                 "name": [f"Outfit {i + 1}" for i in range(start, start + n)]}
+        for field, values in single.items():
+            block[field] = np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+        for field, values in vocab.items():
+            values = np.asarray(values, dtype=object)
+            counts = rng.integers(1, 3, n)
+            block[field] = [",".join(rng.choice(values, size=c, replace=False)) for c in counts]
+        block["rating"] = np.round(rng.uniform(3.5, 5.0, n), 1)
+        block["price"] = rng.integers(price_lo, price_hi + 1, n)
+        df = pd.DataFrame(block)
+        # Same template as the real catalog's semantic_text
+        df["semantic_text"] = (
+            df["styles"] + " " + df["category"].str.lower() + " made of " + df["fabric"]
+            + " suitable for " + df["occasions"] + " during " + df["seasons"]
+            + " season from " + df["origin"] + "."
+        )
+        df = df[list(seed_df.columns)]
+        df.to_csv(path, mode="a", header=(start == 0), index=False)
+    return path
+
+
+def query_set(limit=40):
+    """Fixed queries: hand-written samples plus a deterministic slice of catalog texts"""
+    seed_df = pd.read_csv(SEED_CSV).fillna("")
+    queries = [q for q in SAMPLE_DESCRIPTIONS if q]
+    queries += seed_df["semantic_text"].iloc[::3].tolist()
+    return queries[:limit]
+
+
+def _percentile(sorted_ms, q):
+    return round(float(np.percentile(sorted_ms, q)), 3) if len(sorted_ms) else None
+
+
+def _recall_against_exact(vectorstore, query_vectors, k):
+    """
+    recall@k of the backend against brute-force search over its stored vectors.
+
+    Tie-aware: a returned product counts as a hit when its exact score reaches
+    the k-th best exact score (synthetic catalogs contain duplicate texts).
+    """
+    ids = vectorstore.ids()
+    found, matrix = vectorstore.get_vectors(ids)
+    row_of = {pid: row for row, pid in enumerate(found)}
+    matrix = np.asarray(matrix, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    queries = np.asarray(query_vectors, dtype=np.float32)
+    queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+    hits = []
+    results = vectorstore.search(queries, k)
+    for query, matches in zip(queries, results):
+        scores = matrix @ query
+        kk = min(k, len(scores))
+        kth_best = np.partition(-scores, kk - 1)[kk - 1] * -1
+        got = [row_of[metadata["product_id"]] for metadata, _ in matches if metadata["product_id"] in row_of]
+        hits.append(sum(scores[row] >= kth_best - 1e-5 for row in got) / kk)
+    return round(float(np.mean(hits)), 4)
+
+
+def _timed_ms(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    if isinstance(result, dict) and "error" in result:
+        raise RuntimeError(result["error"])
+    return (time.perf_counter() - start) * 1000
+
+
+def _steady_state(fr, queries, repeat, k, **filters):
+    """Sorted per-query latencies (ms) over `repeat` uncached passes"""
+    latencies = []
+    for _ in range(repeat):
+        # Every pass measures the uncached path
+        fr._extraction_cache.clear()
+        fr._embedding_cache.clear()
+        for query in queries:
+            latencies.append(_timed_ms(fr.get_outfit_recommendations, query, top_n=k, **filters))
+    return sorted(latencies)
+
+
+def measure(csv_path, rows, args):
+    """Runs in a subprocess with RECOMMENDER_* set: build, query, report one JSON line"""
+    import fashion_recommender as fr
+
+    if args.fake_embeddings:
+        fr._embeddings = HashingEmbeddings()
+
+    rss_start = _rss_mb()
+    start = time.perf_counter()
+    vectorstore = fr.initialize_vectorstore_from_csv(csv_path)
+    build_s = time.perf_counter() - start
+    rss_built = _rss_mb()
+    sync_report = fr.get_catalog_sync_report()
+    graph_s = (sync_report.get("neighbor_graph") or {}).get("seconds", 0.0)
+
+    queries = query_set(args.queries)
+    # Cold: the first request after the build pays for anything still lazy,
+    # and the first filtered one for the filter path on top of it
+    first_ms = _timed_ms(fr.get_outfit_recommendations, queries[0], top_n=args.k)
+    first_filtered_ms = _timed_ms(
+        fr.get_outfit_recommendations, queries[1], top_n=args.k,
+        gender_filter=FILTER_GENDER, filters=FILTERS
+    )
+
+    start = time.perf_counter()
+    latencies = _steady_state(fr, queries, args.repeat, args.k)
+    sequential_s = time.perf_counter() - start
+    filtered = _steady_state(fr, queries, args.repeat, args.k, gender_filter=FILTER_GENDER, filters=FILTERS)
+
+    concurrent_qps = None
+    if args.concurrency > 1:
+        fr._extraction_cache.clear()
+        fr._embedding_cache.clear()
+        work = queries * args.repeat
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda q: fr.get_outfit_recommendations(q, top_n=args.k), work))
+        concurrent_qps = round(len(work) / (time.perf_counter() - start), 2)
+
+    query_vectors = fr.get_embeddings().embed_documents(queries)
+    result = {
+        "rows": rows,
+        "backend": vectorstore.name,
+        "build_s": round(build_s, 3),
+        "build_rows_per_s": round(rows / build_s, 1) if build_s else None,
+        "index_build_s": sync_report.get("index_seconds"),
+        "graph_s": graph_s,
+        "similar_k": fr.SIMILAR_PRODUCTS_K,
+        "rss_mb_start": round(rss_start, 1),
+        "rss_mb_after_build": round(rss_built, 1),
+        "rss_mb_end": round(_rss_mb(), 1),
+        "first_query_ms": round(first_ms, 3),
+        "first_filtered_query_ms": round(first_filtered_ms, 3),
+        "queries": len(latencies),
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+        "filtered_p50_ms": _percentile(filtered, 50),
+        "filtered_p95_ms": _percentile(filtered, 95),
+        "qps": round(len(latencies) / sequential_s, 2) if sequential_s else None,
+        "qps_concurrent": concurrent_qps,
+        "concurrency": args.concurrency,
+        f"recall_at_{args.k}": _recall_against_exact(vectorstore, query_vectors, args.k),
+    }
+    print(json.dumps(result))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recommender across catalog sizes")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated catalog row counts")
+    parser.add_argument("--backend", default=os.getenv("RECOMMENDER_VECTOR_BACKEND", "exact"),
+                        help="chroma, exact, mmap or hnsw")
+    parser.add_argument("--k", type=int, default=10, help="top_n per query and recall@k cut-off")
+    parser.add_argument("--queries", type=int, default=40, help="Size of the fixed query set")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the query set")
+    parser.add_argument("--concurrency", type=int, default=4, help="Threads for the throughput pass (1 disables)")
+    parser.add_argument("--fake-embeddings", action="store_true", help="Feature-hashing encoder instead of MiniLM")
+    parser.add_argument("--similar-k", type=int, default=0,
+                        help="Neighbour graph size built with the index (0 = off, timed separately as graph_s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.path.join(SCRIPT_DIR, "benchmark_data"),
+                        help="Generated catalogs and scratch indexes")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.rows, args)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = []
+    for rows in sizes:
+        csv_path = os.path.join(args.data_dir, f"catalog_{rows}_seed{args.seed}.csv")
+        if not os.path.exists(csv_path):
+            start = time.perf_counter()
+            generate_catalog(rows, csv_path, seed=args.seed)
+            print(f"Generated {rows} rows in {time.perf_counter() - start:.1f} s")
+
+        # Fresh index directory per run so build time covers a full ingestion
+        index_dir = os.path.join(args.data_dir, f"index_{rows}")
+        shutil.rmtree(index_dir, ignore_errors=True)
+        env = dict(os.environ, RECOMMENDER_VECTOR_BACKEND=args.backend,
+                   RECOMMENDER_INDEX_DIR=index_dir, RECOMMENDER_LOG_LEVEL="WARNING",
+                   RECOMMENDER_SIMILAR_K=str(args.similar_k))
+        command = [
+            sys.executable, os.path.abspath(__file__), "--measure", csv_path, "--rows", str(rows),
+            "--k", str(args.k), "--queries", str(args.queries), "--repeat", str(args.repeat),
+            "--concurrency", str(args.concurrency),
+        ]
+        if args.fake_embeddings:
+            command.append("--fake-embeddings")
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"{rows:>8} rows: FAILED\n{completed.stderr[-2000:]}")
+            results.append({"rows": rows, "error": completed.stderr[-2000:]})
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        shutil.rmtree(index_dir, ignore_errors=True)
+        print(
+            f"{rows:>8} rows: build {result['build_s']:.1f} s (index {result['index_build_s']:.2f} s, "
+            f"graph {result['graph_s']:.1f} s) | first {result['first_query_ms']:.1f} ms, "
+            f"first filtered {result['first_filtered_query_ms']:.1f} ms | p50 {result['p50_ms']:.2f} ms, "
+            f"p95 {result['p95_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms | filtered p50 "
+            f"{result['filtered_p50_ms']:.2f} ms, p95 {result['filtered_p95_ms']:.2f} ms | "
+            f"{result['qps']:.1f} qps | RSS {result['rss_mb_after_build']:.0f} MB | "
+            f"recall@{args.k} {result[f'recall_at_{args.k}']:.3f}"
+        )
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "backend": args.backend,
+            "k": args.k,
+            "queries": args.queries,
+            "repeat": args.repeat,
+            "concurrency": args.concurrency,
+            "fake_embeddings": args.fake_embeddings,
+            "similar_k": args.similar_k,
+            "seed": args.seed,
+            "env": {key: value for key, value in os.environ.items() if key.startswith("RECOMMENDER_")},
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
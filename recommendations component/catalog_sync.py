@@ -0,0 +1,283 @@
+"""
+Background sync from the MongoDB products_master collection into the
+recommendation index.
+
+The worker polls the collection for documents inserted, updated or
+deleted since its watermark, maps them onto the catalog CSV columns and
+hands them to fashion_recommender.upsert_catalog_rows() in small batches.
+Lag is bounded by the poll interval plus one batch of embedding work.
+Polling (rather than change streams) also works against a standalone
+mongod and mongomock.
+
+The watermark is the largest document timestamp (updated_at / created_at /
+deleted_at) applied so far, in UTC as MongoDB stores it. BSON dates carry no
+zone, so naive datetimes are taken as UTC and aware ones are converted.
+Legacy documents written with a naive local datetime.now() therefore look
+shifted by the writer's UTC offset; east of UTC they lie in the future, so
+the watermark is capped at the current UTC time and never jumps past writes
+still to come. Each poll re-reads an overlap window below the watermark, so a
+write committed late with an older timestamp (clock skew between writers,
+long transactions) is still picked up; products already applied at the
+same timestamp are skipped.
+
+Soft deletes (is_deleted / deleted_at) are tombstones and removed from the
+index. Hard deletes leave nothing to poll, so every reconcile_interval the
+worker compares the live product ids with the rows it indexed and removes
+the rest.
+
+The first poll after start-up is a full scan: unchanged products are not
+re-embedded (content hashes), but the in-memory attribute and BM25 indexes
+are refilled.
+"""
+import time
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger("fashion_recommender.catalog_sync")
+
+MONGO_DATABASE = "fashionDB"
+MONGO_COLLECTION = "products_master"
+
+# Fields products_master has no equivalent for; 'all' is the catalog wildcard
+WILDCARD_FIELDS = ("occasions", "suitable_body_types", "suitable_skin_tones")
+TIMESTAMP_FIELDS = ("updated_at", "created_at", "deleted_at")
+
+
+def _join(value):
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(v).strip() for v in value if str(v).strip())
+    return str(value or "").strip()
+
+
+def _utc(timestamp):
+    """Naive UTC datetime, the form MongoDB stores and returns; naive input is already UTC"""
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def _document_timestamp(doc):
+    timestamps = [doc.get(field) for field in TIMESTAMP_FIELDS]
+    timestamps = [_utc(ts) for ts in timestamps if isinstance(ts, datetime)]
+    return max(timestamps) if timestamps else None
+
+
+def _is_tombstone(doc):
+    return bool(doc.get("is_deleted")) or doc.get("deleted_at") is not None
+
+
+def mongo_product_to_row(doc):
+    """
+    Map a products_master document onto the catalog CSV columns.
+
+    Returns:
+        dict: Row keyed by fashion_recommender.CATALOG_COLUMNS
+    """
+    name = str(doc.get("product_name") or "").strip()
+    description = str(doc.get("product_description") or "").strip()
+    # The product description is the semantic text; structured details that
+    # have no catalog column still help the embedding
+    details = [
+        doc.get("material_composition"), doc.get("pattern"), doc.get("fit_type"),
+        doc.get("sleeve_type"), doc.get("collar_style"), doc.get("length_type"),
+    ]
+    details = ", ".join(str(d).strip() for d in details if d and str(d).strip())
+    semantic_text = " ".join(part for part in (name + ".", description, details) if part.strip("."))
+
+    row = {
+        "product_id": str(doc["product_id"]),
+        "name": name,
+        "gender": str(doc.get("gender") or "Unisex").strip(),
+        "category": str(doc.get("category") or "").strip(),
+        "seasons": _join(doc.get("seasonal_recommended")),
+        "places": _join(doc.get("places")),
+        "styles": _join(doc.get("style")),
+        "fabric": _join(doc.get("fabric_type")),
+        "colors": _join(doc.get("colors_available")),
+        "origin": str(doc.get("country_of_origin") or "").strip(),
+        "weaver_name": "",
+        "rating": float(doc.get("rating") or 0),
+        "price": float(doc.get("price") or 0),
+        "semantic_text": semantic_text,
+    }
+    for field in WILDCARD_FIELDS:
+        row[field] = "all"
+    return row
+
+
+class CatalogSyncWorker:
+    """Polls products_master and mirrors new, updated and deleted products into the index"""
+
+    def __init__(self, collection, apply_rows=None, delete_rows=None, indexed_ids=None,
+                 poll_interval=5.0, batch_size=32, overlap=60.0, reconcile_interval=300.0):
+        """
+        Args:
+            collection: pymongo (or mongomock) collection of products
+            apply_rows (callable): Receives a list of catalog rows; defaults to
+                fashion_recommender.upsert_catalog_rows
+            delete_rows (callable): Receives a list of product ids to remove; defaults
+                to fashion_recommender.delete_catalog_rows
+            indexed_ids (callable): Returns the product ids this sync has indexed;
+                defaults to fashion_recommender.get_external_ids
+            poll_interval (float): Seconds between polls
+            batch_size (int): Products embedded per upsert call
+            overlap (float): Seconds below the watermark re-read on every poll
+            reconcile_interval (float): Seconds between hard-delete reconciles (0 disables)
+        """
+        if apply_rows is None:
+            from fashion_recommender import upsert_catalog_rows
+            apply_rows = upsert_catalog_rows
+        if delete_rows is None:
+            from fashion_recommender import delete_catalog_rows
+            delete_rows = delete_catalog_rows
+        if indexed_ids is None:
+            from fashion_recommender import get_external_ids
+            indexed_ids = get_external_ids
+        self.collection = collection
+        self.apply_rows = apply_rows
+        self.delete_rows = delete_rows
+        self.indexed_ids = indexed_ids
+        self.poll_interval = float(poll_interval)
+        self.batch_size = max(1, int(batch_size))
+        self.overlap = timedelta(seconds=max(0.0, float(overlap)))
+        self.reconcile_interval = float(reconcile_interval)
+        self.watermark = None
+        # product_id -> timestamp applied, for products inside the overlap window
+        self._applied = {}
+        self._last_reconcile = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {
+            "polls": 0, "synced": 0, "deleted": 0, "errors": 0,
+            "last_sync": None, "last_reconcile": None, "last_error": None,
+        }
+
+    def _query(self):
+        if self.watermark is None:
+            return {}
+        since = self.watermark - self.overlap
+        return {"$or": [{field: {"$gte": since}} for field in TIMESTAMP_FIELDS]}
+
+    def poll_once(self):
+        """
+        Apply every product changed or deleted since the watermark (minus the
+        overlap window), then reconcile hard deletes when one is due.
+
+        Returns:
+            int: Number of products handed to apply_rows or delete_rows
+        """
+        self.stats["polls"] += 1
+        pending = []
+        for doc in self.collection.find(self._query()):
+            if not doc.get("product_id"):
+                continue
+            pid = str(doc["product_id"])
+            timestamp = _document_timestamp(doc)
+            if timestamp is not None and self._applied.get(pid) == timestamp:
+                continue
+            pending.append((timestamp or datetime.min, pid, doc))
+        # Oldest first, so the watermark only advances over applied batches
+        pending.sort(key=lambda item: item[0])
+
+        synced = deleted = 0
+        for offset in range(0, len(pending), self.batch_size):
+            batch = pending[offset:offset + self.batch_size]
+            rows = [mongo_product_to_row(doc) for _, _, doc in batch if not _is_tombstone(doc)]
+            tombstones = [pid for _, pid, doc in batch if _is_tombstone(doc)]
+            if rows:
+                self.apply_rows(rows)
+            if tombstones:
+                self.delete_rows(tombstones)
+            synced += len(rows)
+            deleted += len(tombstones)
+            # Future timestamps (legacy local time) stay in the window, deduplicated by _applied
+            now = _utc(datetime.now(timezone.utc))
+            for timestamp, pid, _ in batch:
+                if timestamp == datetime.min:
+                    continue
+                self._applied[pid] = timestamp
+                if self.watermark is None or min(timestamp, now) > self.watermark:
+                    self.watermark = min(timestamp, now)
+
+        if self.watermark is not None:
+            # Entries below the window are never read again
+            since = self.watermark - self.overlap
+            self._applied = {pid: ts for pid, ts in self._applied.items() if ts >= since}
+
+        if synced or deleted:
+            self.stats["synced"] += synced
+            self.stats["deleted"] += deleted
+            self.stats["last_sync"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            logger.info(
+                f"Synced {synced} products and {deleted} deletions from MongoDB (watermark {self.watermark})"
+            )
+
+        if self.reconcile_interval > 0 and (
+                self._last_reconcile is None
+                or time.monotonic() - self._last_reconcile >= self.reconcile_interval):
+            deleted += self.reconcile()
+        return synced + deleted
+
+    def reconcile(self):
+        """
+        Remove indexed products that no longer exist (hard deletes) or are
+        tombstoned in the collection.
+
+        Returns:
+            int: Number of products handed to delete_rows
+        """
+        # Indexed ids first: anything indexed before the scan is then seen by it
+        indexed = set(self.indexed_ids())
+        live = set()
+        for doc in self.collection.find({}, {"product_id": 1, "is_deleted": 1, "deleted_at": 1}):
+            if doc.get("product_id") and not _is_tombstone(doc):
+                live.add(str(doc["product_id"]))
+        stale = sorted(indexed - live)
+        for offset in range(0, len(stale), self.batch_size):
+            self.delete_rows(stale[offset:offset + self.batch_size])
+        for pid in stale:
+            self._applied.pop(pid, None)
+
+        self._last_reconcile = time.monotonic()
+        self.stats["last_reconcile"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        if stale:
+            self.stats["deleted"] += len(stale)
+            logger.info(f"Reconcile removed {len(stale)} products missing from MongoDB")
+        return len(stale)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.stats["last_error"] = str(e)
+                logger.exception(f"Catalog sync poll failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="catalog-sync", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self):
+        return dict(
+            self.stats,
+            running=self._thread is not None and self._thread.is_alive(),
+            watermark=self.watermark.replace(tzinfo=timezone.utc).isoformat() if self.watermark else None,
+        )
+
+
+def create_mongo_worker(mongo_uri, **options):
+    """Worker over fashionDB.products_master at mongo_uri (requires pymongo); options go to CatalogSyncWorker"""
+    from pymongo import MongoClient
+    collection = MongoClient(mongo_uri)[MONGO_DATABASE][MONGO_COLLECTION]
+    return CatalogSyncWorker(collection, **options)
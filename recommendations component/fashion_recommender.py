@@ -1,35 +1,200 @@
 import os
 import sys
 import json
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_core.documents import Document
-from keywords import FashionAttributeExtractor
+from keywords import FashionAttributeExtractor, KeywordAttributeExtractor
+from vector_backends import create_backend
+from attribute_index import AttributeIndex, validate_filters
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from neighbor_graph import GRAPH_FILE, NeighborGraph
+from onnx_embeddings import DEFAULT_MODEL_DIR as DEFAULT_ONNX_MODEL_DIR, OnnxMiniLMEmbeddings
+
+# Leveled logging, quiet by default; set RECOMMENDER_LOG_LEVEL=DEBUG for per-request traces
+logger = logging.getLogger("fashion_recommender")
+logger.setLevel(os.getenv("RECOMMENDER_LOG_LEVEL", "WARNING").upper())
+if not logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+    logger.addHandler(_log_handler)
+    logger.propagate = False
 
 # --- ROBUST PATH ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_CSV_PATH = os.path.join(SCRIPT_DIR, "outfits_60_dataset_with_gender.csv")
+# Where chroma_db/ and vector_index/ live (benchmarks point this at scratch space)
+INDEX_DIR = os.getenv("RECOMMENDER_INDEX_DIR", SCRIPT_DIR)
+# Each backend keeps a manifest with the content hash of every indexed row
+# so restarts only re-embed changes
+MANIFEST_VERSION = 1
+# Serialises catalog sync across worker processes; later workers then just open the result
+CATALOG_SYNC_LOCK_PATH = os.path.join(INDEX_DIR, ".catalog_sync.lock")
+
+# Vector search engine: 'chroma' (default), 'exact' (NumPy), 'mmap' (NumPy over a
+# catalog file memory-mapped by every worker) or 'hnsw' (hnswlib)
+VECTOR_BACKEND = os.getenv("RECOMMENDER_VECTOR_BACKEND", "chroma").lower()
+HNSW_M = int(os.getenv("RECOMMENDER_HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("RECOMMENDER_HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("RECOMMENDER_HNSW_EF_SEARCH", "64"))
+# Exact engine storage: float32, or float16/int8 in RAM with float32 re-ranking from disk
+VECTOR_DTYPE = os.getenv("RECOMMENDER_VECTOR_DTYPE", "float32").lower()
+RERANK_FACTOR = int(os.getenv("RECOMMENDER_RERANK_FACTOR", "4"))
+
+# Embedding model runtime: 'hf' (PyTorch via HuggingFaceEmbeddings) or
+# 'onnx' (int8 ONNX Runtime export of the same model, see onnx_embeddings.py)
+EMBEDDINGS_BACKEND = os.getenv("RECOMMENDER_EMBEDDINGS", "hf").lower()
+ONNX_MODEL_DIR = os.getenv("RECOMMENDER_ONNX_MODEL_DIR", DEFAULT_ONNX_MODEL_DIR)
+
+# Hybrid retrieval: BM25 over document text fused with vector results (RRF)
+HYBRID_SEARCH = os.getenv("RECOMMENDER_HYBRID_SEARCH", "true").lower() == "true"
+RRF_K = int(os.getenv("RECOMMENDER_RRF_K", "60"))
+
+# Attribute extractor: 'spacy' (full en_core_web_sm pipeline) or 'fast' (tokenizer + keyword trie)
+EXTRACTOR_MODE = os.getenv("RECOMMENDER_EXTRACTOR", "spacy").lower()
+
+# Streaming catalog ingestion: CSV rows per block, texts per embedding call,
+# and blocks between manifest/index checkpoints (resume points)
+INGEST_CHUNK_ROWS = int(os.getenv("RECOMMENDER_INGEST_CHUNK_ROWS", "5000"))
+INGEST_EMBED_BATCH = int(os.getenv("RECOMMENDER_INGEST_EMBED_BATCH", "256"))
+INGEST_CHECKPOINT_BLOCKS = int(os.getenv("RECOMMENDER_INGEST_CHECKPOINT_BLOCKS", "10"))
+# Seconds catalog upserts may leave the vector store and manifest unpersisted
+# (0 persists every batch); the start-up sync re-applies anything lost
+UPSERT_PERSIST_INTERVAL = float(os.getenv("RECOMMENDER_UPSERT_PERSIST_INTERVAL", "30"))
+
+# Neighbours precomputed per product for "more like this", so a lookup is O(k).
+# The first build costs one k-NN search per product (later syncs only redo
+# changed rows and their neighbours); 0 disables it and searches per request
+SIMILAR_PRODUCTS_K = int(os.getenv("RECOMMENDER_SIMILAR_K", "20"))
+
+# Cache sizes (entries); 0 disables the cache
+EXTRACTION_CACHE_SIZE = int(os.getenv("RECOMMENDER_EXTRACTION_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("RECOMMENDER_EMBEDDING_CACHE_SIZE", "4096"))
 
 # Initialize embeddings model (singleton pattern)
 _embeddings = None
 _vectorstore = None
 _extractor = None
+_catalog_sync_report = {}
+# Changes whenever the indexed catalog changes; used to invalidate response caches
+_catalog_version = None
+# product_id -> content hash of every indexed row, and the ids that did not come
+# from the CSV (e.g. MongoDB sync) so a CSV sync does not delete them
+_catalog_hashes = {}
+_external_ids = set()
+_index_write_lock = threading.Lock()
+# Serialises the lazy first ingestion in get_vectorstore()
+_vectorstore_init_lock = threading.Lock()
+# Deferred persistence of catalog upserts (see flush_catalog)
+_persist_timer = None
+# Structured filters (occasion, season, price, rating, ...) built next to the vector store
+_attribute_index = AttributeIndex()
+# Lexical side of hybrid search; queried on a worker thread while the query is embedded
+_lexical_index = BM25Index()
+_neighbor_graph = NeighborGraph(k=SIMILAR_PRODUCTS_K)
+_lexical_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bm25")
+
+class StageTimer:
+    """Accumulates wall-clock milliseconds per pipeline stage into a dict (no-op when None)"""
+
+    def __init__(self, timings=None):
+        self.timings = timings
+
+    @contextmanager
+    def stage(self, name):
+        if self.timings is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.timings[name] = round(self.timings.get(name, 0.0) + elapsed, 3)
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with hit/miss/eviction counters"""
+
+    def __init__(self, maxsize):
+        self.maxsize = max(0, int(maxsize))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+# Normalised description -> extracted_attrs, and search_query -> embedding vector
+_extraction_cache = LRUCache(EXTRACTION_CACHE_SIZE)
+_embedding_cache = LRUCache(EMBEDDING_CACHE_SIZE)
+
+def get_cache_stats():
+    """Hit/miss/eviction counters of the extraction and embedding caches"""
+    return {
+        "extraction": _extraction_cache.stats(),
+        "embedding": _embedding_cache.stats(),
+    }
 
 def get_embeddings():
     """Get or initialize embeddings model"""
     global _embeddings
     if _embeddings is None:
         try:
-            print("[INFO] Loading HuggingFace embeddings model...")
-            _embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-                model_kwargs={'device': 'cpu'},
-                encode_kwargs={'normalize_embeddings': True}
-            )
-            print("[SUCCESS] HuggingFace Embeddings Model loaded.")
+            if EMBEDDINGS_BACKEND == "onnx":
+                logger.info(f"Loading ONNX Runtime embeddings model from {ONNX_MODEL_DIR}...")
+                _embeddings = OnnxMiniLMEmbeddings(ONNX_MODEL_DIR)
+                logger.info("ONNX Runtime Embeddings Model loaded.")
+            else:
+                logger.info("Loading HuggingFace embeddings model...")
+                _embeddings = HuggingFaceEmbeddings(
+                    model_name="sentence-transformers/all-MiniLM-L6-v2",
+                    model_kwargs={'device': 'cpu'},
+                    encode_kwargs={'normalize_embeddings': True}
+                )
+                logger.info("HuggingFace Embeddings Model loaded.")
         except Exception as e:
-            print(f"[ERROR] Error loading embeddings: {e}")
+            logger.error(f"Error loading embeddings: {e}")
             raise
     return _embeddings
 
@@ -37,107 +202,655 @@ def get_extractor():
     """Get or initialize fashion attribute extractor"""
     global _extractor
     if _extractor is None:
-        print("[INFO] Initializing Fashion Attribute Extractor...")
-        _extractor = FashionAttributeExtractor()
-        print("[SUCCESS] Fashion Attribute Extractor initialized.")
+        logger.info(f"Initializing Fashion Attribute Extractor ({EXTRACTOR_MODE} mode)...")
+        if EXTRACTOR_MODE == "fast":
+            _extractor = KeywordAttributeExtractor()
+        else:
+            _extractor = FashionAttributeExtractor()
+        logger.info("Fashion Attribute Extractor initialized.")
     return _extractor
 
-def initialize_vectorstore_from_csv(csv_path):
-    """Initialize vector store from outfit CSV file"""
-    global _vectorstore
+# Columns every catalog source (CSV, product sync) must provide
+CATALOG_COLUMNS = [
+    "product_id", "name", "gender", "category", "occasions", "seasons", "places",
+    "styles", "fabric", "colors", "suitable_body_types", "suitable_skin_tones",
+    "origin", "weaver_name", "rating", "price", "semantic_text",
+]
+_STRING_METADATA = [
+    "product_id", "name", "gender", "category", "occasions", "seasons", "places",
+    "styles", "fabric", "colors", "suitable_body_types", "suitable_skin_tones",
+    "origin", "weaver_name", "semantic_text",
+]
+
+def _chunk_to_documents(chunk):
+    """
+    Build document text and metadata for a block of catalog rows, column-wise.
+
+    Returns:
+        tuple: (ids, contents, metadatas) lists aligned by row
+    """
+    col = {name: chunk[name].astype(str) for name in CATALOG_COLUMNS}
+    # One spelling per gender, so Chroma's case-sensitive `where` matches every source
+    col['gender'] = col['gender'].str.strip().str.title()
+
+    # Create rich content for better matching using the semantic_text field
+    # and other attributes
+    contents = (
+        col['semantic_text']
+        + "\nProduct: " + col['name'] + " (" + col['category'] + ")"
+        + "\nGender: " + col['gender']
+        + "\nOccasions: " + col['occasions']
+        + "\nSeasons: " + col['seasons']
+        + "\nPlaces: " + col['places']
+        + "\nStyles: " + col['styles']
+        + "\nFabric: " + col['fabric']
+        + "\nColors: " + col['colors']
+        + "\nSuitable for body types: " + col['suitable_body_types']
+        + "\nSuitable for skin tones: " + col['suitable_skin_tones']
+        + "\nOrigin: " + col['origin']
+        + "\nRating: " + col['rating'] + "/5"
+        + "\nPrice: ₹" + col['price']
+    ).tolist()
+
+    columns = {name: col[name].tolist() for name in _STRING_METADATA}
+    columns["rating"] = chunk['rating'].astype(float).tolist()
+    columns["price"] = chunk['price'].astype(int).tolist()
+    metadatas = [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    return columns["product_id"], contents, metadatas
+
+def _lexical_text(content, metadata):
+    """Text indexed by BM25 (document content plus the weaver name)"""
+    return f"{content}\nWeaver: {metadata['weaver_name']}"
 
+def _document_hash(content, metadata):
+    """Content hash of a catalog document (text + metadata)"""
+    payload = json.dumps(
+        {"content": content, "metadata": metadata},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def load_catalog_manifest(path):
+    """Load the product_id -> content hash manifest of the persisted index"""
     try:
-        embeddings = get_embeddings()
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {"version": MANIFEST_VERSION, "rows": {}}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable catalog manifest at {path}: {e}")
+        return {"version": MANIFEST_VERSION, "rows": {}}
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        logger.warning("Catalog manifest version mismatch, rebuilding index")
+        return {"version": MANIFEST_VERSION, "rows": {}}
+    return manifest
+
+def save_catalog_manifest(manifest, path):
+    """Atomically write the catalog manifest next to the persisted index"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _compute_catalog_version(hashes):
+    payload = json.dumps(hashes, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def get_catalog_version():
+    """Version tag of the indexed catalog (None until the index is loaded)"""
+    return _catalog_version
+
+def get_catalog_sync_report():
+    """Stats from the last catalog sync (added/changed/removed/embedded rows)"""
+    return dict(_catalog_sync_report)
+
+def _create_vectorstore(embeddings):
+    """Instantiate the vector backend selected by RECOMMENDER_VECTOR_BACKEND"""
+    options = {}
+    if VECTOR_BACKEND in ("exact", "mmap"):
+        options = {"dtype": VECTOR_DTYPE, "rerank_factor": RERANK_FACTOR}
+    elif VECTOR_BACKEND == "hnsw":
+        options = {
+            "M": HNSW_M,
+            "ef_construction": HNSW_EF_CONSTRUCTION,
+            "ef_search": HNSW_EF_SEARCH,
+        }
+    return create_backend(VECTOR_BACKEND, INDEX_DIR, embedding_function=embeddings, **options)
 
+@contextmanager
+def _catalog_sync_lock(path=CATALOG_SYNC_LOCK_PATH):
+    """
+    Exclusive lock held while the catalog index is written.
+
+    With several uvicorn workers the first one embeds and writes the index;
+    the others block here and then find the manifest up to date. Also
+    serialises writers (CSV sync, MongoDB sync) within one process.
+    """
+    with _index_write_lock:
         try:
-            df = pd.read_csv(csv_path)
-            print(f"[INFO] CSV loaded with {len(df)} outfits")
-        except FileNotFoundError:
-            print(f"[ERROR] CSV file not found at {csv_path}")
-            return None
+            import fcntl
+        except ImportError:
+            # Windows: no flock; single-worker deployments do not need it
+            yield
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def _sync_neighbor_graph(vectorstore, indexed):
+    """Update the "more like this" graph for changed rows and persist it next to the index"""
+    if SIMILAR_PRODUCTS_K <= 0:
+        return None
+    graph_path = os.path.join(vectorstore.persist_dir, GRAPH_FILE)
+    if not len(_neighbor_graph):
+        _neighbor_graph.load(graph_path)
+    started = time.perf_counter()
+    graph_stats = _neighbor_graph.sync(vectorstore, indexed)
+    if graph_stats["searched"] or graph_stats["removed"] or not os.path.exists(graph_path):
+        _neighbor_graph.save(graph_path)
+    graph_stats["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(
+        f"Neighbour graph: {graph_stats['searched']} rows searched, {graph_stats['removed']} removed, "
+        f"{graph_stats['reverse_updates']} reverse updates ({graph_stats['seconds']} s)"
+    )
+    return graph_stats
+
+def _embed_in_batches(embeddings, texts):
+    vectors = []
+    for offset in range(0, len(texts), INGEST_EMBED_BATCH):
+        vectors.extend(embeddings.embed_documents(texts[offset:offset + INGEST_EMBED_BATCH]))
+    return vectors
 
-        df = df.fillna('')
+def _index_rows(vectorstore, embeddings, ids, contents, metadatas, indexed):
+    """
+    Embed and upsert the rows whose content hash changed; add them (and
+    rows the indexes do not hold yet) to the attribute and lexical indexes.
+
+    Returns:
+        tuple: (distinct row count, embedded product ids, ids not indexed before)
+    """
+    # product_id is the document id in the collection; later rows win
+    rows = {}
+    for pid, content, metadata in zip(ids, contents, metadatas):
+        rows[pid] = (content, metadata, _document_hash(content, metadata))
+
+    to_embed = [pid for pid, (_, _, digest) in rows.items() if indexed.get(pid) != digest]
+    if to_embed:
+        texts = [rows[pid][0] for pid in to_embed]
+        vectorstore.upsert(
+            ids=to_embed,
+            embeddings=_embed_in_batches(embeddings, texts),
+            metadatas=[rows[pid][1] for pid in to_embed],
+            documents=texts
+        )
+
+    added = [pid for pid in to_embed if pid not in indexed]
+    for pid in to_embed:
+        indexed[pid] = rows[pid][2]
+
+    # Unchanged rows that are already indexed leave the indexes (and their next build) alone
+    changed = set(to_embed)
+    reindex = [pid for pid in rows if pid in changed or pid not in _attribute_index]
+    if reindex:
+        _attribute_index.upsert(reindex, [rows[pid][1] for pid in reindex])
+        _lexical_index.upsert(reindex, [_lexical_text(rows[pid][0], rows[pid][1]) for pid in reindex])
+    return rows, to_embed, added
+
+def _build_indexes():
+    """Publish fresh attribute and BM25 snapshots, so no request pays for a build"""
+    started = time.perf_counter()
+    _attribute_index.build()
+    _lexical_index.build()
+    logger.info(f"Attribute and lexical indexes built ({time.perf_counter() - started:.2f} s)")
+
+def initialize_vectorstore_from_csv(csv_path, chunk_rows=None, progress=None):
+    """
+    Open the persisted vector store and sync it with the outfit CSV file.
+
+    The CSV is streamed in blocks of chunk_rows rows, so ingestion memory stays
+    flat regardless of file size. Only rows whose content hash differs from the
+    catalog manifest are embedded (in batches) and upserted; rows missing from
+    the CSV are deleted at the end. The manifest is checkpointed as blocks are
+    committed, so an interrupted ingestion resumes where it stopped.
+
+    Args:
+        csv_path (str): Catalog CSV
+        chunk_rows (int): Rows per block (defaults to RECOMMENDER_INGEST_CHUNK_ROWS)
+        progress (callable): Optional callback receiving a stats dict after each block
+    """
+    global _vectorstore, _catalog_sync_report, _catalog_version, _catalog_hashes, _external_ids
 
-        if df.empty:
-            print(f"[WARNING] No outfits found in {csv_path}")
+    chunk_rows = chunk_rows or INGEST_CHUNK_ROWS
+    try:
+        embeddings = get_embeddings()
+
+        if not os.path.exists(csv_path):
+            logger.error(f"CSV file not found at {csv_path}")
             return None
-        
-        print(f"[INFO] Loading {len(df)} outfits from {csv_path} into vector store...")
-
-        docs = []
-        for i, outfit in df.iterrows():
-            # Create rich content for better matching using the semantic_text field
-            # and other attributes
-            content = (
-                f"{outfit['semantic_text']}\n"
-                f"Product: {outfit['name']} ({outfit['category']})\n"
-                f"Gender: {outfit['gender']}\n"
-                f"Occasions: {outfit['occasions']}\n"
-                f"Seasons: {outfit['seasons']}\n"
-                f"Places: {outfit['places']}\n"
-                f"Styles: {outfit['styles']}\n"
-                f"Fabric: {outfit['fabric']}\n"
-                f"Colors: {outfit['colors']}\n"
-                f"Suitable for body types: {outfit['suitable_body_types']}\n"
-                f"Suitable for skin tones: {outfit['suitable_skin_tones']}\n"
-                f"Origin: {outfit['origin']}\n"
-                f"Rating: {outfit['rating']}/5\n"
-                f"Price: ₹{outfit['price']}"
-            )
 
-            doc = Document(
-                page_content=content,
-                metadata={
-                    "product_id": str(outfit['product_id']),
-                    "name": str(outfit['name']),
-                    "gender": str(outfit['gender']),
-                    "category": str(outfit['category']),
-                    "occasions": str(outfit['occasions']),
-                    "seasons": str(outfit['seasons']),
-                    "places": str(outfit['places']),
-                    "styles": str(outfit['styles']),
-                    "fabric": str(outfit['fabric']),
-                    "colors": str(outfit['colors']),
-                    "suitable_body_types": str(outfit['suitable_body_types']),
-                    "suitable_skin_tones": str(outfit['suitable_skin_tones']),
-                    "origin": str(outfit['origin']),
-                    "weaver_name": str(outfit['weaver_name']),
-                    "rating": float(outfit['rating']),
-                    "price": int(outfit['price']),
-                    "semantic_text": str(outfit['semantic_text'])
-                }
+        with _catalog_sync_lock():
+            # Persist vector store to disk for faster startup on subsequent runs.
+            # Built in a local and published only once fully synced and indexed,
+            # so concurrent requests never search a half-ingested store
+            vectorstore = _create_vectorstore(embeddings)
+            logger.info(f"Opened '{vectorstore.name}' vector store at {vectorstore.persist_dir}")
+
+            manifest = load_catalog_manifest(vectorstore.manifest_path)
+            indexed = manifest["rows"]
+            external = set(manifest.get("external", []))
+            stored_ids = set(vectorstore.ids())
+
+            if not indexed and stored_ids:
+                # Collection was written before the manifest existed (random ids,
+                # one full copy of the catalog per restart) - start from scratch
+                logger.warning(f"Dropping {len(stored_ids)} unmanaged vectors from legacy index")
+                vectorstore.reset()
+                stored_ids = set()
+
+            # Trust the manifest only for rows that actually made it into the store
+            indexed = {pid: h for pid, h in indexed.items() if pid in stored_ids}
+            external &= set(indexed)
+            _attribute_index.rebuild([], [])
+            _lexical_index.rebuild([], [])
+
+            seen = set()
+            stats = {"rows": 0, "added": 0, "changed": 0, "removed": 0, "embedded": 0}
+            started = time.perf_counter()
+
+            def checkpoint():
+                vectorstore.persist()
+                _save_manifest(vectorstore, indexed, external)
+
+            reader = pd.read_csv(csv_path, chunksize=chunk_rows)
+            for block_no, chunk in enumerate(reader, start=1):
+                chunk = chunk.fillna('')
+                ids, contents, metadatas = _chunk_to_documents(chunk)
+
+                rows, to_embed, added = _index_rows(vectorstore, embeddings, ids, contents, metadatas, indexed)
+                stats["added"] += len(added)
+                stats["changed"] += len(to_embed) - len(added)
+                seen.update(rows)
+                stats["rows"] = len(seen)
+                stats["embedded"] += len(to_embed)
+
+                if block_no % INGEST_CHECKPOINT_BLOCKS == 0:
+                    checkpoint()
+
+                elapsed = time.perf_counter() - started
+                stats["rows_per_sec"] = round(stats["rows"] / elapsed, 1) if elapsed else 0.0
+                logger.info(
+                    f"Ingested block {block_no}: {stats['rows']} rows, {stats['embedded']} embedded "
+                    f"({stats['rows_per_sec']} rows/sec)"
+                )
+                if progress is not None:
+                    progress(dict(stats, block=block_no))
+
+            if not seen:
+                logger.warning(f"No outfits found in {csv_path}")
+                return None
+
+            # Rows added by other sources (MongoDB sync) are not the CSV's to delete
+            removed = [pid for pid in stored_ids if pid not in seen and pid not in external]
+            if removed:
+                vectorstore.delete(removed)
+                for pid in removed:
+                    indexed.pop(pid, None)
+            stats["removed"] = len(removed)
+
+            checkpoint()
+
+            # Rows synced from other sources are not in the CSV; index them from the store
+            extra = [pid for pid in indexed if pid not in seen]
+            if extra:
+                found, extra_metadatas, documents = vectorstore.get_records(extra)
+                _attribute_index.upsert(found, extra_metadatas)
+                _lexical_index.upsert(
+                    found,
+                    [_lexical_text(document, metadata) for document, metadata in zip(documents, extra_metadatas)]
+                )
+            index_started = time.perf_counter()
+            _build_indexes()
+            stats["index_seconds"] = round(time.perf_counter() - index_started, 3)
+
+            _catalog_hashes = indexed
+            _external_ids = external
+            _catalog_version = _compute_catalog_version(indexed)
+            stats["neighbor_graph"] = _sync_neighbor_graph(vectorstore, indexed)
+
+            stats["unchanged"] = stats["rows"] - stats["embedded"]
+            stats["seconds"] = round(time.perf_counter() - started, 3)
+            _catalog_sync_report = stats
+            logger.info(
+                f"Vector store ready: {stats['embedded']} embedded "
+                f"({stats['added']} added, {stats['changed']} changed), "
+                f"{stats['removed']} removed, {stats['unchanged']} unchanged."
             )
-            docs.append(doc)
-
-        print("[INFO] Creating Chroma vector store...")
-        # Persist vector store to disk for faster startup on subsequent runs
-        persist_dir = os.path.join(SCRIPT_DIR, "chroma_db")
-        _vectorstore = Chroma.from_documents(
-            documents=docs,
-            embedding=embeddings,
-            persist_directory=persist_dir
-        )
-        print("[SUCCESS] Vector store created successfully.")
-        return _vectorstore
+            _vectorstore = vectorstore
+            return vectorstore
 
     except KeyError as e:
-        print(f"[ERROR] Missing column in CSV file: {e}")
-        print("Ensure your CSV has the required columns")
+        logger.error(f"Missing column in CSV file: {e}. Ensure your CSV has the required columns")
         return None
     except Exception as e:
-        print(f"[ERROR] Error creating vector store: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error creating vector store: {e}")
         raise
 
+def _save_manifest(vectorstore, indexed, external):
+    save_catalog_manifest(
+        {"version": MANIFEST_VERSION, "rows": indexed, "external": sorted(external)},
+        vectorstore.manifest_path
+    )
+
+def upsert_catalog_rows(rows):
+    """
+    Index catalog rows that do not come from the CSV (e.g. MongoDB products).
+
+    Only rows whose content hash changed are embedded; a batch without
+    changes touches nothing else. Otherwise the vector store, attribute and
+    lexical indexes, neighbour graph and catalog version (hence response
+    caches) are updated before returning, and the vector store and manifest
+    are persisted within UPSERT_PERSIST_INTERVAL seconds.
+
+    Args:
+        rows (list[dict]): Rows keyed by CATALOG_COLUMNS
+
+    Returns:
+        dict: rows, embedded and the resulting catalog_version
+    """
+    global _catalog_version
+    vectorstore = get_vectorstore()
+    if vectorstore is None:
+        raise RuntimeError("Vector store not initialized or CSV file not found/empty")
+    if not rows:
+        return {"rows": 0, "embedded": 0, "catalog_version": _catalog_version}
+
+    chunk = pd.DataFrame(rows, columns=CATALOG_COLUMNS).fillna('')
+    ids, contents, metadatas = _chunk_to_documents(chunk)
+    with _catalog_sync_lock():
+        indexed_rows, to_embed, _ = _index_rows(vectorstore, get_embeddings(), ids, contents, metadatas, _catalog_hashes)
+        new_external = set(indexed_rows) - _external_ids
+        _external_ids.update(indexed_rows)
+        if to_embed:
+            # Built here on the writer thread; queries keep the previous snapshots until the swap
+            _build_indexes()
+            _catalog_version = _compute_catalog_version(_catalog_hashes)
+            _sync_neighbor_graph(vectorstore, _catalog_hashes)
+        if to_embed or new_external:
+            _schedule_persist()
+
+    logger.info(f"Upserted {len(indexed_rows)} external rows ({len(to_embed)} embedded)")
+    return {"rows": len(indexed_rows), "embedded": len(to_embed), "catalog_version": _catalog_version}
+
+def delete_catalog_rows(ids):
+    """
+    Remove rows previously added with upsert_catalog_rows.
+
+    CSV rows are left alone (the CSV ingestion owns them); unknown ids are
+    ignored. The vector store, attribute and lexical indexes, neighbour graph
+    and catalog version are updated before returning, persistence follows
+    the same schedule as upserts.
+
+    Args:
+        ids (list[str]): Product ids
+
+    Returns:
+        dict: rows removed and the resulting catalog_version
+    """
+    global _catalog_version
+    vectorstore = get_vectorstore()
+    if vectorstore is None:
+        raise RuntimeError("Vector store not initialized or CSV file not found/empty")
+
+    with _catalog_sync_lock():
+        removed = [pid for pid in dict.fromkeys(str(pid) for pid in ids) if pid in _external_ids]
+        if removed:
+            vectorstore.delete(removed)
+            _attribute_index.delete(removed)
+            _lexical_index.delete(removed)
+            for pid in removed:
+                _catalog_hashes.pop(pid, None)
+                _external_ids.discard(pid)
+            _build_indexes()
+            _catalog_version = _compute_catalog_version(_catalog_hashes)
+            _sync_neighbor_graph(vectorstore, _catalog_hashes)
+            _schedule_persist()
+
+    logger.info(f"Deleted {len(removed)} external rows")
+    return {"rows": len(removed), "catalog_version": _catalog_version}
+
+def get_external_ids():
+    """Product ids indexed through upsert_catalog_rows rather than the CSV"""
+    return set(_external_ids)
+
+def _schedule_persist():
+    """Persist upserted rows now, or once per UPSERT_PERSIST_INTERVAL (caller holds the sync lock)"""
+    global _persist_timer
+    if UPSERT_PERSIST_INTERVAL <= 0:
+        _persist_catalog()
+    elif _persist_timer is None:
+        _persist_timer = threading.Timer(UPSERT_PERSIST_INTERVAL, flush_catalog)
+        _persist_timer.daemon = True
+        _persist_timer.start()
+
+def _persist_catalog():
+    global _persist_timer
+    _persist_timer = None
+    _vectorstore.persist()
+    _save_manifest(_vectorstore, _catalog_hashes, _external_ids)
+
+def flush_catalog():
+    """Persist catalog upserts that are still pending (called on a timer and at shutdown)"""
+    with _catalog_sync_lock():
+        if _persist_timer is not None:
+            _persist_timer.cancel()
+            _persist_catalog()
+
+def get_attribute_index():
+    """Attribute index over the catalog currently loaded in the vector store"""
+    return _attribute_index
+
 def get_vectorstore():
-    """Get or initialize vector store"""
-    global _vectorstore
+    """Get or initialize vector store (concurrent first callers share one ingestion)"""
     if _vectorstore is None:
-        _vectorstore = initialize_vectorstore_from_csv(DEFAULT_CSV_PATH)
+        with _vectorstore_init_lock:
+            if _vectorstore is None:
+                initialize_vectorstore_from_csv(DEFAULT_CSV_PATH)
     return _vectorstore
 
-def get_outfit_recommendations(user_description, top_n=10, gender_filter=None):
+def _normalize_description(text):
+    """Cache key for attribute extraction (matching is case-insensitive)"""
+    return " ".join(text.split()).lower()
+
+def _copy_attrs(extracted_attrs):
+    return {key: list(values) for key, values in extracted_attrs.items()}
+
+def _extract_attributes(extractor, user_descriptions):
+    """Extract attributes for descriptions, parsing only cache misses"""
+    keys = [_normalize_description(text) for text in user_descriptions]
+    results = [_extraction_cache.get(key) for key in keys]
+
+    # Parse each distinct missing description once
+    missing = list(OrderedDict.fromkeys(key for key, attrs in zip(keys, results) if attrs is None))
+    if missing:
+        parsed = dict(zip(missing, extractor.extract_batch(missing)))
+        for key, attrs in parsed.items():
+            _extraction_cache.put(key, attrs)
+        results = [attrs if attrs is not None else parsed[key] for key, attrs in zip(keys, results)]
+
+    return [_copy_attrs(attrs) for attrs in results]
+
+def _embed_queries(search_queries):
+    """Embed search queries, running the model only on cache misses"""
+    vectors = [_embedding_cache.get(query) for query in search_queries]
+
+    missing = list(OrderedDict.fromkeys(q for q, vec in zip(search_queries, vectors) if vec is None))
+    if missing:
+        embeddings = get_embeddings()
+        if len(missing) == 1:
+            computed = {missing[0]: embeddings.embed_query(missing[0])}
+        else:
+            computed = dict(zip(missing, embeddings.embed_documents(missing)))
+        for query, vec in computed.items():
+            _embedding_cache.put(query, vec)
+        vectors = [vec if vec is not None else computed[q] for q, vec in zip(search_queries, vectors)]
+
+    return vectors
+
+def normalise_gender(gender_filter):
+    """Canonical spelling of a gender filter ('female ' -> 'Female'), None when empty"""
+    gender = str(gender_filter or "").strip()
+    return gender.title() if gender else None
+
+def _build_metadata_filter(gender_filter=None):
+    """
+    Build the backend filter so gender filtering happens inside the k-NN search.
+
+    Args:
+        gender_filter (str): Keep this gender plus 'Unisex' (any case)
+
+    Returns:
+        dict: metadata field -> list of accepted values, or None
+    """
+    gender = normalise_gender(gender_filter)
+    if not gender:
+        return None
+    return {"gender": [gender, "Unisex"]}
+
+def _build_search_query(user_description, extracted_attrs):
+    """Build search query from extracted attributes and original description"""
+    query_parts = [user_description]  # Start with original description
+    
+    # Add extracted attributes to enhance the query
+    if extracted_attrs['suitable_body_types']:
+        query_parts.append(f"Body type: {', '.join(extracted_attrs['suitable_body_types'])}")
+    
+    if extracted_attrs['suitable_skin_tones']:
+        query_parts.append(f"Skin tone: {', '.join(extracted_attrs['suitable_skin_tones'])}")
+    
+    if extracted_attrs['occasions']:
+        query_parts.append(f"Occasions: {', '.join(extracted_attrs['occasions'])}")
+    
+    if extracted_attrs['seasons']:
+        query_parts.append(f"Seasons: {', '.join(extracted_attrs['seasons'])}")
+    
+    if extracted_attrs['places']:
+        query_parts.append(f"Places: {', '.join(extracted_attrs['places'])}")
+    
+    if extracted_attrs['styles']:
+        query_parts.append(f"Styles: {', '.join(extracted_attrs['styles'])}")
+    
+    if extracted_attrs['fabric']:
+        query_parts.append(f"Fabrics: {', '.join(extracted_attrs['fabric'])}")
+    
+    if extracted_attrs['colors']:
+        query_parts.append(f"Colors: {', '.join(extracted_attrs['colors'])}")
+
+    return "\n".join(query_parts)
+
+def _similarity_percentage(score):
+    """Convert L2 distance to similarity percentage"""
+    # Backends report squared L2 distance (Chroma's default), where smaller = more similar
+    if score < 0.5:
+        return 100
+    elif score < 1.0:
+        return 100 - (score * 50)  # 0.5 -> 75%, 1.0 -> 50%
+    else:
+        return max(0, 50 - ((score - 1.0) * 25))  # 1.5 -> 37.5%, 2.0 -> 25%
+
+def _resolve_filters(vectorstore, gender_filter, filters):
+    """
+    Turn the gender and hard filters into what the searches need.
+
+    The gender filter is merged into the attribute-index filters, so the
+    NumPy backends and BM25 get one precomputed row mask. Chroma evaluates
+    `where` inside its own engine, so gender stays there for the vector side.
+    Both match case-insensitively: the filter is normalised here and stored
+    genders at ingestion, and the attribute index compares lowercased.
+
+    Returns:
+        tuple: (where, vector candidate ids, lexical candidate ids)
+    """
+    where = _build_metadata_filter(gender_filter)
+    combined = dict(filters or {}, **where) if where else filters
+    lexical_ids = _attribute_index.candidates(combined)
+    if vectorstore.native_where:
+        return where, _attribute_index.candidates(filters), lexical_ids
+    return None, lexical_ids, lexical_ids
+
+def _submit_lexical_search(search_query, top_n, candidate_ids):
+    if not HYBRID_SEARCH:
+        return None
+    return _lexical_executor.submit(_lexical_index.search, search_query, top_n, candidate_ids)
+
+def _fuse_matches(vectorstore, query_embedding, vector_matches, lexical_hits, top_n):
+    """
+    Merge vector and BM25 rankings with reciprocal-rank fusion.
+
+    Returns:
+        list: (metadata, distance, fusion_score, lexical_score), best first
+    """
+    by_id = {metadata['product_id']: (metadata, distance) for metadata, distance in vector_matches}
+    fused = reciprocal_rank_fusion(
+        [list(by_id), [pid for pid, _ in lexical_hits]],
+        k=RRF_K
+    )[:top_n]
+
+    # Lexical-only hits still get a semantic distance from their stored vectors
+    missing = [pid for pid, _ in fused if pid not in by_id]
+    if missing:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        found, vectors = vectorstore.get_vectors(missing)
+        if len(found):
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            # Metadata comes from the vector store (shared pages for the mmap backend)
+            metadatas = dict(zip(*vectorstore.get_records(found)[:2]))
+            for pid, cosine in zip(found, vectors @ query):
+                by_id[pid] = (metadatas[pid], max(0.0, 2.0 - 2.0 * float(cosine)))
+
+    lexical_scores = dict(lexical_hits)
+    return [
+        (by_id[pid][0], by_id[pid][1], score, lexical_scores.get(pid, 0.0))
+        for pid, score in fused
+        if pid in by_id
+    ]
+
+def _build_recommendations(matches, extracted_attrs):
+    """
+    Turn search matches into scored recommendations.
+
+    Plain vector matches are (metadata, distance) and are sorted by matching
+    percentage; fused matches also carry (fusion_score, lexical_score) and
+    keep their fused order.
+    """
+    recommendations = []
+    fused = False
+    for match in matches:
+        metadata, score = match[0], match[1]
+        outfit_dict = metadata.copy()
+        outfit_dict['matching_percentage'] = round(_similarity_percentage(score), 2)
+        outfit_dict['raw_distance'] = round(float(score), 4)
+        if len(match) == 4:
+            fused = True
+            outfit_dict['fusion_score'] = round(match[2], 6)
+            outfit_dict['lexical_score'] = round(match[3], 4)
+        outfit_dict['extracted_attributes'] = extracted_attrs
+        recommendations.append(outfit_dict)
+
+    if not fused:
+        # Sort by matching percentage (highest first)
+        recommendations.sort(key=lambda x: x['matching_percentage'], reverse=True)
+    return recommendations
+
+def get_outfit_recommendations(user_description, top_n=10, gender_filter=None, filters=None, timings=None):
     """
     Get outfit recommendations based on user description using semantic search
     
@@ -145,10 +858,16 @@ def get_outfit_recommendations(user_description, top_n=10, gender_filter=None):
         user_description (str): Natural language description of what the user wants
         top_n (int): Number of recommendations to return
         gender_filter (str): Optional filter for gender ('Male', 'Female', 'Unisex', or None for all)
+        filters (dict): Optional hard filters resolved by the attribute index, e.g.
+            {"occasions": ["wedding"], "seasons": "summer",
+             "price": {"max": 3000}, "rating": {"min": 4.5}}
+        timings (dict): Optional; when given it is filled with per-stage
+            milliseconds (extraction, query_build, embedding, search, filtering, scoring)
     
     Returns:
         list: List of outfit recommendations with matching scores
     """
+    timer = StageTimer(timings)
     try:
         vectorstore = get_vectorstore()
         extractor = get_extractor()
@@ -157,102 +876,271 @@ def get_outfit_recommendations(user_description, top_n=10, gender_filter=None):
             return {"error": "Vector store not initialized or CSV file not found/empty"}
 
         # Extract attributes from user description
-        print(f"\n{'='*60}")
-        print(f"[INFO] Extracting attributes from user description...")
-        print(f"{'='*60}")
-        extracted_attrs = extractor.extract(user_description)
-        print(json.dumps(extracted_attrs, indent=2))
-        print(f"{'='*60}\n")
-
-        # Build search query from extracted attributes and original description
-        query_parts = [user_description]  # Start with original description
-        
-        # Add extracted attributes to enhance the query
-        if extracted_attrs['suitable_body_types']:
-            query_parts.append(f"Body type: {', '.join(extracted_attrs['suitable_body_types'])}")
-        
-        if extracted_attrs['suitable_skin_tones']:
-            query_parts.append(f"Skin tone: {', '.join(extracted_attrs['suitable_skin_tones'])}")
-        
-        if extracted_attrs['occasions']:
-            query_parts.append(f"Occasions: {', '.join(extracted_attrs['occasions'])}")
-        
-        if extracted_attrs['seasons']:
-            query_parts.append(f"Seasons: {', '.join(extracted_attrs['seasons'])}")
-        
-        if extracted_attrs['places']:
-            query_parts.append(f"Places: {', '.join(extracted_attrs['places'])}")
-        
-        if extracted_attrs['styles']:
-            query_parts.append(f"Styles: {', '.join(extracted_attrs['styles'])}")
-        
-        if extracted_attrs['fabric']:
-            query_parts.append(f"Fabrics: {', '.join(extracted_attrs['fabric'])}")
-        
-        if extracted_attrs['colors']:
-            query_parts.append(f"Colors: {', '.join(extracted_attrs['colors'])}")
+        with timer.stage("extraction"):
+            extracted_attrs = _extract_attributes(extractor, [user_description])[0]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Extracted attributes:\n%s", json.dumps(extracted_attrs, indent=2))
 
-        search_query = "\n".join(query_parts)
-        
-        print(f"[DEBUG] Search Query:")
-        print(f"{'='*60}")
-        print(search_query)
-        print(f"{'='*60}\n")
-
-        # Perform similarity search
-        print(f"[INFO] Searching for top {top_n} matches...")
-        matched_docs_and_scores = vectorstore.similarity_search_with_score(search_query, k=top_n * 2)  # Get more to filter
-        
-        print(f"[SUCCESS] Found {len(matched_docs_and_scores)} matches")
-        
-        # Debug: Print raw scores
-        print(f"\n[DEBUG] Raw similarity scores:")
-        for idx, (doc, score) in enumerate(matched_docs_and_scores[:5]):
-            print(f"  Match {idx+1}: {doc.metadata.get('name', 'Unknown')} - Score: {score:.4f}")
-
-        recommendations = []
-        for doc, score in matched_docs_and_scores:
-            outfit_dict = doc.metadata.copy()
-
-            # Apply gender filter if specified
-            if gender_filter and outfit_dict['gender'] not in [gender_filter, 'Unisex']:
-                continue
-
-            # Convert L2 distance to similarity percentage
-            # Chroma uses L2 distance by default, where smaller = more similar
-            if score < 0.5:
-                similarity_percentage = 100
-            elif score < 1.0:
-                similarity_percentage = 100 - (score * 50)  # 0.5 -> 75%, 1.0 -> 50%
-            else:
-                similarity_percentage = max(0, 50 - ((score - 1.0) * 25))  # 1.5 -> 37.5%, 2.0 -> 25%
+        with timer.stage("query_build"):
+            search_query = _build_search_query(user_description, extracted_attrs)
+        logger.debug("Search query:\n%s", search_query)
 
-            outfit_dict['matching_percentage'] = round(similarity_percentage, 2)
-            outfit_dict['raw_distance'] = round(float(score), 4)
-            outfit_dict['extracted_attributes'] = extracted_attrs
+        with timer.stage("filtering"):
+            where, candidate_ids, lexical_ids = _resolve_filters(vectorstore, gender_filter, filters)
 
-            recommendations.append(outfit_dict)
-            
-            # Stop when we have enough recommendations after filtering
-            if len(recommendations) >= top_n:
-                break
+        # Perform similarity search; BM25 runs in parallel while the query is embedded
+        lexical_future = _submit_lexical_search(search_query, top_n, lexical_ids)
+        with timer.stage("embedding"):
+            query_embedding = _embed_queries([search_query])[0]
 
-        # Sort by matching percentage (highest first)
-        recommendations.sort(key=lambda x: x['matching_percentage'], reverse=True)
+        with timer.stage("search"):
+            matches = vectorstore.search([query_embedding], k=top_n, where=where, ids=candidate_ids)[0]
+        logger.debug("Found %d vector matches for top %d", len(matches), top_n)
 
-        print(f"\n[DEBUG] Top 5 recommendations:")
-        for idx, rec in enumerate(recommendations[:5]):
-            print(f"  {idx+1}. {rec.get('name')} ({rec.get('category')}) - {rec['matching_percentage']}%")
-            print(f"      Styles: {rec.get('styles')}, Colors: {rec.get('colors')}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for idx, (metadata, score) in enumerate(matches[:5]):
+                logger.debug("  Match %d: %s - Score: %.4f", idx + 1, metadata.get('name', 'Unknown'), score)
+
+        with timer.stage("scoring"):
+            if lexical_future is not None:
+                matches = _fuse_matches(vectorstore, query_embedding, matches, lexical_future.result(), top_n)
+            recommendations = _build_recommendations(matches, extracted_attrs)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for idx, rec in enumerate(recommendations[:5]):
+                logger.debug(
+                    "  %d. %s (%s) - %s%% | Styles: %s, Colors: %s",
+                    idx + 1, rec.get('name'), rec.get('category'), rec['matching_percentage'],
+                    rec.get('styles'), rec.get('colors')
+                )
 
         return recommendations
 
     except Exception as e:
-        print(f"[ERROR] Error in recommendation logic: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Error in recommendation logic: {e}")
+        return {"error": str(e)}
+
+def get_outfit_recommendations_batch(user_descriptions, top_n=10, gender_filter=None, filters=None):
+    """
+    Get outfit recommendations for many descriptions at once.
+
+    Attribute extraction runs through a single nlp.pipe pass, all search
+    queries are embedded in one batched call and the vector store is queried
+    once for the whole batch.
+
+    Args:
+        user_descriptions (list[str]): Natural language descriptions
+        top_n (int): Number of recommendations to return per description
+        gender_filter (str | list): One gender filter for the whole batch, or
+            one entry (possibly None) per description
+        filters (dict): Optional attribute-index filters for the whole batch
+
+    Returns:
+        list: One recommendation list per description, in input order
+    """
+    try:
+        user_descriptions = list(user_descriptions)
+        if isinstance(gender_filter, (list, tuple)):
+            if len(gender_filter) != len(user_descriptions):
+                return {"error": "gender_filter must have one entry per description"}
+            gender_filters = list(gender_filter)
+        else:
+            gender_filters = [gender_filter] * len(user_descriptions)
+
+        if not user_descriptions:
+            return []
+
+        vectorstore = get_vectorstore()
+        extractor = get_extractor()
+
+        if vectorstore is None:
+            return {"error": "Vector store not initialized or CSV file not found/empty"}
+
+        logger.debug("Extracting attributes for %d descriptions", len(user_descriptions))
+        all_attrs = _extract_attributes(extractor, user_descriptions)
+        search_queries = [
+            _build_search_query(description, attrs)
+            for description, attrs in zip(user_descriptions, all_attrs)
+        ]
+
+        resolved = {gender: _resolve_filters(vectorstore, gender, filters) for gender in set(gender_filters)}
+        lexical_futures = [
+            _submit_lexical_search(query, top_n, resolved[gender][2])
+            for query, gender in zip(search_queries, gender_filters)
+        ]
+
+        logger.debug("Embedding %d search queries", len(search_queries))
+        query_embeddings = _embed_queries(search_queries)
+
+        logger.debug("Searching for top %d matches per query", top_n)
+        # One bulk search per distinct gender filter; each query is a single k-NN call
+        groups = OrderedDict()
+        for idx, gender in enumerate(gender_filters):
+            groups.setdefault(gender, []).append(idx)
+
+        all_matches = [None] * len(search_queries)
+        for gender, indices in groups.items():
+            where, candidate_ids, _ = resolved[gender]
+            group_matches = vectorstore.search(
+                [query_embeddings[idx] for idx in indices],
+                k=top_n,
+                where=where,
+                ids=candidate_ids
+            )
+            for idx, matches in zip(indices, group_matches):
+                all_matches[idx] = matches
+
+        for idx, future in enumerate(lexical_futures):
+            if future is not None:
+                all_matches[idx] = _fuse_matches(
+                    vectorstore, query_embeddings[idx], all_matches[idx], future.result(), top_n
+                )
+
+        batch_recommendations = [
+            _build_recommendations(matches, attrs)
+            for matches, attrs in zip(all_matches, all_attrs)
+        ]
+
+        logger.debug("Scored %d descriptions", len(batch_recommendations))
+        return batch_recommendations
+
+    except Exception as e:
+        logger.exception(f"Error in batch recommendation logic: {e}")
+        return {"error": str(e)}
+
+# FaceAnalyzer skin tones (descriptive and Fitzpatrick) -> catalog suitable_skin_tones values
+SKIN_TONE_TO_CATALOG = {
+    "very fair": "light", "fair": "light", "type i": "light", "type ii": "light",
+    "medium": "medium", "olive": "medium", "type iii": "medium", "type iv": "medium",
+    "brown": "deep", "dark brown": "deep", "very dark": "deep", "type v": "deep", "type vi": "deep",
+}
+FACE_GENDERS = ("Male", "Female")
+
+def face_to_recommendation_query(face):
+    """
+    Turn one FaceAnalyzer result into recommender inputs.
+
+    Gender and skin tone become structured filters (gender filter plus a
+    suitable_skin_tones attribute filter, which also admits 'all' rows); the
+    description keeps face shape and tone for the semantic side.
+
+    Args:
+        face (dict): analyze_image() entry with gender, skin_tone, fitzpatrick, face_shape
+
+    Returns:
+        tuple: (description, gender_filter or None, filters dict or None)
+    """
+    gender = face.get("gender")
+    gender_filter = gender if gender in FACE_GENDERS else None
+
+    skin_tone = str(face.get("skin_tone") or "").strip().lower()
+    catalog_tone = SKIN_TONE_TO_CATALOG.get(skin_tone) or SKIN_TONE_TO_CATALOG.get(
+        str(face.get("fitzpatrick") or "").strip().lower()
+    )
+    filters = {"suitable_skin_tones": [catalog_tone]} if catalog_tone else None
+
+    parts = [f"Outfit for {gender_filter or 'anyone'}"]
+    if catalog_tone:
+        parts.append(f"with {skin_tone} skin tone")
+    face_shape = face.get("face_shape")
+    if face_shape and face_shape != "Unknown":
+        parts.append(f"and {str(face_shape).lower()} face shape")
+    return " ".join(parts), gender_filter, filters
+
+def get_similar_products(product_id, top_n=10, gender_filter=None):
+    """
+    "More like this": nearest catalog neighbours of a product.
+
+    Served from the precomputed neighbour graph (no vector search at request
+    time). The product's stored vector is searched against the catalog
+    instead when the graph is disabled, does not hold the product yet, or
+    has fewer than top_n neighbours passing the gender filter.
+
+    Args:
+        product_id (str): Catalog product id
+        top_n (int): Number of similar products
+        gender_filter (str): Optional; keep this gender plus 'Unisex'
+
+    Returns:
+        list: Similar products with matching scores, None for an unknown product
+    """
+    try:
+        vectorstore = get_vectorstore()
+        if vectorstore is None:
+            return {"error": "Vector store not initialized or CSV file not found/empty"}
+
+        matches = None
+        neighbors = _neighbor_graph.neighbors(product_id) if SIMILAR_PRODUCTS_K >= top_n else None
+        if neighbors is not None:
+            gender = normalise_gender(gender_filter)
+            accepted = {gender, "Unisex"} if gender else None
+            metadatas = dict(zip(*vectorstore.get_records([pid for pid, _ in neighbors])[:2]))
+            matches = [
+                (metadatas[pid], distance)
+                for pid, distance in neighbors
+                if pid in metadatas and not (accepted and metadatas[pid].get("gender") not in accepted)
+            ]
+            # Short only because the gender filter dropped neighbours: the catalog may hold more
+            if len(matches) < top_n and len(neighbors) >= SIMILAR_PRODUCTS_K:
+                matches = None
+        if matches is None:
+            found, vectors = vectorstore.get_vectors([product_id])
+            if not found:
+                return None
+            where, candidate_ids, _ = _resolve_filters(vectorstore, gender_filter, None)
+            # One extra neighbour: the product itself is its own nearest match
+            matches = [
+                (metadata, distance)
+                for metadata, distance in vectorstore.search(vectors, k=top_n + 1, where=where, ids=candidate_ids)[0]
+                if metadata.get("product_id") != product_id
+            ]
+
+        similar = []
+        for metadata, distance in matches[:top_n]:
+            outfit_dict = metadata.copy()
+            outfit_dict['matching_percentage'] = round(_similarity_percentage(distance), 2)
+            outfit_dict['raw_distance'] = round(distance, 4)
+            similar.append(outfit_dict)
+        return similar
+
+    except Exception as e:
+        logger.exception(f"Error in similar products lookup: {e}")
         return {"error": str(e)}
 
+def warm_up(description="breathable cotton kurta for a summer wedding"):
+    """
+    Load the embeddings model, attribute extractor and vector store, then run
+    one plain and one gender + attribute filtered hybrid recommendation, so
+    first-request costs (including the filter and BM25 paths) are paid
+    before serving.
+
+    Returns:
+        dict: Milliseconds for loading and for each stage of the dummy query
+    """
+    timer = StageTimer({})
+    with timer.stage("embeddings_load"):
+        get_embeddings()
+    with timer.stage("extractor_load"):
+        get_extractor()
+    with timer.stage("index_load"):
+        if get_vectorstore() is None:
+            raise RuntimeError("Vector store not initialized or CSV file not found/empty")
+
+    query_timings = {}
+    recommendations = get_outfit_recommendations(description, top_n=1, timings=query_timings)
+    if isinstance(recommendations, dict) and "error" in recommendations:
+        raise RuntimeError(recommendations["error"])
+    timer.timings.update({f"dummy_{stage}": ms for stage, ms in query_timings.items()})
+
+    query_timings = {}
+    recommendations = get_outfit_recommendations(
+        description, top_n=1, gender_filter="Female", filters={"occasions": ["wedding"]}, timings=query_timings
+    )
+    if isinstance(recommendations, dict) and "error" in recommendations:
+        raise RuntimeError(recommendations["error"])
+    timer.timings.update({f"dummy_filtered_{stage}": ms for stage, ms in query_timings.items()})
+    return timer.timings
+
 if __name__ == "__main__":
     # Example usage
     print("\n" + "="*80)
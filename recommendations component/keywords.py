@@ -2,6 +2,48 @@ import spacy
 from spacy.pipeline import EntityRuler
 import json
 
+# Define the Knowledge Base (The "Brain")
+# You can expand these lists with as many synonyms as needed
+FASHION_TAXONOMY = {
+    "SUITABLE_BODY_TYPE": ["hourglass", "pear", "apple", "rectangle", "inverted triangle", "athletic", "petite", "curvy", "tall", "plus size"],
+    "SUITABLE_SKIN_TONE": ["fair", "pale", "light", "medium", "olive", "tan", "dark", "deep", "warm tone", "cool tone", "neutral tone"],
+    "OCCASION": ["wedding", "party", "office", "work", "casual", "formal", "date", "gym", "cocktail", "business", "festival", "interview", "brunch"],
+    "SEASON": ["summer", "winter", "spring", "autumn", "fall", "rainy", "monsoon", "hot", "cold"],
+    "PLACE": ["beach", "city", "mountain", "resort", "countryside", "club", "home", "outdoor", "indoor"],
+    "STYLE": ["boho", "bohemian", "minimalist", "vintage", "streetwear", "classic", "chic", "preppy", "grunge", "elegant", "retro", "avant-garde"],
+    "FABRIC": ["cotton", "silk", "wool", "linen", "polyester", "denim", "leather", "velvet", "chiffon", "satin", "nylon", "cashmere", "rayon"],
+    "COLOR": ["red", "blue", "green", "black", "white", "beige", "navy", "pink", "pastel", "yellow", "purple", "orange", "gold", "silver", "teal"]
+}
+
+# Map internal labels to user requested keys
+LABEL_MAP = {
+    "SUITABLE_BODY_TYPE": "suitable_body_types",
+    "SUITABLE_SKIN_TONE": "suitable_skin_tones",
+    "OCCASION": "occasions",
+    "SEASON": "seasons",
+    "PLACE": "places",
+    "STYLE": "styles",
+    "FABRIC": "fabric",
+    "COLOR": "colors"
+}
+
+def build_patterns(taxonomy):
+    """Converts simple lists into Spacy patterns."""
+    patterns = []
+    for label, keywords in taxonomy.items():
+        for keyword in keywords:
+            # Add pattern for exact match (case insensitive)
+            patterns.append({"label": label, "pattern": [{"LOWER": keyword.lower()}]})
+            # Handle multi-word patterns specifically if needed (simple split here)
+            if " " in keyword:
+                token_pattern = [{"LOWER": t.lower()} for t in keyword.split()]
+                patterns.append({"label": label, "pattern": token_pattern})
+    return patterns
+
+def _empty_results():
+    # Initialize output structure
+    return {key: [] for key in LABEL_MAP.values()}
+
 class FashionAttributeExtractor:
     def __init__(self):
         # 1. Load the small English model
@@ -14,71 +56,101 @@ class FashionAttributeExtractor:
         else:
             self.ruler = self.nlp.get_pipe("entity_ruler")
             
-        # 3. Define the Knowledge Base (The "Brain")
-        # You can expand these lists with as many synonyms as needed
-        self.patterns = self._build_patterns({
-            "SUITABLE_BODY_TYPE": ["hourglass", "pear", "apple", "rectangle", "inverted triangle", "athletic", "petite", "curvy", "tall", "plus size"],
-            "SUITABLE_SKIN_TONE": ["fair", "pale", "light", "medium", "olive", "tan", "dark", "deep", "warm tone", "cool tone", "neutral tone"],
-            "OCCASION": ["wedding", "party", "office", "work", "casual", "formal", "date", "gym", "cocktail", "business", "festival", "interview", "brunch"],
-            "SEASON": ["summer", "winter", "spring", "autumn", "fall", "rainy", "monsoon", "hot", "cold"],
-            "PLACE": ["beach", "city", "mountain", "resort", "countryside", "club", "home", "outdoor", "indoor"],
-            "STYLE": ["boho", "bohemian", "minimalist", "vintage", "streetwear", "classic", "chic", "preppy", "grunge", "elegant", "retro", "avant-garde"],
-            "FABRIC": ["cotton", "silk", "wool", "linen", "polyester", "denim", "leather", "velvet", "chiffon", "satin", "nylon", "cashmere", "rayon"],
-            "COLOR": ["red", "blue", "green", "black", "white", "beige", "navy", "pink", "pastel", "yellow", "purple", "orange", "gold", "silver", "teal"]
-        })
+        # 3. Load the Knowledge Base
+        self.patterns = build_patterns(FASHION_TAXONOMY)
         
         self.ruler.add_patterns(self.patterns)
 
-    def _build_patterns(self, taxonomy):
-        """Converts simple lists into Spacy patterns."""
-        patterns = []
-        for label, keywords in taxonomy.items():
-            for keyword in keywords:
-                # Add pattern for exact match (case insensitive)
-                patterns.append({"label": label, "pattern": [{"LOWER": keyword.lower()}]})
-                # Handle multi-word patterns specifically if needed (simple split here)
-                if " " in keyword:
-                    token_pattern = [{"LOWER": t.lower()} for t in keyword.split()]
-                    patterns.append({"label": label, "pattern": token_pattern})
-        return patterns
-
     def extract(self, text):
-        doc = self.nlp(text)
-        
-        # Initialize output structure
-        results = {
-            "suitable_body_types": [],
-            "suitable_skin_tones": [],
-            "occasions": [],
-            "seasons": [],
-            "places": [],
-            "styles": [],
-            "fabric": [],
-            "colors": []
-        }
-        
-        # Map internal labels to user requested keys
-        label_map = {
-            "SUITABLE_BODY_TYPE": "suitable_body_types",
-            "SUITABLE_SKIN_TONE": "suitable_skin_tones",
-            "OCCASION": "occasions",
-            "SEASON": "seasons",
-            "PLACE": "places",
-            "STYLE": "styles",
-            "FABRIC": "fabric",
-            "COLOR": "colors"
-        }
+        return self._doc_to_attributes(self.nlp(text))
+
+    def extract_batch(self, texts, batch_size=64):
+        """Extract attributes for many texts with a single nlp.pipe pass."""
+        return [self._doc_to_attributes(doc) for doc in self.nlp.pipe(texts, batch_size=batch_size)]
+
+    def _doc_to_attributes(self, doc):
+        results = _empty_results()
 
         # Extract entities
         for ent in doc.ents:
-            if ent.label_ in label_map:
-                key = label_map[ent.label_]
+            if ent.label_ in LABEL_MAP:
+                key = LABEL_MAP[ent.label_]
                 # Avoid duplicates
                 if ent.text.lower() not in results[key]:
                     results[key].append(ent.text.lower())
                     
         return results
 
+class KeywordAttributeExtractor:
+    """
+    Lightweight drop-in for FashionAttributeExtractor.
+
+    The EntityRuler patterns are compiled into one token-level trie and
+    matched over a tokenizer-only pipeline (spacy.blank), skipping the
+    tagger, parser and statistical NER. Overlapping matches are resolved the
+    same way the EntityRuler does (longest span first, then leftmost), so the
+    output is identical to the full spaCy path.
+    """
+
+    def __init__(self):
+        self.nlp = spacy.blank("en")
+        self.patterns = build_patterns(FASHION_TAXONOMY)
+        self._trie = self._compile(self.patterns)
+
+    @staticmethod
+    def _compile(patterns):
+        """Build a trie keyed by lowercase token; terminal nodes hold the label"""
+        trie = {}
+        for entry in patterns:
+            node = trie
+            for token in entry["pattern"]:
+                node = node.setdefault(token["LOWER"], {})
+            # First pattern wins for identical token sequences
+            node.setdefault(None, entry["label"])
+        return trie
+
+    def _match(self, doc):
+        """All (start, end, label) pattern matches in a tokenized doc"""
+        lowers = [token.lower_ for token in doc]
+        matches = []
+        for start in range(len(lowers)):
+            node = self._trie
+            for end in range(start, len(lowers)):
+                node = node.get(lowers[end])
+                if node is None:
+                    break
+                if None in node:
+                    matches.append((start, end + 1, node[None]))
+        return matches
+
+    def _doc_to_attributes(self, doc):
+        results = _empty_results()
+
+        # Keep the longest, then leftmost, non-overlapping spans
+        taken = set()
+        spans = []
+        for start, end, label in sorted(self._match(doc), key=lambda m: (m[0] - m[1], m[0])):
+            if any(i in taken for i in range(start, end)):
+                continue
+            taken.update(range(start, end))
+            spans.append((start, end, label))
+
+        for start, end, label in sorted(spans):
+            key = LABEL_MAP[label]
+            text = doc[start:end].text.lower()
+            # Avoid duplicates
+            if text not in results[key]:
+                results[key].append(text)
+
+        return results
+
+    def extract(self, text):
+        return self._doc_to_attributes(self.nlp.make_doc(text))
+
+    def extract_batch(self, texts, batch_size=256):
+        """Extract attributes for many texts with a single tokenizer.pipe pass."""
+        return [self._doc_to_attributes(doc) for doc in self.nlp.tokenizer.pipe(texts, batch_size=batch_size)]
+
 # --- Usage Example ---
 if __name__ == "__main__":
     extractor = FashionAttributeExtractor()
@@ -0,0 +1,181 @@
+"""
+BM25 inverted index over catalog document text.
+
+Exact terms such as fabric names ("khadi"), origins ("Pochampally") or weaver
+names carry little weight in MiniLM embeddings; this index recovers them.
+Per-term BM25 weights are precomputed at build time, so a query is a few
+array concatenations plus one grouped sum over the matching postings.
+
+Documents are tokenised when they are upserted; build() turns them into a
+new snapshot of CSR postings (one vectorised pass) and swaps it in, so
+searches never wait for a rebuild.
+"""
+import re
+import threading
+from collections import Counter
+import numpy as np
+
+from attribute_index import Candidates, RowAlignment
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Merge ranked id lists with reciprocal-rank fusion.
+
+    Args:
+        rankings (list[list]): Ranked ids, best first, one list per retriever
+        k (int): RRF damping constant
+
+    Returns:
+        list: (id, fused_score) pairs, best first
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, pid in enumerate(ranking, start=1):
+            fused[pid] = fused.get(pid, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class _Postings:
+    """One immutable build: CSR postings (term id -> rows, weights) over ids"""
+
+    def __init__(self, ids, vocab, ptr, rows, weights, generation):
+        self.ids = ids
+        self.vocab = vocab
+        self.ptr = ptr
+        self.rows = rows
+        self.weights = weights
+        self.generation = generation
+        self.row_of = {pid: row for row, pid in enumerate(ids)}
+
+
+class BM25Index:
+    """Okapi BM25 over product documents keyed by product_id"""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs = {}
+        self._vocab = {}
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._generation = 0
+        self._alignment = RowAlignment()
+        self._snapshot = _Postings([], {}, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32),
+                                   np.zeros(0, dtype=np.float32), 0)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _terms(self, text):
+        """One (2, terms) int32 array per document: term ids, term frequencies"""
+        counts = Counter(tokenize(text))
+        terms = np.empty((2, len(counts)), dtype=np.int32)
+        for col, (term, tf) in enumerate(counts.items()):
+            terms[0, col] = self._vocab.setdefault(term, len(self._vocab))
+            terms[1, col] = tf
+        return terms
+
+    def upsert(self, ids, texts):
+        with self._lock:
+            for pid, text in zip(ids, texts):
+                self._docs[pid] = self._terms(text)
+            self._dirty = True
+
+    def delete(self, ids):
+        with self._lock:
+            for pid in ids:
+                self._docs.pop(pid, None)
+            self._dirty = True
+
+    def rebuild(self, ids, texts):
+        with self._lock:
+            self._docs = {}
+            self._vocab = {}
+            self._dirty = True
+        self.upsert(ids, texts)
+
+    def build(self):
+        """Build postings from the current documents and publish them"""
+        with self._lock:
+            if self._dirty:
+                self._snapshot = self._build()
+                self._dirty = False
+        return self._snapshot
+
+    def _build(self):
+        ids = list(self._docs)
+        docs = [self._docs[pid] for pid in ids]
+        n = len(ids)
+        pairs = np.concatenate(docs, axis=1) if docs else np.zeros((2, 0), dtype=np.int32)
+        terms = pairs[0]
+        tf = pairs[1].astype(np.float32)
+        per_doc = np.array([doc.shape[1] for doc in docs], dtype=np.int64)
+        rows = np.repeat(np.arange(n, dtype=np.int32), per_doc)
+        lengths = np.bincount(rows, weights=tf, minlength=n).astype(np.float32)
+
+        vocab_size = len(self._vocab)
+        df = np.bincount(terms, minlength=vocab_size)
+        idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_len = float(lengths.mean()) if n else 0.0
+        norm = self.k1 * (1.0 - self.b + self.b * lengths[rows] / (avg_len or 1.0))
+        weights = (idf[terms] * tf * (self.k1 + 1.0) / (tf + norm)).astype(np.float32)
+
+        # Group by term (rows stay ascending within a term)
+        order = np.argsort(terms, kind="stable")
+        ptr = np.zeros(vocab_size + 1, dtype=np.int64)
+        np.cumsum(df, out=ptr[1:])
+        self._generation += 1
+        return _Postings(ids, dict(self._vocab), ptr, rows[order], weights[order], self._generation)
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot.generation == 0 and self._dirty:
+            snapshot = self.build()
+        return snapshot
+
+    def search(self, query, k, ids=None):
+        """
+        Top-k products for a query.
+
+        Args:
+            query (str): Free text
+            k (int): Number of hits
+            ids: Optional candidate product ids (or attribute_index.Candidates);
+                other rows are ignored
+
+        Returns:
+            list: (product_id, bm25_score) pairs, best first
+        """
+        snapshot = self._current()
+        term_ids = [snapshot.vocab[term] for term in dict.fromkeys(tokenize(query)) if term in snapshot.vocab]
+        if not term_ids or k <= 0:
+            return []
+
+        spans = [(snapshot.ptr[t], snapshot.ptr[t + 1]) for t in term_ids]
+        rows = np.concatenate([snapshot.rows[lo:hi] for lo, hi in spans])
+        weights = np.concatenate([snapshot.weights[lo:hi] for lo, hi in spans])
+        if ids is not None:
+            if isinstance(ids, Candidates):
+                allowed = self._alignment.mask(ids, snapshot.ids, snapshot.generation)
+            else:
+                allowed = np.zeros(len(snapshot.ids), dtype=bool)
+                allowed[[snapshot.row_of[pid] for pid in ids if pid in snapshot.row_of]] = True
+            keep = allowed[rows]
+            rows = rows[keep]
+            weights = weights[keep]
+        if not len(rows):
+            return []
+
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        k = min(k, len(unique_rows))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(unique_rows) else np.arange(len(unique_rows))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(snapshot.ids[unique_rows[i]], float(scores[i])) for i in top]
@@ -0,0 +1,139 @@
+"""
+Precomputed k-nearest-neighbour graph over the stored catalog vectors.
+
+Neighbours come from the configured vector backend (stored embeddings, no
+model inference) and are kept per product_id, so "more like this" is a
+dictionary lookup. The graph remembers the content hash each row was built
+from; sync() only searches again for rows that changed, rows whose list
+pointed at a changed or removed product, and pushes changed products into
+the lists of their new neighbours.
+"""
+import os
+import json
+import threading
+
+GRAPH_FILE = "neighbor_graph.json"
+GRAPH_VERSION = 1
+
+
+class NeighborGraph:
+    """product_id -> [(neighbour_id, squared L2 distance), ...] best first"""
+
+    def __init__(self, k=20):
+        self.k = k
+        self._neighbors = {}
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._neighbors)
+
+    def __contains__(self, pid):
+        return pid in self._neighbors
+
+    def neighbors(self, pid, k=None):
+        """Stored neighbours of pid (best first), or None for unknown products"""
+        neighbors = self._neighbors.get(pid)
+        if neighbors is None:
+            return None
+        return list(neighbors[:k or self.k])
+
+    def _search(self, backend, pids, batch_size):
+        for offset in range(0, len(pids), batch_size):
+            found, vectors = backend.get_vectors(pids[offset:offset + batch_size])
+            if not len(found):
+                continue
+            # One extra hit: the product itself is its own nearest neighbour
+            results = backend.search(vectors, self.k + 1)
+            for pid, matches in zip(found, results):
+                self._neighbors[pid] = [
+                    (metadata['product_id'], float(distance))
+                    for metadata, distance in matches
+                    if metadata['product_id'] != pid
+                ][:self.k]
+
+    def _insert(self, pid, neighbor_id, distance):
+        neighbors = self._neighbors.get(pid)
+        if neighbors is None:
+            return False
+        if len(neighbors) >= self.k and distance >= neighbors[-1][1]:
+            return False
+        neighbors = [item for item in neighbors if item[0] != neighbor_id]
+        neighbors.append((neighbor_id, distance))
+        neighbors.sort(key=lambda item: item[1])
+        self._neighbors[pid] = neighbors[:self.k]
+        return True
+
+    def sync(self, backend, hashes, batch_size=256):
+        """
+        Bring the graph in line with the catalog.
+
+        Args:
+            backend: Vector backend holding the catalog embeddings
+            hashes (dict): product_id -> content hash (the catalog manifest rows)
+            batch_size (int): Products searched per backend call
+
+        Returns:
+            dict: counts of searched, removed and reverse-updated rows
+        """
+        with self._lock:
+            changed = [pid for pid, digest in hashes.items() if self._hashes.get(pid) != digest]
+            removed = [pid for pid in self._hashes if pid not in hashes]
+            stats = {"searched": 0, "removed": len(removed), "reverse_updates": 0}
+            if not changed and not removed:
+                return stats
+
+            gone = set(changed) | set(removed)
+            # Distances to changed or removed products are stale
+            stale = [
+                pid for pid, neighbors in self._neighbors.items()
+                if pid in hashes and pid not in gone and any(n in gone for n, _ in neighbors)
+            ]
+            for pid in removed:
+                self._neighbors.pop(pid, None)
+
+            incremental = bool(self._hashes)
+            to_search = changed + stale
+            self._search(backend, to_search, batch_size)
+            stats["searched"] = len(to_search)
+
+            if incremental:
+                # Cosine similarity is symmetric: a changed product enters the
+                # lists of the products found among its own neighbours
+                searched = set(to_search)
+                for pid in changed:
+                    for neighbor_id, distance in self._neighbors.get(pid, []):
+                        if neighbor_id not in searched and self._insert(neighbor_id, pid, distance):
+                            stats["reverse_updates"] += 1
+
+            self._hashes = dict(hashes)
+            return stats
+
+    def save(self, path):
+        payload = {
+            "version": GRAPH_VERSION,
+            "k": self.k,
+            "hashes": self._hashes,
+            "neighbors": self._neighbors,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Load a saved graph; ignored when missing, corrupt or built with another k"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if payload.get("version") != GRAPH_VERSION or payload.get("k") != self.k:
+            return False
+        with self._lock:
+            self._hashes = payload["hashes"]
+            self._neighbors = {
+                pid: [(n, float(d)) for n, d in neighbors]
+                for pid, neighbors in payload["neighbors"].items()
+            }
+        return True
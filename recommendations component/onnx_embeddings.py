@@ -0,0 +1,138 @@
+"""
+ONNX Runtime backend for the all-MiniLM-L6-v2 sentence encoder.
+
+Runs an exported, dynamically int8-quantized copy of the model on CPU with
+the same mean pooling and L2 normalisation as sentence-transformers, so it
+is a drop-in replacement for HuggingFaceEmbeddings (embed_documents /
+embed_query) without importing torch at serving time.
+
+Export once (needs torch + transformers, only for this step):
+    python onnx_embeddings.py export [--output-dir onnx_minilm]
+"""
+import os
+
+import numpy as np
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_minilm")
+FP32_MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+# sentence-transformers truncates all-MiniLM-L6-v2 inputs at 256 word pieces
+MAX_SEQ_LENGTH = 256
+
+
+class OnnxMiniLMEmbeddings:
+    """MiniLM sentence embeddings through onnxruntime (CPU)"""
+
+    def __init__(self, model_dir=DEFAULT_MODEL_DIR, quantized=True, batch_size=32, num_threads=None):
+        """
+        Args:
+            model_dir (str): Directory written by export_onnx_model()
+            quantized (bool): Use the int8 model (model_quantized.onnx) instead of float32
+            batch_size (int): Texts per session.run call
+            num_threads (int): Intra-op threads; onnxruntime default when None
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, QUANTIZED_MODEL_FILE if quantized else FP32_MODEL_FILE)
+        tokenizer_path = os.path.join(model_dir, TOKENIZER_FILE)
+        for path in (model_path, tokenizer_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(
+                    f"{path} not found; run 'python onnx_embeddings.py export --output-dir {model_dir}'"
+                )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = int(num_threads)
+        self._session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {inp.name for inp in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(tokenizer_path)
+        self._tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self._tokenizer.enable_padding()
+        self.batch_size = max(1, int(batch_size))
+
+    def _encode(self, texts):
+        encodings = self._tokenizer.encode_batch(list(texts))
+        input_ids = np.array([enc.ids for enc in encodings], dtype=np.int64)
+        attention_mask = np.array([enc.attention_mask for enc in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self._session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalisation (normalize_embeddings=True)
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts):
+        texts = [str(text) for text in texts]
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._encode(texts[start:start + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text):
+        return self._encode([str(text)])[0].tolist()
+
+
+def export_onnx_model(output_dir=DEFAULT_MODEL_DIR, model_name=MODEL_NAME, opset=14):
+    """
+    Export the transformer to ONNX and write a dynamically int8-quantized copy.
+
+    Returns:
+        str: Path of the quantized model
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    # Writes tokenizer.json (fast tokenizer) next to the model
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["a red silk saree for a wedding"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(output_dir, FP32_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+
+    quantized_path = os.path.join(output_dir, QUANTIZED_MODEL_FILE)
+    quantize_dynamic(fp32_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ONNX MiniLM encoder utilities")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--output-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--model-name", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    path = export_onnx_model(args.output_dir, args.model_name)
+    print(f"Quantized model written to {path}")
@@ -0,0 +1,140 @@
+"""
+Compact storage for catalog embeddings.
+
+Vectors can be held in RAM as float16 or as int8 codes with one float32
+scale per vector. The quantized copy ranks candidates; the full-precision
+float32 vectors (memory-mapped from disk) re-rank only the shortlist.
+
+Usage: python quantization.py [--dtype int8] [--k 10] [--queries 200]
+reports memory and recall@k of the stored exact index against float32.
+"""
+import numpy as np
+
+QUANTIZED_DTYPES = ("float16", "int8")
+SCORE_BLOCK_ROWS = 65536
+
+
+def quantize(vectors, dtype):
+    """
+    Quantize row vectors.
+
+    Returns:
+        tuple: (codes, scales) where scales is None for float16
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        # Symmetric per-vector scale: the largest component maps to +/-127
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unsupported quantized dtype '{dtype}', expected one of {QUANTIZED_DTYPES}")
+
+
+def quantize_blocks(vectors, dtype, block_rows=SCORE_BLOCK_ROWS):
+    """Quantize a (possibly memory-mapped) matrix block by block"""
+    n = vectors.shape[0]
+    codes = np.empty(vectors.shape, dtype=np.float16 if dtype == "float16" else np.int8)
+    scales = None if dtype == "float16" else np.empty(n, dtype=np.float32)
+    for start in range(0, n, block_rows):
+        block_codes, block_scales = quantize(vectors[start:start + block_rows], dtype)
+        codes[start:start + block_rows] = block_codes
+        if scales is not None:
+            scales[start:start + block_rows] = block_scales
+    return codes, scales
+
+
+def approximate_scores(queries, codes, scales, block_rows=SCORE_BLOCK_ROWS):
+    """
+    Inner products between float32 queries and quantized rows.
+
+    Rows are de-quantized one block at a time so the transient float32 copy
+    never exceeds block_rows x dim.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    scores = np.empty((queries.shape[0], codes.shape[0]), dtype=np.float32)
+    for start in range(0, codes.shape[0], block_rows):
+        block = codes[start:start + block_rows].astype(np.float32)
+        scores[:, start:start + block_rows] = queries @ block.T
+    if scales is not None:
+        scores *= scales[None, :]
+    return scores
+
+
+def nbytes(codes, scales):
+    return int(codes.nbytes + (scales.nbytes if scales is not None else 0))
+
+
+def _top_k(scores, k):
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall_at_k(reference, candidate):
+    """Mean fraction of reference neighbours present in candidate lists"""
+    hits = [len(set(ref) & set(cand)) / max(len(ref), 1) for ref, cand in zip(reference, candidate)]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def evaluate_quantization(matrix, queries, k=10, dtype="int8", rerank_factor=4):
+    """
+    Compare a quantized copy of matrix against the float32 baseline.
+
+    Returns:
+        dict: memory of both representations and recall@k with and without
+        float32 re-ranking of a k * rerank_factor shortlist
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    queries = np.asarray(queries, dtype=np.float32)
+    codes, scales = quantize_blocks(matrix, dtype)
+
+    exact = _top_k(queries @ matrix.T, k)
+    approx_scores = approximate_scores(queries, codes, scales)
+    approx = _top_k(approx_scores, k)
+
+    shortlist = _top_k(approx_scores, min(k * rerank_factor, matrix.shape[0]))
+    reranked = []
+    for query, rows in zip(queries, shortlist):
+        exact_scores = matrix[rows] @ query
+        reranked.append(rows[np.argsort(-exact_scores)[:k]])
+
+    float32_bytes = int(matrix.nbytes)
+    quantized_bytes = nbytes(codes, scales)
+    return {
+        "dtype": dtype,
+        "rows": int(matrix.shape[0]),
+        "dim": int(matrix.shape[1]),
+        "k": k,
+        "rerank_factor": rerank_factor,
+        "float32_bytes": float32_bytes,
+        "quantized_bytes": quantized_bytes,
+        "memory_ratio": round(quantized_bytes / float32_bytes, 4) if float32_bytes else 0.0,
+        "recall_at_k": round(recall_at_k(exact, approx), 4),
+        "recall_at_k_reranked": round(recall_at_k(exact, reranked), 4),
+    }
+
+
+if __name__ == "__main__":
+    import os
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report memory and recall@k of quantized catalog vectors")
+    parser.add_argument("--dtype", choices=QUANTIZED_DTYPES, default="int8")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="Catalog vectors (plus noise) used as queries")
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    vectors_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vector_index", "exact", "vectors.npy")
+    matrix = np.load(vectors_path, mmap_mode="r")
+    rng = np.random.default_rng(0)
+    picks = rng.choice(matrix.shape[0], size=min(args.queries, matrix.shape[0]), replace=False)
+    queries = np.asarray(matrix[picks]) + rng.normal(scale=0.05, size=(len(picks), matrix.shape[1]))
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(json.dumps(evaluate_quantization(matrix, queries, args.k, args.dtype, args.rerank_factor), indent=2))
@@ -0,0 +1,137 @@
+"""
+Single-file, memory-mappable catalog layout.
+
+Several uvicorn workers can open the same file read-only with mmap. The OS
+page cache then holds one physical copy of the embedding matrix no matter
+how many processes serve requests.
+
+Layout (little-endian):
+    header   magic, version, dim, rows, section offsets (HEADER struct)
+    matrix   rows x dim float32, 64-byte aligned
+    offsets  rows + 1 uint64 byte offsets into the record blob
+    blob     one UTF-8 JSON record per row: {"id", "metadata", "document"}
+    ids      JSON list of product ids (loaded eagerly for id -> row lookup)
+
+Records are decoded on access, so a worker never holds the catalog
+metadata it does not read.
+
+Not shared: each worker still builds its own query encoder, attribute-index
+bitsets and BM25 postings, and its own id -> row maps, from this file at
+startup. Those are compact arrays rather than per-row dicts, but they grow
+with the catalog and are paid once per worker (bench_workers.py measures it).
+"""
+import os
+import json
+import mmap
+import struct
+
+import numpy as np
+
+CATALOG_FILE = "catalog.bin"
+MAGIC = b"WKCATLG1"
+FORMAT_VERSION = 1
+# magic, version, dim, rows, matrix_offset, offsets_offset, blob_offset, ids_offset, ids_size
+HEADER = struct.Struct("<8sIIQQQQQQ")
+ALIGNMENT = 64
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_catalog_file(path, ids, matrix, metadatas, documents):
+    """
+    Write the catalog atomically (temp file + rename).
+
+    Processes that still map the previous file keep reading it until they
+    reopen; the rename never changes bytes under an existing mapping.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    rows = len(ids)
+    dim = matrix.shape[1] if matrix.ndim == 2 and rows else 0
+    records = [
+        json.dumps({"id": pid, "metadata": metadata, "document": document}, ensure_ascii=False).encode("utf-8")
+        for pid, metadata, document in zip(ids, metadatas, documents)
+    ]
+    offsets = np.zeros(rows + 1, dtype=np.uint64)
+    if records:
+        offsets[1:] = np.cumsum([len(record) for record in records])
+    ids_blob = json.dumps(list(ids), ensure_ascii=False).encode("utf-8")
+
+    matrix_offset = _align(HEADER.size)
+    offsets_offset = _align(matrix_offset + rows * dim * 4)
+    blob_offset = offsets_offset + offsets.nbytes
+    ids_offset = blob_offset + int(offsets[-1])
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, FORMAT_VERSION, dim, rows,
+            matrix_offset, offsets_offset, blob_offset, ids_offset, len(ids_blob)
+        ))
+        f.seek(matrix_offset)
+        if rows:
+            f.write(matrix[:rows].tobytes())
+        f.seek(offsets_offset)
+        f.write(offsets.tobytes())
+        for record in records:
+            f.write(record)
+        f.write(ids_blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class _RecordColumn:
+    """Read-only sequence view of one record field, decoded per access"""
+
+    def __init__(self, catalog, key):
+        self._catalog = catalog
+        self._key = key
+
+    def __len__(self):
+        return len(self._catalog)
+
+    def __getitem__(self, row):
+        return self._catalog.record(row)[self._key]
+
+    def __iter__(self):
+        for row in range(len(self._catalog)):
+            yield self[row]
+
+
+class CatalogFile:
+    """Read-only memory mapping of a catalog file"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, dim, rows, matrix_offset, offsets_offset,
+         blob_offset, ids_offset, ids_size) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} catalog file")
+
+        self.path = path
+        self.rows = rows
+        self.dim = dim
+        self._blob_offset = blob_offset
+        # Zero-copy views into the mapping (read-only)
+        self.matrix = np.frombuffer(
+            self._mmap, dtype=np.float32, count=rows * dim, offset=matrix_offset
+        ).reshape(rows, dim)
+        self._offsets = np.frombuffer(self._mmap, dtype=np.uint64, count=rows + 1, offset=offsets_offset)
+        self.ids = json.loads(self._mmap[ids_offset:ids_offset + ids_size].decode("utf-8"))
+
+    def __len__(self):
+        return self.rows
+
+    def record(self, row):
+        if not 0 <= row < self.rows:
+            raise IndexError(row)
+        start = self._blob_offset + int(self._offsets[row])
+        end = self._blob_offset + int(self._offsets[row + 1])
+        return json.loads(self._mmap[start:end].decode("utf-8"))
+
+    def column(self, key):
+        """Lazy sequence of 'metadata' or 'document' values by row"""
+        return _RecordColumn(self, key)
@@ -0,0 +1,90 @@
+"""
+Attribute index: filter semantics, validation and row alignment onto other stores.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from attribute_index import AttributeIndex, RowAlignment, validate_filters
+
+ROWS = {
+    "P1": {"gender": "Female", "occasions": "wedding,festival", "colors": "red", "price": 2999, "rating": 4.5},
+    "P2": {"gender": "Female", "occasions": "office", "colors": "Red,Blue", "price": 1499, "rating": 4.0},
+    "P3": {"gender": "Male", "occasions": "all", "colors": "white", "price": 3000, "rating": 4.8},
+    "P4": {"gender": "Unisex", "occasions": "travel", "colors": "blue", "price": 999, "rating": 3.9},
+}
+
+
+def _index():
+    index = AttributeIndex()
+    index.upsert(list(ROWS), list(ROWS.values()))
+    index.build()
+    return index
+
+
+def _ids(index, filters):
+    return sorted(index.candidates(filters))
+
+
+def test_or_within_a_field_and_across_fields():
+    index = _index()
+    assert index.candidates(None) is None
+    assert _ids(index, {"colors": ["red", "white"]}) == ["P1", "P2", "P3"]
+    assert _ids(index, {"colors": "RED ", "gender": ["female"]}) == ["P1", "P2"]
+    assert _ids(index, {"colors": ["blue"], "gender": ["Male"]}) == []
+
+
+def test_all_wildcard_matches_any_requested_value():
+    index = _index()
+    # P3 is tagged "all" for occasions
+    assert _ids(index, {"occasions": ["wedding"]}) == ["P1", "P3"]
+    assert _ids(index, {"occasions": "beach"}) == ["P3"]
+
+
+def test_numeric_bounds_are_inclusive_and_optional():
+    index = _index()
+    assert _ids(index, {"price": {"min": 1499, "max": 3000}}) == ["P1", "P2", "P3"]
+    assert _ids(index, {"price": {"max": 999}}) == ["P4"]
+    assert _ids(index, {"rating": {"min": 4.5}, "gender": "female"}) == ["P1"]
+
+
+def test_invalid_filters_are_rejected():
+    for filters in (
+        ["colors"],
+        {"unknown_field": "x"},
+        {"price": 3000},
+        {"price": {"below": 3000}},
+        {"rating": {"min": "high"}},
+    ):
+        with pytest.raises(ValueError):
+            validate_filters(filters)
+    validate_filters({"price": {"min": None, "max": "3000"}, "colors": "red"})
+
+
+def test_updates_and_deletes_apply_after_build():
+    index = _index()
+    index.upsert(["P4"], [dict(ROWS["P4"], colors="red")])
+    index.delete(["P1"])
+    # Queries keep the published snapshot until the writer builds
+    assert _ids(index, {"colors": "red"}) == ["P1", "P2"]
+    index.build()
+    assert _ids(index, {"colors": "red"}) == ["P2", "P4"]
+
+
+def test_alignment_onto_a_store_with_another_row_order():
+    index = _index()
+    candidates = index.candidates({"colors": ["blue"]})
+    alignment = RowAlignment()
+
+    # Same order as the index: identity
+    assert alignment.mask(candidates, list(ROWS), version=1).tolist() == [False, True, False, True]
+    # Reordered store with a row the index does not know
+    store_rows = ["P4", "EXTERNAL", "P2", "P1", "P3"]
+    mask = alignment.mask(candidates, store_rows, version=2)
+    assert mask.tolist() == [True, False, True, False, False]
+    # Cached per (generation, version), recomputed when either changes
+    assert alignment.mask(candidates, store_rows, version=2) is not mask
+    assert np.array_equal(alignment.mask(candidates, store_rows, version=2), mask)
@@ -0,0 +1,213 @@
+"""
+MongoDB -> recommendation index sync against an in-memory mongomock collection.
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from catalog_sync import CatalogSyncWorker, mongo_product_to_row
+
+CATALOG_COLUMNS = pytest.importorskip("fashion_recommender").CATALOG_COLUMNS
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _product(product_id, minutes=0, **overrides):
+    doc = {
+        "product_id": product_id,
+        "product_name": "Ikat Cotton Kurta",
+        "product_description": "Handwoven ikat kurta for festive evenings",
+        "colors_available": ["Indigo", "White"],
+        "gender": "Male",
+        "category": "Kurta",
+        "seasonal_recommended": ["summer", "spring"],
+        "places": ["temple", "home"],
+        "style": ["ethnic"],
+        "fabric_type": "cotton",
+        "pattern": "ikat",
+        "country_of_origin": "India",
+        "rating": 4.5,
+        "price": 1999.0,
+        "created_at": START + timedelta(minutes=minutes),
+        "updated_at": START + timedelta(minutes=minutes),
+    }
+    doc.update(overrides)
+    return doc
+
+
+class _Recorder:
+    """Stands in for the recommender: records upserts and deletions"""
+
+    def __init__(self):
+        self.batches = []
+        self.deleted = []
+        self.indexed = set()
+
+    def __call__(self, rows):
+        self.batches.append(rows)
+        self.indexed.update(row["product_id"] for row in rows)
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+        self.indexed.difference_update(ids)
+
+    def ids(self):
+        return [row["product_id"] for batch in self.batches for row in batch]
+
+
+def _worker(collection, batch_size=2, recorder=None, **options):
+    recorder = recorder or _Recorder()
+    worker = CatalogSyncWorker(
+        collection, apply_rows=recorder, delete_rows=recorder.delete,
+        indexed_ids=lambda: recorder.indexed, batch_size=batch_size, **options
+    )
+    return worker, recorder
+
+
+def test_product_maps_to_catalog_row():
+    row = mongo_product_to_row(_product("PROD1"))
+
+    assert set(row) == set(CATALOG_COLUMNS)
+    assert row["name"] == "Ikat Cotton Kurta"
+    assert row["seasons"] == "summer,spring"
+    assert row["colors"] == "Indigo,White"
+    assert row["suitable_skin_tones"] == "all"
+    assert "ikat" in row["semantic_text"]
+
+
+def test_initial_poll_syncs_everything_in_batches():
+    collection = mongomock.MongoClient().db.products_master
+    collection.insert_many([_product(f"PROD{i}", minutes=i) for i in range(5)])
+    worker, recorder = _worker(collection)
+
+    assert worker.poll_once() == 5
+    assert [len(batch) for batch in recorder.batches] == [2, 2, 1]
+    assert recorder.ids() == [f"PROD{i}" for i in range(5)]
+    assert worker.watermark == START + timedelta(minutes=4)
+
+
+def test_later_polls_only_pick_up_inserts_and_updates():
+    collection = mongomock.MongoClient().db.products_master
+    collection.insert_many([_product(f"PROD{i}", minutes=i) for i in range(3)])
+    worker, recorder = _worker(collection)
+    worker.poll_once()
+    recorder.batches.clear()
+
+    assert worker.poll_once() == 0
+
+    collection.insert_one(_product("PROD9", minutes=10))
+    collection.update_one(
+        {"product_id": "PROD0"},
+        {"$set": {"price": 1499.0, "updated_at": START + timedelta(minutes=11)}}
+    )
+    assert worker.poll_once() == 2
+    assert recorder.ids() == ["PROD9", "PROD0"]
+    assert recorder.batches[0][1]["price"] == 1499.0
+    assert worker.poll_once() == 0
+
+
+def test_same_timestamp_products_are_not_lost_or_repeated():
+    collection = mongomock.MongoClient().db.products_master
+    collection.insert_one(_product("PROD1", minutes=5))
+    worker, recorder = _worker(collection)
+    worker.poll_once()
+
+    # Inserted later but with the same timestamp as the watermark
+    collection.insert_one(_product("PROD2", minutes=5))
+    assert worker.poll_once() == 1
+    assert recorder.ids() == ["PROD1", "PROD2"]
+
+
+def test_failed_batch_is_retried():
+    collection = mongomock.MongoClient().db.products_master
+    collection.insert_many([_product(f"PROD{i}", minutes=i) for i in range(4)])
+    calls = []
+
+    def flaky(rows):
+        calls.append([row["product_id"] for row in rows])
+        if len(calls) == 2:
+            raise RuntimeError("embedding backend unavailable")
+
+    worker = CatalogSyncWorker(
+        collection, apply_rows=flaky, delete_rows=list, indexed_ids=set, batch_size=2
+    )
+    try:
+        worker.poll_once()
+    except RuntimeError:
+        pass
+    # Only the first batch advanced the watermark
+    assert worker.watermark == START + timedelta(minutes=1)
+
+    worker.poll_once()
+    assert calls[-1] == ["PROD2", "PROD3"]
+
+
+
+def test_watermark_is_utc_and_late_commits_inside_the_overlap_are_applied():
+    collection = mongomock.MongoClient().db.products_master
+    ist = timezone(timedelta(hours=5, minutes=30))
+    local = (START + timedelta(minutes=10)).replace(tzinfo=ist)
+    collection.insert_one(_product("PROD1", created_at=local, updated_at=local))
+    worker, recorder = _worker(collection, overlap=60)
+    worker.poll_once()
+    assert worker.watermark == START + timedelta(minutes=10) - timedelta(hours=5, minutes=30)
+
+    # Committed after the poll, stamped 30 s below the watermark by a lagging writer
+    late = worker.watermark - timedelta(seconds=30)
+    collection.insert_one(_product("PROD2", created_at=late, updated_at=late))
+    # Outside the window: only a full reconcile or restart would see it
+    early = worker.watermark - timedelta(minutes=5)
+    collection.insert_one(_product("PROD3", created_at=early, updated_at=early))
+
+    assert worker.poll_once() == 1
+    assert recorder.ids() == ["PROD1", "PROD2"]
+    assert worker.poll_once() == 0
+
+
+def test_naive_timestamps_are_utc_and_legacy_local_time_cannot_skip_writes():
+    collection = mongomock.MongoClient().db.products_master
+    # Naive dates are read as UTC, unshifted
+    collection.insert_one(_product("PROD1", minutes=0))
+    worker, recorder = _worker(collection, overlap=60)
+    worker.poll_once()
+    assert worker.watermark == START
+
+    # Legacy writer: naive local datetime.now() in IST, 5.5 hours ahead of UTC
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    legacy = now + timedelta(hours=5, minutes=30)
+    collection.insert_one(_product("LEGACY", created_at=legacy, updated_at=legacy))
+    assert worker.poll_once() == 1
+    assert now <= worker.watermark < legacy
+
+    # A correctly stamped write made after that poll is not hidden behind the legacy date
+    fresh = datetime.now(timezone.utc)
+    collection.insert_one(_product("PROD2", created_at=fresh, updated_at=fresh))
+    assert worker.poll_once() == 1
+    assert recorder.ids() == ["PROD1", "LEGACY", "PROD2"]
+    assert worker.poll_once() == 0
+
+
+def test_tombstones_and_hard_deletes_are_removed():
+    collection = mongomock.MongoClient().db.products_master
+    collection.insert_many([_product(f"PROD{i}", minutes=i) for i in range(4)])
+    worker, recorder = _worker(collection, reconcile_interval=300)
+    worker.poll_once()
+
+    collection.update_one(
+        {"product_id": "PROD1"},
+        {"$set": {"is_deleted": True, "deleted_at": START + timedelta(minutes=20)}}
+    )
+    assert worker.poll_once() == 1
+    assert recorder.deleted == ["PROD1"]
+
+    # A hard delete leaves nothing to poll; the next reconcile finds it
+    collection.delete_one({"product_id": "PROD2"})
+    assert worker.poll_once() == 0
+    assert worker.reconcile() == 1
+    assert recorder.deleted == ["PROD1", "PROD2"]
+    assert recorder.indexed == {"PROD0", "PROD3"}
+    assert worker.status()["deleted"] == 2
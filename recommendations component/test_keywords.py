@@ -0,0 +1,52 @@
+"""
+Parity test: the lightweight keyword extractor must return exactly what the
+full spaCy EntityRuler pipeline returns.
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from keywords import FashionAttributeExtractor, KeywordAttributeExtractor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SAMPLE_DESCRIPTIONS = [
+    "Hi, I have a pear shaped body and olive skin. I am looking for something "
+    "to wear to a beach wedding in the summer. I love boho styles and prefer "
+    "breathable fabrics like linen or cotton. Please avoid black, I want bright colors like yellow or teal.",
+    "i want a dress for a wedding in the summer in gujarat.i have round face and fair skin",
+    "Outfit for Female with Medium skin tone and Oval face shape",
+    "Outfit for Male with Very Fair skin tone and Square face shape",
+    "Plus size, warm tone, something Avant-Garde or retro for a COCKTAIL party in the fall",
+    "inverted triangle build, cool tone skin; need navy/silver office wear for winter interviews",
+    "red red RED silk saree, red again",
+    "",
+]
+
+
+def _descriptions():
+    # Every catalog semantic_text doubles as a realistic query
+    df = pd.read_csv(os.path.join(SCRIPT_DIR, "outfits_60_dataset_with_gender.csv")).fillna('')
+    return SAMPLE_DESCRIPTIONS + df["semantic_text"].tolist()
+
+
+def test_keyword_extractor_matches_spacy():
+    # Imported here: the benchmarks import this module without pytest installed
+    import pytest
+
+    pytest.importorskip("en_core_web_sm", reason="spaCy model en_core_web_sm is not installed")
+    spacy_extractor = FashionAttributeExtractor()
+    fast_extractor = KeywordAttributeExtractor()
+
+    for text in _descriptions():
+        assert fast_extractor.extract(text) == spacy_extractor.extract(text), text
+
+
+def test_keyword_extractor_batch_matches_single():
+    fast_extractor = KeywordAttributeExtractor()
+    texts = _descriptions()
+
+    assert fast_extractor.extract_batch(texts) == [fast_extractor.extract(t) for t in texts]
+
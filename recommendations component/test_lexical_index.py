@@ -0,0 +1,57 @@
+"""
+BM25 index (with attribute-index candidate masks) and reciprocal-rank fusion.
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from attribute_index import AttributeIndex
+from lexical_index import BM25Index, reciprocal_rank_fusion
+
+DOCS = {
+    "P1": "Handwoven khadi kurta from Pochampally",
+    "P2": "Khadi cotton saree, khadi border",
+    "P3": "Silk saree for weddings",
+    "P4": "Linen shirt for the beach",
+}
+
+
+def _bm25(ids=None):
+    index = BM25Index()
+    ids = ids or list(DOCS)
+    index.upsert(ids, [DOCS[pid] for pid in ids])
+    index.build()
+    return index
+
+
+def test_exact_terms_rank_matching_documents():
+    index = _bm25()
+    hits = index.search("khadi", 10)
+    # P2 mentions khadi twice
+    assert [pid for pid, _ in hits] == ["P2", "P1"]
+    assert hits[0][1] > hits[1][1] > 0
+    assert index.search("pochampally weaver", 10)[0][0] == "P1"
+    assert index.search("velvet", 10) == [] and index.search("khadi", 0) == []
+
+
+def test_search_is_limited_to_candidates():
+    attributes = AttributeIndex()
+    attributes.upsert(["P1", "P2", "P3", "P4"], [
+        {"category": "kurta"}, {"category": "saree"}, {"category": "saree"}, {"category": "shirt"},
+    ])
+    attributes.build()
+    # BM25 rows in another order than the attribute index
+    index = _bm25(["P4", "P3", "P2", "P1"])
+
+    candidates = attributes.candidates({"category": "saree"})
+    assert [pid for pid, _ in index.search("khadi saree", 10, candidates)] == ["P2", "P3"]
+    assert index.search("kurta", 10, candidates) == []
+    # Plain id lists work too
+    assert [pid for pid, _ in index.search("khadi", 10, ["P1"])] == ["P1"]
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["A", "B", "C"], ["B", "D"]], k=60)
+    assert [pid for pid, _ in fused] == ["B", "A", "D", "C"]
+    assert fused[0][1] == 1 / 62 + 1 / 61
+    assert reciprocal_rank_fusion([]) == []
@@ -0,0 +1,835 @@
+"""
+Vector search backends for the fashion recommender.
+
+Every backend stores one normalised embedding per product_id together with
+its metadata and document text, and answers k-NN queries with squared L2
+distances (the metric Chroma uses by default), so scores are comparable no
+matter which engine is configured.
+
+Filters use a simple format shared by all backends:
+    {"gender": ["Female", "Unisex"], "category": ["Saree"]}
+i.e. metadata field -> list of accepted values. Candidate ids may also be
+given as attribute_index.Candidates, which the NumPy engines apply as a row
+mask without looking up ids one by one.
+"""
+import os
+import json
+import threading
+import numpy as np
+
+from attribute_index import Candidates, RowAlignment
+from quantization import QUANTIZED_DTYPES, approximate_scores, evaluate_quantization, nbytes, quantize_blocks
+from shared_catalog import CATALOG_FILE, CatalogFile, write_catalog_file
+
+BACKEND_NAMES = ("chroma", "exact", "mmap", "hnsw")
+# Filtered exact search copies the candidate rows out when they are at most this
+# fraction of the catalog; above it, scoring every row and masking the rest is cheaper
+GATHER_MAX_FRACTION = 0.2
+
+
+def _normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(vectors / norms, dtype=np.float32)
+
+
+def _write_json(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class VectorBackend:
+    """Interface implemented by every vector-search engine"""
+
+    name = "base"
+    # True when `where` filters run inside the engine itself; callers then keep
+    # metadata filters in `where` instead of resolving them to candidate ids
+    native_where = False
+
+    def __init__(self, persist_dir):
+        self.persist_dir = persist_dir
+        os.makedirs(persist_dir, exist_ok=True)
+        # Catalog manifest (product_id -> content hash) lives next to the index
+        self.manifest_path = os.path.join(persist_dir, "catalog_manifest.json")
+
+    def ids(self):
+        """All stored product ids"""
+        raise NotImplementedError
+
+    def count(self):
+        return len(self.ids())
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        """Insert or replace rows keyed by id"""
+        raise NotImplementedError
+
+    def delete(self, ids):
+        raise NotImplementedError
+
+    def reset(self):
+        """Drop every stored row"""
+        raise NotImplementedError
+
+    def search(self, query_embeddings, k, where=None, ids=None):
+        """
+        k-NN search for a batch of query vectors.
+
+        Args:
+            query_embeddings: Query vectors
+            k (int): Number of neighbours per query
+            where (dict): Metadata filter, field -> accepted values
+            ids: Optional candidate product ids; only these rows are scored
+
+        Returns:
+            list: one list of (metadata, distance) per query, nearest first
+        """
+        raise NotImplementedError
+
+    def get_vectors(self, ids):
+        """
+        Stored vectors for the given ids.
+
+        Returns:
+            tuple: (found_ids, float32 matrix with one row per found id)
+        """
+        raise NotImplementedError
+
+    def get_records(self, ids):
+        """
+        Stored metadata and documents for the given ids.
+
+        Returns:
+            tuple: (found_ids, metadatas, documents), aligned
+        """
+        raise NotImplementedError
+
+    def persist(self):
+        """Flush in-memory state to persist_dir (no-op for self-persisting engines)"""
+
+
+class ChromaBackend(VectorBackend):
+    """LangChain Chroma collection (SQLite + HNSW) persisted in chroma_db"""
+
+    name = "chroma"
+    native_where = True
+    # Candidate ids beyond this are not sent as one $in list (SQLite caps the
+    # number of bound variables per statement); results are post-filtered instead
+    max_in_ids = 999
+
+    def __init__(self, persist_dir, embedding_function):
+        super().__init__(persist_dir)
+        from langchain_community.vectorstores import Chroma
+
+        self._chroma_cls = Chroma
+        self._embedding_function = embedding_function
+        self.store = Chroma(persist_directory=persist_dir, embedding_function=embedding_function)
+
+    def ids(self):
+        return self.store.get(include=[])["ids"]
+
+    def count(self):
+        return self.store._collection.count()
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        self.store._collection.upsert(
+            ids=list(ids),
+            embeddings=[list(map(float, vec)) for vec in embeddings],
+            metadatas=list(metadatas),
+            documents=list(documents)
+        )
+
+    def delete(self, ids):
+        if ids:
+            self.store.delete(ids=list(ids))
+
+    def reset(self):
+        self.store.delete_collection()
+        self.store = self._chroma_cls(
+            persist_directory=self.persist_dir,
+            embedding_function=self._embedding_function
+        )
+
+    @staticmethod
+    def _to_where(where):
+        clauses = [{field: {"$in": list(values)}} for field, values in (where or {}).items()]
+        if not clauses:
+            return None
+        if len(clauses) == 1:
+            return clauses[0]
+        return {"$and": clauses}
+
+    def get_vectors(self, ids):
+        result = self.store._collection.get(ids=list(ids), include=["embeddings"])
+        by_id = dict(zip(result["ids"], result["embeddings"]))
+        found = [pid for pid in ids if pid in by_id]
+        return found, np.asarray([by_id[pid] for pid in found], dtype=np.float32)
+
+    def get_records(self, ids):
+        ids = list(ids)
+        by_id = {}
+        for offset in range(0, len(ids), self.max_in_ids):
+            result = self.store._collection.get(
+                ids=ids[offset:offset + self.max_in_ids], include=["metadatas", "documents"]
+            )
+            by_id.update(zip(result["ids"], zip(result["metadatas"], result["documents"])))
+        found = [pid for pid in ids if pid in by_id]
+        return found, [by_id[pid][0] for pid in found], [by_id[pid][1] for pid in found]
+
+    def _query(self, query_embeddings, n_results, where):
+        results = self.store._collection.query(
+            query_embeddings=[list(map(float, vec)) for vec in query_embeddings],
+            n_results=n_results,
+            where=self._to_where(where),
+            include=["metadatas", "distances"]
+        )
+        return [list(zip(metadatas, distances)) for metadatas, distances in zip(results["metadatas"], results["distances"])]
+
+    def search(self, query_embeddings, k, where=None, ids=None):
+        if ids is None:
+            return self._query(query_embeddings, k, where)
+        if not len(ids):
+            return [[] for _ in range(len(query_embeddings))]
+        if len(ids) <= self.max_in_ids:
+            return self._query(query_embeddings, k, dict(where or {}, product_id=list(ids)))
+
+        # Too many ids for one $in: over-fetch with the where filter only and
+        # keep candidates, widening the search until k are found per query
+        allowed = set(ids)
+        total = self.count()
+        n_results = min(total, k * max(2, 2 * total // len(allowed)))
+        while True:
+            results = [
+                [match for match in matches if match[0].get("product_id") in allowed][:k]
+                for matches in self._query(query_embeddings, n_results, where)
+            ]
+            if n_results >= total or all(len(matches) >= k for matches in results):
+                return results
+            n_results = min(total, n_results * 2)
+
+
+class _RowStore:
+    """Row bookkeeping (ids, metadata, documents) shared by the NumPy-based engines"""
+
+    def __init__(self):
+        self.row_ids = []
+        self.metadatas = []
+        self.documents = []
+        self.id_to_row = {}
+        # Bumped whenever rows are added, removed or reordered (see RowAlignment)
+        self.version = 0
+        self._alignment = RowAlignment()
+        self._field_cache = {}
+        self._where_cache = {}
+
+    def _invalidate(self, reordered=False):
+        self._field_cache = {}
+        self._where_cache = {}
+        if reordered:
+            self.version += 1
+
+    def field_values(self, field):
+        """Column of metadata values as an object array (cached until the next write)"""
+        if field not in self._field_cache:
+            self._field_cache[field] = np.array([m.get(field) for m in self.metadatas], dtype=object)
+        return self._field_cache[field]
+
+    def _where_mask(self, field, values):
+        """Row mask of one where clause (cached until the next write)"""
+        key = (field, tuple(sorted(map(str, values))))
+        mask = self._where_cache.get(key)
+        if mask is None:
+            mask = np.isin(self.field_values(field), list(values))
+            self._where_cache[key] = mask
+        return mask
+
+    def mask(self, where, ids=None):
+        """Boolean row mask for a filter and candidate ids, or None when unrestricted"""
+        if not where and ids is None:
+            return None
+        mask = np.ones(len(self.row_ids), dtype=bool)
+        for field, values in (where or {}).items():
+            mask &= self._where_mask(field, values)
+        if isinstance(ids, Candidates):
+            mask &= self._alignment.mask(ids, self.row_ids, self.version)
+        elif ids is not None:
+            allowed = np.zeros(len(self.row_ids), dtype=bool)
+            rows = [self.id_to_row[pid] for pid in ids if pid in self.id_to_row]
+            allowed[rows] = True
+            mask &= allowed
+        return mask
+
+    def records(self, ids):
+        found = [pid for pid in ids if pid in self.id_to_row]
+        rows = [self.id_to_row[pid] for pid in found]
+        return found, [self.metadatas[row] for row in rows], [self.documents[row] for row in rows]
+
+    def to_payload(self):
+        return {"ids": self.row_ids, "metadatas": self.metadatas, "documents": self.documents}
+
+    def load_payload(self, payload):
+        self.row_ids = payload["ids"]
+        self.metadatas = payload["metadatas"]
+        self.documents = payload["documents"]
+        self.id_to_row = {pid: row for row, pid in enumerate(self.row_ids)}
+        self._invalidate(reordered=True)
+
+
+class ExactBackend(VectorBackend):
+    """
+    Brute-force search over one contiguous float32 matrix of normalised vectors.
+
+    Ranking is a single matrix product plus argpartition, which beats any ANN
+    index for catalogs up to a few hundred thousand rows.
+
+    With dtype 'float16' or 'int8' only a quantized copy is held in RAM; the
+    float32 vectors stay memory-mapped on disk and re-rank a shortlist of
+    k * rerank_factor candidates per query.
+
+    Writers hold a lock while they change the matrix, rows or quantized
+    copy; a search takes the lock only to capture a consistent view of them
+    and scores outside it, so searches still run in parallel. Writers never
+    modify what a captured view can see: new rows go beyond its size, and
+    overwriting existing rows copies the matrix and row lists first.
+    """
+
+    name = "exact"
+
+    def __init__(self, persist_dir, dtype="float32", rerank_factor=4):
+        super().__init__(persist_dir)
+        if dtype != "float32" and dtype not in QUANTIZED_DTYPES:
+            raise ValueError(f"Unsupported vector dtype '{dtype}'")
+        self.dtype = dtype
+        self.rerank_factor = max(1, int(rerank_factor))
+        self._lock = threading.RLock()
+        self._rows = _RowStore()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        # (codes, scales) of the quantized copy, replaced as one value
+        self._quantized = None
+        self._dirty = False
+        self._vectors_path = os.path.join(persist_dir, "vectors.npy")
+        self._rows_path = os.path.join(persist_dir, "rows.json")
+        self._load()
+
+    def _load(self):
+        if not (os.path.exists(self._vectors_path) and os.path.exists(self._rows_path)):
+            return
+        with open(self._rows_path, 'r', encoding='utf-8') as f:
+            self._rows.load_payload(json.load(f))
+        self._size = len(self._rows.row_ids)
+        if self.dtype == "float32":
+            self._matrix = np.ascontiguousarray(np.load(self._vectors_path), dtype=np.float32)
+        else:
+            self._map_full_precision()
+
+    def _map_full_precision(self):
+        """Keep float32 vectors on disk (page cache) and only the quantized copy in RAM"""
+        self._matrix = np.load(self._vectors_path, mmap_mode='r')
+        self._quantized = quantize_blocks(self._matrix[:self._size], self.dtype)
+
+    def _make_writable(self):
+        # Writes materialise the memory-mapped float32 matrix until the next persist()
+        if not self._matrix.flags.writeable:
+            self._matrix = np.array(self._matrix, dtype=np.float32)
+        self._quantized = None
+        self._dirty = True
+
+    @property
+    def matrix(self):
+        """Live (n, dim) view of the stored vectors"""
+        return self._matrix[:self._size]
+
+    def ids(self):
+        return list(self._rows.row_ids)
+
+    def count(self):
+        return self._size
+
+    def _reserve(self, rows, dim):
+        capacity = self._matrix.shape[0]
+        if self._matrix.shape[1] != dim:
+            if self._size:
+                raise ValueError(f"Embedding dimension changed from {self._matrix.shape[1]} to {dim}")
+            capacity = 0
+            self._matrix = np.zeros((0, dim), dtype=np.float32)
+        if rows <= capacity:
+            return
+        # Grow geometrically so repeated small upserts stay amortised O(1)
+        new_capacity = max(rows, capacity * 2, 64)
+        grown = np.zeros((new_capacity, dim), dtype=np.float32)
+        grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        vectors = _normalize_rows(embeddings)
+        if not len(vectors):
+            return
+        with self._lock:
+            rows = self._rows
+            new_ids = [pid for pid in dict.fromkeys(ids) if pid not in rows.id_to_row]
+            overwrites = len(dict.fromkeys(ids)) > len(new_ids)
+            current = self._matrix
+            self._make_writable()
+            self._reserve(self._size + len(new_ids), vectors.shape[1])
+            if overwrites:
+                # Copy-on-write: searches may be scoring the current arrays outside the lock
+                if self._matrix is current:
+                    self._matrix = self._matrix.copy()
+                rows.metadatas = list(rows.metadatas)
+                rows.documents = list(rows.documents)
+
+            for pid, vec, metadata, document in zip(ids, vectors, metadatas, documents):
+                row = rows.id_to_row.get(pid)
+                if row is None:
+                    row = self._size
+                    rows.id_to_row[pid] = row
+                    rows.row_ids.append(pid)
+                    rows.metadatas.append(metadata)
+                    rows.documents.append(document)
+                    self._size += 1
+                else:
+                    rows.metadatas[row] = metadata
+                    rows.documents[row] = document
+                self._matrix[row] = vec
+            rows._invalidate(reordered=bool(new_ids))
+
+    def delete(self, ids):
+        with self._lock:
+            rows = self._rows
+            drop = {rows.id_to_row[pid] for pid in ids if pid in rows.id_to_row}
+            if not drop:
+                return
+            self._make_writable()
+            keep = np.array([row for row in range(self._size) if row not in drop], dtype=np.int64)
+            self._matrix = np.ascontiguousarray(self._matrix[keep])
+            rows.load_payload({
+                "ids": [rows.row_ids[row] for row in keep],
+                "metadatas": [rows.metadatas[row] for row in keep],
+                "documents": [rows.documents[row] for row in keep],
+            })
+            self._size = len(keep)
+
+    def reset(self):
+        with self._lock:
+            self._rows = _RowStore()
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+            self._size = 0
+            self._quantized = None
+            self._dirty = True
+
+    def _top_k(self, scores, k):
+        """Indices of the k highest scores per row, best first"""
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return np.zeros((scores.shape[0], 0), dtype=np.int64)
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(top, order, axis=1)
+
+    def search(self, query_embeddings, k, where=None, ids=None):
+        queries = _normalize_rows(query_embeddings)
+        with self._lock:
+            # Writers replace or grow these under the lock; score this view
+            matrix, quantized, metadatas = self.matrix, self._quantized, self._rows.metadatas
+            mask = self._rows.mask(where, ids) if len(matrix) else None
+        if not len(matrix):
+            return [[] for _ in range(len(queries))]
+
+        candidates = None
+        if mask is not None:
+            count = int(np.count_nonzero(mask))
+            if not count:
+                return [[] for _ in range(len(queries))]
+            # Never return rows that were masked out
+            k = min(k, count)
+            if count <= GATHER_MAX_FRACTION * len(mask):
+                candidates = np.flatnonzero(mask)
+                mask = None
+
+        if quantized is not None:
+            return self._search_quantized(queries, k, matrix, quantized, metadatas, candidates, mask)
+
+        # Narrow filters score a copy of the candidate rows; broad ones score
+        # every row once and mask out the rest
+        scored = matrix if candidates is None else matrix[candidates]
+        scores = queries @ scored.T
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+        top = self._top_k(scores, k)
+
+        results = []
+        for query_row, cols in zip(scores, top):
+            rows = cols if candidates is None else candidates[cols]
+            results.append(self._to_matches(metadatas, rows, query_row[cols]))
+        return results
+
+    @staticmethod
+    def _to_matches(metadatas, rows, cosines):
+        # Unit vectors: squared L2 distance = 2 - 2 * cosine
+        distances = 2.0 - 2.0 * np.asarray(cosines)
+        return [
+            (metadatas[row], float(max(dist, 0.0)))
+            for row, dist in zip(rows, distances)
+        ]
+
+    def _search_quantized(self, queries, k, matrix, quantized, metadatas, candidates, mask):
+        """Shortlist with the quantized copy, re-rank it with float32 vectors"""
+        codes, scales = quantized
+        if candidates is not None:
+            codes = codes[candidates]
+            scales = None if scales is None else scales[candidates]
+
+        approx = approximate_scores(queries, codes, scales)
+        shortlist_k = k * self.rerank_factor
+        if mask is not None:
+            approx[:, ~mask] = -np.inf
+            shortlist_k = min(shortlist_k, int(np.count_nonzero(mask)))
+        shortlist = self._top_k(approx, shortlist_k)
+
+        results = []
+        for query, cols in zip(queries, shortlist):
+            rows = cols if candidates is None else candidates[cols]
+            # Sorted gather keeps reads from the memory-mapped file sequential
+            order = np.argsort(rows)
+            exact = np.empty(len(rows), dtype=np.float32)
+            exact[order] = matrix[rows[order]] @ query
+            best = np.argsort(-exact, kind="stable")[:k]
+            results.append(self._to_matches(metadatas, rows[best], exact[best]))
+        return results
+
+    def memory_usage(self):
+        """Bytes held privately in RAM for vectors (memory-mapped float32 is not counted)"""
+        resident = 0 if not self._matrix.flags.writeable else int(self._matrix.nbytes)
+        quantized = nbytes(*self._quantized) if self._quantized is not None else 0
+        return {
+            "dtype": self.dtype,
+            "rows": self._size,
+            "float32_resident_bytes": resident,
+            "quantized_bytes": quantized,
+            "float32_baseline_bytes": int(self._size * (self._matrix.shape[1] if self._matrix.ndim == 2 else 0) * 4),
+        }
+
+    def quantization_report(self, query_embeddings, k=10):
+        """Memory and recall@k of the configured quantization against float32"""
+        dtype = self.dtype if self.dtype in QUANTIZED_DTYPES else "int8"
+        return evaluate_quantization(
+            self.matrix, _normalize_rows(query_embeddings), k, dtype, self.rerank_factor
+        )
+
+    def get_vectors(self, ids):
+        with self._lock:
+            found = [pid for pid in ids if pid in self._rows.id_to_row]
+            rows = [self._rows.id_to_row[pid] for pid in found]
+            return found, self._matrix[rows]
+
+    def get_records(self, ids):
+        return self._rows.records(ids)
+
+    def persist(self):
+        with self._lock:
+            if self._dirty or not os.path.exists(self._vectors_path):
+                # Write beside the live file: the old one may still be memory-mapped
+                tmp_path = os.path.join(self.persist_dir, "vectors.tmp.npy")
+                np.save(tmp_path, self.matrix)
+                os.replace(tmp_path, self._vectors_path)
+                _write_json(self._rows_path, self._rows.to_payload())
+                self._dirty = False
+            if self.dtype != "float32" and self._quantized is None:
+                self._map_full_precision()
+
+
+class MappedExactBackend(ExactBackend):
+    """
+    Exact search over a catalog file shared by every worker process.
+
+    The matrix and per-row records are read through a read-only mmap of
+    catalog.bin (see shared_catalog.py), so N uvicorn workers share one
+    page-cache copy instead of loading N private ones. Writes work on a
+    private copy until persist() rewrites the file and maps it again.
+    """
+
+    name = "mmap"
+
+    def __init__(self, persist_dir, dtype="float32", rerank_factor=4):
+        self._catalog = None
+        self._catalog_path = os.path.join(persist_dir, CATALOG_FILE)
+        super().__init__(persist_dir, dtype=dtype, rerank_factor=rerank_factor)
+
+    def _load(self):
+        if os.path.exists(self._catalog_path):
+            self._open_catalog()
+
+    def _open_catalog(self):
+        catalog = CatalogFile(self._catalog_path)
+        self._rows.load_payload({
+            "ids": catalog.ids,
+            "metadatas": catalog.column("metadata"),
+            "documents": catalog.column("document"),
+        })
+        # Earlier mappings are released once no result view references them
+        self._catalog = catalog
+        self._matrix = catalog.matrix
+        self._size = len(catalog)
+        self._quantized = quantize_blocks(self._matrix, self.dtype) if self.dtype != "float32" else None
+
+    def _make_writable(self):
+        rows = self._rows
+        if not isinstance(rows.metadatas, list):
+            rows.metadatas = list(rows.metadatas)
+            rows.documents = list(rows.documents)
+        super()._make_writable()
+
+    def persist(self):
+        with self._lock:
+            if self._dirty or not os.path.exists(self._catalog_path):
+                write_catalog_file(
+                    self._catalog_path, self._rows.row_ids, self.matrix,
+                    self._rows.metadatas, self._rows.documents
+                )
+                self._dirty = False
+                # Drop the private copy and read through the shared mapping from now on
+                self._open_catalog()
+
+
+class HnswBackend(VectorBackend):
+    """
+    Approximate search with an hnswlib graph.
+
+    Recall/latency trade-off is controlled by M and ef_construction (build
+    time) and ef_search (query time).
+
+    hnswlib cannot resize or add items while a query walks the graph, so
+    writes (catalog sync) and queries are serialised on one lock; the id and
+    metadata maps are only read under it too.
+    """
+
+    name = "hnsw"
+
+    def __init__(self, persist_dir, M=16, ef_construction=200, ef_search=64):
+        super().__init__(persist_dir)
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("hnswlib is required for the 'hnsw' vector backend (pip install hnswlib)") from e
+
+        self._hnswlib = hnswlib
+        self._lock = threading.RLock()
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._index = None
+        self._dim = None
+        # Labels are stable ints; deleted labels are tombstoned in the graph
+        self._label_to_id = {}
+        self._id_to_label = {}
+        self._metadatas = {}
+        self._documents = {}
+        self._next_label = 0
+        self._index_path = os.path.join(persist_dir, "index.bin")
+        self._rows_path = os.path.join(persist_dir, "rows.json")
+        self._load()
+
+    def _new_index(self, dim, capacity):
+        index = self._hnswlib.Index(space='l2', dim=dim)
+        index.init_index(
+            max_elements=max(capacity, 64),
+            ef_construction=self.ef_construction,
+            M=self.M,
+            allow_replace_deleted=True
+        )
+        index.set_ef(self.ef_search)
+        return index
+
+    def _load(self):
+        if not (os.path.exists(self._index_path) and os.path.exists(self._rows_path)):
+            return
+        with open(self._rows_path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        self._dim = payload["dim"]
+        self._next_label = payload["next_label"]
+        for label, pid, metadata, document in payload["rows"]:
+            self._label_to_id[label] = pid
+            self._id_to_label[pid] = label
+            self._metadatas[pid] = metadata
+            self._documents[pid] = document
+        self._index = self._hnswlib.Index(space='l2', dim=self._dim)
+        self._index.load_index(self._index_path, allow_replace_deleted=True)
+        self._index.set_ef(self.ef_search)
+
+    def ids(self):
+        with self._lock:
+            return list(self._id_to_label)
+
+    def count(self):
+        with self._lock:
+            return len(self._id_to_label)
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        vectors = _normalize_rows(embeddings)
+        if not len(vectors):
+            return
+        with self._lock:
+            if self._index is None:
+                self._dim = vectors.shape[1]
+                self._index = self._new_index(self._dim, len(vectors))
+
+            needed = self._index.get_current_count() + len(vectors)
+            if needed > self._index.get_max_elements():
+                self._index.resize_index(max(needed, self._index.get_max_elements() * 2))
+
+            labels = []
+            for pid, metadata, document in zip(ids, metadatas, documents):
+                label = self._id_to_label.get(pid)
+                if label is None:
+                    label = self._next_label
+                    self._next_label += 1
+                    self._id_to_label[pid] = label
+                    self._label_to_id[label] = pid
+                labels.append(label)
+                self._metadatas[pid] = metadata
+                self._documents[pid] = document
+
+            # Re-adding an existing label replaces its vector in place
+            self._index.add_items(vectors, np.asarray(labels, dtype=np.int64), replace_deleted=True)
+
+    def delete(self, ids):
+        with self._lock:
+            for pid in ids:
+                label = self._id_to_label.pop(pid, None)
+                if label is None:
+                    continue
+                self._label_to_id.pop(label, None)
+                self._metadatas.pop(pid, None)
+                self._documents.pop(pid, None)
+                self._index.mark_deleted(label)
+
+    def reset(self):
+        with self._lock:
+            self._index = None
+            self._dim = None
+            self._label_to_id = {}
+            self._id_to_label = {}
+            self._metadatas = {}
+            self._documents = {}
+            self._next_label = 0
+
+    def _allowed(self, where, ids=None):
+        if not where and ids is None:
+            return None
+        pool = self._metadatas if ids is None else [pid for pid in ids if pid in self._metadatas]
+        accepted = {field: set(values) for field, values in (where or {}).items()}
+        return {
+            self._id_to_label[pid]
+            for pid in pool
+            if all(self._metadatas[pid].get(field) in values for field, values in accepted.items())
+        }
+
+    def search(self, query_embeddings, k, where=None, ids=None):
+        queries = _normalize_rows(query_embeddings)
+        with self._lock:
+            if self._index is None or not self._id_to_label:
+                return [[] for _ in range(len(queries))]
+
+            allowed = self._allowed(where, ids)
+            limit = len(self._id_to_label) if allowed is None else len(allowed)
+            k = min(k, limit)
+            if k <= 0:
+                return [[] for _ in range(len(queries))]
+
+            # ef stays at ef_search; it must be at least k for hnswlib to return
+            # k results, so a larger k raises it for this query only
+            if k > self.ef_search:
+                self._index.set_ef(k)
+            try:
+                if allowed is None:
+                    labels, distances = self._index.knn_query(queries, k=k)
+                else:
+                    labels, distances = self._index.knn_query(queries, k=k, filter=allowed.__contains__)
+            except RuntimeError:
+                # The graph walk can reach fewer than k allowed labels (sparse
+                # filters, tombstones); score the allowed rows exactly instead
+                labels, distances = self._exact_knn(queries, k, self._label_to_id if allowed is None else allowed)
+            finally:
+                if k > self.ef_search:
+                    self._index.set_ef(self.ef_search)
+
+            results = []
+            for row_labels, row_distances in zip(labels, distances):
+                matches = []
+                for label, dist in zip(row_labels, row_distances):
+                    pid = self._label_to_id.get(int(label))
+                    if pid is not None:
+                        matches.append((self._metadatas[pid], float(dist)))
+                results.append(matches)
+            return results
+
+    def _exact_knn(self, queries, k, labels):
+        """Brute-force k-NN over the given labels, in hnswlib's squared-L2 terms"""
+        labels = np.fromiter(labels, dtype=np.int64)
+        vectors = np.asarray(self._index.get_items(labels), dtype=np.float32)
+        distances = (
+            np.sum(queries ** 2, axis=1)[:, None] - 2.0 * queries @ vectors.T + np.sum(vectors ** 2, axis=1)[None, :]
+        )
+        top = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return labels[top], np.take_along_axis(distances, top, axis=1)
+
+    def get_vectors(self, ids):
+        with self._lock:
+            found = [pid for pid in ids if pid in self._id_to_label]
+            if not found:
+                return found, np.zeros((0, self._dim or 0), dtype=np.float32)
+            labels = [self._id_to_label[pid] for pid in found]
+            return found, np.asarray(self._index.get_items(labels), dtype=np.float32)
+
+    def get_records(self, ids):
+        with self._lock:
+            found = [pid for pid in ids if pid in self._metadatas]
+            return found, [self._metadatas[pid] for pid in found], [self._documents[pid] for pid in found]
+
+    def persist(self):
+        with self._lock:
+            if self._index is None:
+                for path in (self._index_path, self._rows_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                return
+            self._index.save_index(self._index_path)
+            _write_json(self._rows_path, {
+                "dim": self._dim,
+                "next_label": self._next_label,
+                "rows": [
+                    [label, pid, self._metadatas[pid], self._documents[pid]]
+                    for label, pid in self._label_to_id.items()
+                ],
+            })
+
+
+def create_backend(name, base_dir, embedding_function=None, **options):
+    """
+    Instantiate the configured vector backend.
+
+    Args:
+        name (str): 'chroma', 'exact', 'mmap' or 'hnsw'
+        base_dir (str): Directory of the recommendations component
+        embedding_function: LangChain embeddings (only used by Chroma)
+        options: Engine tuning knobs (dtype, rerank_factor for exact/mmap;
+            M, ef_construction, ef_search for hnsw)
+    """
+    name = (name or "chroma").lower()
+    if name == "chroma":
+        return ChromaBackend(os.path.join(base_dir, "chroma_db"), embedding_function)
+    if name == "exact":
+        return ExactBackend(os.path.join(base_dir, "vector_index", "exact"), **options)
+    if name == "mmap":
+        return MappedExactBackend(os.path.join(base_dir, "vector_index", "mmap"), **options)
+    if name == "hnsw":
+        return HnswBackend(os.path.join(base_dir, "vector_index", "hnsw"), **options)
+    raise ValueError(f"Unknown vector backend '{name}', expected one of {BACKEND_NAMES}")